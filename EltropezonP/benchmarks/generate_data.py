@@ -0,0 +1,150 @@
+# benchmarks/generate_data.py
+"""
+Genera un libro de transacciones sintético y reproducible para las mediciones.
+
+Usa las categorías reales de config.py con montos y frecuencias típicos de un
+negocio pequeño: más ventas en diciembre y en los fines de semana, salarios a
+mitad y fin de mes, gastos fijos una vez al mes. Con la misma semilla y el
+mismo número de filas siempre se obtiene el mismo archivo.
+
+Uso:
+    python -m benchmarks.generate_data --rows 100k --out benchmarks/data/ledger_100k.db
+"""
+
+import argparse
+import math
+import os
+import random
+import time
+from datetime import date, timedelta
+
+from config import EXPENSE_CATEGORIES, INCOME_CATEGORIES
+from database.db_manager import DBManager
+from models.transaction import Transaction
+
+SIZES = {"10k": 10_000, "100k": 100_000, "1M": 1_000_000, "10M": 10_000_000}
+
+# Último día del libro; fijo para que el resultado no dependa de la fecha actual
+END_DATE = date(2025, 12, 31)
+
+# Peso de cada mes en el volumen de ventas (enero = 1)
+MONTH_WEIGHTS = [0.8, 0.9, 0.95, 1.0, 1.0, 0.95, 1.05, 1.1, 0.95, 1.0, 1.15, 1.6]
+# Peso de cada día de la semana (lunes = 0)
+WEEKDAY_WEIGHTS = [0.8, 0.85, 0.9, 0.95, 1.15, 1.35, 1.0]
+
+# Por categoría: (proporción de las filas, monto típico, dispersión, descripciones)
+INCOME_PROFILE = {
+    "Venta": (0.62, 45.0, 0.8, ["Venta mostrador", "Venta al mayor", "Venta en línea", "Venta de temporada",
+                                "Venta combo familiar", "Venta a crédito cobrada", "Venta de bebidas"]),
+    "Servicio": (0.06, 120.0, 0.6, ["Servicio de delivery", "Servicio de catering", "Servicio de eventos"]),
+    "Inversión": (0.005, 2500.0, 0.5, ["Inversión de socios", "Rendimiento de inversión"]),
+    "Otros Ingresos": (0.015, 80.0, 0.9, ["Reintegro de proveedor", "Alquiler de espacio", "Propinas"]),
+}
+EXPENSE_PROFILE = {
+    "Materia Prima": (0.18, 150.0, 0.7, ["Compra de harina", "Compra de queso", "Compra de carne",
+                                         "Compra de verduras", "Compra de bebidas", "Compra de empaques"]),
+    "Mano de Obra": (0.03, 60.0, 0.4, ["Pago de ayudante", "Horas extra cocina", "Pago por jornada"]),
+    "Gastos Operativos": (0.05, 90.0, 0.6, ["Pago de electricidad", "Pago de agua", "Pago de internet",
+                                            "Compra de gas", "Artículos de limpieza"]),
+    "Salarios Fijos": (0.02, 400.0, 0.2, ["Nómina quincenal", "Bono de alimentación"]),
+    "Publicidad": (0.01, 70.0, 0.7, ["Publicidad en redes", "Volantes impresos", "Promoción de temporada"]),
+    "Mantenimiento": (0.01, 130.0, 0.8, ["Mantenimiento de nevera", "Reparación de horno", "Fumigación"]),
+    "Otros Gastos": (0.005, 50.0, 1.0, ["Gastos varios", "Comisión bancaria", "Transporte"]),
+}
+# Categorías que se pagan en fechas fijas del mes
+FIXED_DAYS = {"Salarios Fijos": (15, 30), "Gastos Operativos": (5,), "Mantenimiento": (20,)}
+
+
+def parse_size(text: str) -> int:
+    """Convierte '10k', '1M' o '2500' en un número de filas."""
+    if text in SIZES:
+        return SIZES[text]
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(text[-1].lower())
+    return int(float(text[:-1]) * multiplier) if multiplier else int(text)
+
+
+def _build_categories():
+    """Lista de (tipo, categoría, monto típico, dispersión, descripciones) y sus pesos acumulados."""
+    assert set(INCOME_PROFILE) == set(INCOME_CATEGORIES), "Las categorías de ingreso no coinciden con config.py"
+    assert set(EXPENSE_PROFILE) == set(EXPENSE_CATEGORIES), "Las categorías de gasto no coinciden con config.py"
+    categories, weights = [], []
+    for transaction_type, profile in (("Ingreso", INCOME_PROFILE), ("Gasto", EXPENSE_PROFILE)):
+        for category, (share, typical, spread, descriptions) in profile.items():
+            categories.append((transaction_type, category, typical, spread, descriptions))
+            weights.append(share)
+    total = sum(weights)
+    cumulative, running = [], 0.0
+    for weight in weights:
+        running += weight / total
+        cumulative.append(running)
+    return categories, cumulative
+
+
+def _build_days(rows: int):
+    """Días del libro y pesos acumulados según la temporada; unas 150 filas por día en promedio."""
+    day_count = max(365, math.ceil(rows / 150))
+    days = [END_DATE - timedelta(days=offset) for offset in range(day_count - 1, -1, -1)]
+    cumulative, running = [], 0.0
+    for day in days:
+        running += MONTH_WEIGHTS[day.month - 1] * WEEKDAY_WEIGHTS[day.weekday()]
+        cumulative.append(running)
+    return days, cumulative
+
+
+def generate_transactions(rows: int, seed: int = 7):
+    """Genera las transacciones en orden de fecha aleatorio pero reproducible."""
+    rng = random.Random(seed)
+    categories, category_weights = _build_categories()
+    days, day_weights = _build_days(rows)
+
+    for _ in range(rows):
+        transaction_type, category, typical, spread, descriptions = rng.choices(
+            categories, cum_weights=category_weights)[0]
+        day = rng.choices(days, cum_weights=day_weights)[0]
+        fixed_days = FIXED_DAYS.get(category)
+        if fixed_days:
+            # Los pagos fijos caen en su día del mes (o el último día si el mes es corto)
+            month_end = (day.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+            day = day.replace(day=min(rng.choice(fixed_days), month_end.day))
+        amount = round(typical * rng.lognormvariate(0, spread), 2) or 0.01
+        # Una parte de las descripciones lleva un detalle, para tener miles de descripciones únicas
+        description = rng.choice(descriptions)
+        if rng.random() < 0.3:
+            description = f"{description} #{rng.randint(1, 2000)}"
+        yield Transaction(date=day.isoformat(), description=description, amount=amount,
+                          type=transaction_type, category=category)
+
+
+def generate_database(path: str, rows: int, seed: int = 7, chunk_size: int = 50_000) -> float:
+    """Crea la base de datos sintética en path (reemplazándola) y devuelve los segundos empleados."""
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    started = time.perf_counter()
+    db_manager = DBManager(path)
+    try:
+        db_manager.add_transactions_bulk(generate_transactions(rows, seed), chunk_size=chunk_size)
+    finally:
+        db_manager.close()
+    return time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera un libro de transacciones sintético.")
+    parser.add_argument("--rows", default="100k", help="Filas: 10k, 100k, 1M, 10M o un número.")
+    parser.add_argument("--out", help="Archivo de salida (por defecto benchmarks/data/ledger_<filas>.db).")
+    parser.add_argument("--seed", type=int, default=7, help="Semilla del generador.")
+    args = parser.parse_args(argv)
+
+    rows = parse_size(args.rows)
+    path = args.out or os.path.join(os.path.dirname(__file__), "data", f"ledger_{args.rows}.db")
+    elapsed = generate_database(path, rows, args.seed)
+    print(f"{rows} transacciones generadas en {path} ({elapsed:.1f} s).")
+
+
+if __name__ == "__main__":
+    main()
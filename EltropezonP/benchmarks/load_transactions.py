@@ -0,0 +1,73 @@
+# benchmarks/load_transactions.py
+"""
+Compara el tiempo y la memoria máxima de cargar las transacciones en un DataFrame:
+
+- objetos: filas -> Transaction -> dict -> DataFrame, con pd.to_datetime sobre las fechas
+  (el camino que usaba el análisis antes de las columnas de NumPy).
+- columnas: DBManager.get_transaction_columns -> DataFrame con tipos compactos
+  (FinancialAnalytics.get_transactions_frame).
+
+Uso:
+    python -m benchmarks.load_transactions ruta/a/finances.db
+"""
+
+import argparse
+import dataclasses
+import gc
+import time
+import tracemalloc
+
+import pandas as pd
+
+from business_logic.analytics import FinancialAnalytics
+from database.db_manager import DBManager
+
+
+def load_with_objects(db_manager: DBManager):
+    transactions = db_manager.get_all_transactions()
+    df = pd.DataFrame([dataclasses.asdict(t) for t in transactions])
+    df['date'] = pd.to_datetime(df['date'])
+    return df
+
+
+def load_with_columns(db_manager: DBManager):
+    return FinancialAnalytics(db_manager).get_transactions_frame(include_descriptions=True)
+
+
+def measure(loader, db_manager: DBManager) -> tuple:
+    """
+    Devuelve (segundos, memoria máxima en MB, filas, memoria del DataFrame en MB).
+    El tiempo se toma sin tracemalloc, que ralentiza mucho las asignaciones.
+    """
+    gc.collect()
+    started = time.perf_counter()
+    df = loader(db_manager)
+    elapsed = time.perf_counter() - started
+    rows, frame_size = len(df), df.memory_usage(deep=True).sum() / 2 ** 20
+    del df
+
+    gc.collect()
+    tracemalloc.start()
+    loader(db_manager)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 2 ** 20, rows, frame_size
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mide la carga de transacciones en un DataFrame.")
+    parser.add_argument("db_path", help="Base de datos a medir (no se modifica salvo para migrarla).")
+    args = parser.parse_args(argv)
+
+    db_manager = DBManager(args.db_path)
+    try:
+        print(f"{'Camino':<10} {'Filas':>10} {'Tiempo':>10} {'Pico mem.':>12} {'DataFrame':>12}")
+        for name, loader in (("objetos", load_with_objects), ("columnas", load_with_columns)):
+            elapsed, peak, rows, frame = measure(loader, db_manager)
+            print(f"{name:<10} {rows:>10} {elapsed:>9.2f}s {peak:>9.0f} MB {frame:>9.0f} MB")
+    finally:
+        db_manager.close()
+
+
+if __name__ == "__main__":
+    main()
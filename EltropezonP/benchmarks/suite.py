@@ -0,0 +1,255 @@
+# benchmarks/suite.py
+"""
+Mide las operaciones frecuentes de DBManager y FinancialAnalytics sobre una base
+de datos (por ejemplo una generada con benchmarks.generate_data).
+
+Cada medición se ejecuta en un proceso aparte, así la memoria máxima (RSS) de una
+no se mezcla con la de otra. El resultado se guarda en JSON con percentiles de
+latencia y memoria máxima, y se compara con una línea base guardada antes.
+
+Uso:
+    python -m benchmarks.suite benchmarks/data/ledger_100k.db --output resultados.json
+    python -m benchmarks.suite benchmarks/data/ledger_100k.db --save-baseline
+    python -m benchmarks.suite benchmarks/data/ledger_100k.db --baseline benchmarks/results/baseline_ledger_100k.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+
+from models.transaction import Transaction
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+# Un cambio mayor a este porcentaje respecto a la línea base se marca como mejora o regresión
+THRESHOLD_PERCENT = 10.0
+
+
+def _peak_rss_mb():
+    """Memoria máxima del proceso en MB, o None si el sistema no la informa."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa KiB y macOS bytes
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+def _date_range(db_manager) -> tuple:
+    """Rango del último año con datos, para las mediciones con fechas."""
+    from models.transaction import day_to_date
+
+    last_day = db_manager.conn.execute("SELECT MAX(day) FROM transactions").fetchone()[0] or 0
+    return day_to_date(last_day - 364), day_to_date(last_day)
+
+
+def _analytics_case(method_name: str, use_range: bool):
+    def setup(db_manager):
+        from business_logic.analytics import FinancialAnalytics
+        analytics = FinancialAnalytics(db_manager)
+        dates = _date_range(db_manager) if use_range else (None, None)
+
+        def run():
+            # Se limpia la caché para medir el cálculo y no la consulta a la caché
+            analytics.cache.clear()
+            getattr(analytics, method_name)(*dates)
+        return run, None
+    return setup
+
+
+def _add_transaction(db_manager):
+    inserted = []
+
+    def run():
+        db_manager.add_transaction(Transaction(date="2025-06-15", description="Medición de inserción",
+                                               amount=12.34, type="Gasto", category="Otros Gastos"))
+        inserted.append(db_manager.conn.execute("SELECT last_insert_rowid()").fetchone()[0])
+
+    def teardown():
+        for transaction_id in inserted:
+            db_manager.delete_transaction(transaction_id)
+    return run, teardown
+
+
+def _get_all_transactions(db_manager):
+    return (lambda: db_manager.get_all_transactions()), None
+
+
+def _get_transaction_by_description(db_manager):
+    descriptions = [row[0] for row in db_manager.conn.execute(
+        "SELECT description FROM descriptions ORDER BY uses DESC LIMIT 50")]
+    position = [0]
+
+    def run():
+        db_manager.get_transaction_by_description(descriptions[position[0] % len(descriptions)])
+        position[0] += 1
+    return run, None
+
+
+def _get_all_unique_descriptions(db_manager):
+    return (lambda: db_manager.get_all_unique_descriptions()), None
+
+
+def _get_break_even_point(db_manager):
+    from business_logic.analytics import FinancialAnalytics
+    analytics = FinancialAnalytics(db_manager)
+    return (lambda: analytics.get_break_even_point(5000.0, 12.5, 7.25)), None
+
+
+# Nombre -> (función que prepara la medición, repeticiones para 100k filas)
+# Las repeticiones se ajustan al tamaño de la base de datos.
+BENCHMARKS = {
+    "add_transaction": (_add_transaction, 200),
+    "get_all_transactions": (_get_all_transactions, 5),
+    "get_transaction_by_description": (_get_transaction_by_description, 500),
+    "get_all_unique_descriptions": (_get_all_unique_descriptions, 50),
+    "analytics.get_financial_summary": (_analytics_case("get_financial_summary", False), 50),
+    "analytics.get_financial_summary[año]": (_analytics_case("get_financial_summary", True), 50),
+    "analytics.get_monthly_summary": (_analytics_case("get_monthly_summary", False), 50),
+    "analytics.get_monthly_summary[año]": (_analytics_case("get_monthly_summary", True), 50),
+    "analytics.get_expenses_by_category": (_analytics_case("get_expenses_by_category", False), 50),
+    "analytics.get_expenses_by_category[año]": (_analytics_case("get_expenses_by_category", True), 50),
+    "analytics.get_transactions_frame[año]": (_analytics_case("get_transactions_frame", True), 5),
+    "analytics.get_break_even_point": (_get_break_even_point, 1000),
+}
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """Percentil por interpolación lineal sobre valores ya ordenados."""
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def run_benchmark(db_path: str, name: str, repetitions: int) -> dict:
+    """Ejecuta una medición (en el proceso actual) y devuelve sus estadísticas."""
+    from database.db_manager import DBManager
+
+    db_manager = DBManager(db_path, initialize=False)
+    setup, _ = BENCHMARKS[name]
+    run, teardown = setup(db_manager)
+    run()  # Calentamiento: caché de páginas y sentencias preparadas
+    timings = []
+    for _ in range(repetitions):
+        started = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - started) * 1000)
+    if teardown:
+        teardown()
+    db_manager.close()
+
+    timings.sort()
+    return {
+        "runs": repetitions,
+        "mean_ms": sum(timings) / len(timings),
+        "p50_ms": percentile(timings, 0.50),
+        "p95_ms": percentile(timings, 0.95),
+        "p99_ms": percentile(timings, 0.99),
+        "max_ms": timings[-1],
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def run_suite(db_path: str, names: list, scale: float = 1.0) -> dict:
+    """Ejecuta las mediciones indicadas, cada una en un proceso nuevo."""
+    import sqlite3
+
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+
+    results = {}
+    context = multiprocessing.get_context("spawn")
+    for name in names:
+        _, base_repetitions = BENCHMARKS[name]
+        # Menos repeticiones en bases de datos grandes para las operaciones que recorren todo
+        size_factor = min(1.0, 100_000 / max(rows, 1)) if base_repetitions <= 50 else 1.0
+        repetitions = max(3, int(base_repetitions * size_factor * scale))
+        with context.Pool(processes=1, maxtasksperchild=1) as pool:
+            results[name] = pool.apply(run_benchmark, (db_path, name, repetitions))
+        result = results[name]
+        rss = f"{result['peak_rss_mb']:.0f} MB" if result["peak_rss_mb"] is not None else "-"
+        print(f"{name:<45} p50 {result['p50_ms']:9.2f} ms  p95 {result['p95_ms']:9.2f} ms  "
+              f"p99 {result['p99_ms']:9.2f} ms  RSS {rss}")
+
+    return {
+        "meta": {
+            "db_path": os.path.abspath(db_path),
+            "rows": rows,
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict) -> bool:
+    """Imprime la comparación de p50 contra la línea base. Devuelve False si hubo regresiones."""
+    print(f"\nComparación con la línea base del {baseline['meta']['created']} "
+          f"({baseline['meta']['rows']} filas):")
+    ok = True
+    for name, result in current["results"].items():
+        previous = baseline["results"].get(name)
+        if not previous:
+            print(f"  {name:<45} (sin línea base)")
+            continue
+        change = (result["p50_ms"] - previous["p50_ms"]) / previous["p50_ms"] * 100 if previous["p50_ms"] else 0.0
+        if change > THRESHOLD_PERCENT:
+            verdict, ok = "REGRESIÓN", False
+        elif change < -THRESHOLD_PERCENT:
+            verdict = "mejora"
+        else:
+            verdict = "igual"
+        speedup = previous["p50_ms"] / result["p50_ms"] if result["p50_ms"] else float("inf")
+        print(f"  {name:<45} {previous['p50_ms']:9.2f} -> {result['p50_ms']:9.2f} ms "
+              f"({change:+6.1f}%, x{speedup:.2f}) {verdict}")
+    return ok
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Mediciones de rendimiento de EL TROPEZON.")
+    parser.add_argument("db_path", help="Base de datos a medir (se recomienda una sintética).")
+    parser.add_argument("--only", nargs="*", help="Nombres de las mediciones a ejecutar.")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplica el número de repeticiones.")
+    parser.add_argument("--output", help="Archivo JSON donde guardar los resultados.")
+    parser.add_argument("--baseline", help="Archivo JSON de una ejecución anterior para comparar.")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Guarda los resultados como línea base en benchmarks/results/.")
+    args = parser.parse_args(argv)
+
+    names = args.only or list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"Mediciones desconocidas: {', '.join(unknown)}")
+
+    current = run_suite(args.db_path, names, args.scale)
+
+    db_name = os.path.splitext(os.path.basename(args.db_path))[0]
+    default_baseline = os.path.join(RESULTS_DIR, f"baseline_{db_name}.json")
+    outputs = [args.output] if args.output else []
+    if args.save_baseline:
+        outputs.append(default_baseline)
+    for output in outputs:
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, "w", encoding="utf-8") as file:
+            json.dump(current, file, indent=2, ensure_ascii=False)
+        print(f"Resultados guardados en {output}")
+
+    baseline_path = args.baseline or (default_baseline if not args.save_baseline else None)
+    if baseline_path and os.path.exists(baseline_path):
+        with open(baseline_path, encoding="utf-8") as file:
+            return 0 if compare(current, json.load(file)) else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
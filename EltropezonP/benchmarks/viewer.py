@@ -0,0 +1,128 @@
+# benchmarks/viewer.py
+"""
+Mide el modelo de la tabla de transacciones (gui/transaction_viewer.py) sobre una
+base de datos grande, por ejemplo una de 500k filas de benchmarks.generate_data:
+
+- apertura: COUNT(*) y primera página, como al abrir la ventana o cambiar un filtro.
+- recorrido: cargar todas las filas con fetchMore, como al desplazarse hasta el final,
+  con la memoria máxima de Python (tracemalloc) que ocupa el modelo.
+- data(): lecturas de celdas dentro de las páginas en caché y en filas al azar.
+- cambios: añadir, modificar y borrar una transacción con apply_change, frente a
+  volver a crear el modelo como se hacía antes.
+
+La transacción de la medición de cambios se añade y se borra al final.
+
+Uso:
+    python -m benchmarks.generate_data --rows 500000 --out benchmarks/data/ledger_500k.db
+    python -m benchmarks.viewer benchmarks/data/ledger_500k.db
+"""
+
+import argparse
+import gc
+import random
+import sys
+import time
+import tracemalloc
+
+from PyQt6.QtCore import QCoreApplication, QModelIndex, Qt
+
+from benchmarks.suite import percentile
+from database.db_manager import DBManager
+from gui.transaction_viewer import TransactionTableModel
+from models.transaction import Transaction
+
+
+def _timings(function, repetitions: int) -> list:
+    timings = []
+    for _ in range(repetitions):
+        started = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - started) * 1000)
+    return sorted(timings)
+
+
+def _report(name: str, timings: list):
+    print(f"{name:<38} p50 {percentile(timings, 0.50):9.3f} ms  p95 {percentile(timings, 0.95):9.3f} ms  "
+          f"máx {timings[-1]:9.3f} ms  ({len(timings)} veces)")
+
+
+def _load_all(model: TransactionTableModel):
+    while model.canFetchMore(QModelIndex()):
+        model.fetchMore(QModelIndex())
+
+
+def measure_model(db_manager: DBManager):
+    _report("apertura (conteo + 1.ª página)", _timings(lambda: TransactionTableModel(db_manager), 5))
+
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    model = TransactionTableModel(db_manager)
+    _load_all(model)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{'recorrido completo':<38} {model.rowCount()} filas en {elapsed:.2f} s, "
+          f"pico de memoria {peak / 2 ** 20:.1f} MB")
+
+    role = Qt.ItemDataRole.DisplayRole
+    columns = model.columnCount()
+    first_visible = max(0, model.rowCount() - 40)
+    visible = [model.index(row, column)
+               for row in range(first_visible, model.rowCount()) for column in range(columns)]
+    _report("data() en la ventana visible", _timings(lambda: [model.data(index, role) for index in visible], 50))
+
+    rows = [random.randrange(model.rowCount()) for _ in range(200)]
+    position = [0]
+
+    def random_cell():
+        model.data(model.index(rows[position[0] % len(rows)], 2), role)
+        position[0] += 1
+    _report("data() en filas al azar", _timings(random_cell, len(rows)))
+    return model
+
+
+def measure_changes(db_manager: DBManager, model: TransactionTableModel):
+    db_manager.changes.subscribe(model.apply_change)
+    newest = model.row_data(0)
+    transaction = Transaction(date=newest[1], description="Medición del visor", amount=12.34, type="Gasto",
+                              category="Otros Gastos")
+    timings = {"añadir": [], "modificar": [], "borrar": []}
+    try:
+        for _ in range(20):
+            started = time.perf_counter()
+            db_manager.add_transaction(transaction)
+            timings["añadir"].append((time.perf_counter() - started) * 1000)
+            transaction.id = model.row_data(0)[0]
+            transaction.amount += 1
+            started = time.perf_counter()
+            db_manager.update_transaction(transaction)
+            timings["modificar"].append((time.perf_counter() - started) * 1000)
+            started = time.perf_counter()
+            db_manager.delete_transaction(transaction.id)
+            timings["borrar"].append((time.perf_counter() - started) * 1000)
+            transaction.id = None
+    finally:
+        db_manager.changes.unsubscribe(model.apply_change)
+    for name, values in timings.items():
+        _report(f"{name} (escritura + apply_change)", sorted(values))
+    _report("recarga completa del modelo", _timings(lambda: TransactionTableModel(db_manager), 5))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mide el modelo de la tabla de transacciones.")
+    parser.add_argument("db_path", help="Base de datos a medir; la transacción de prueba se borra al terminar.")
+    args = parser.parse_args(argv)
+
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+    db_manager = DBManager(args.db_path)
+    try:
+        model = measure_model(db_manager)
+        measure_changes(db_manager, model)
+    finally:
+        db_manager.close()
+    del app
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# benchmarks/write_behind.py
+"""
+Compara la escritura con confirmación por fila (la normal de DBManager) con la
+escritura diferida por lotes (database/write_behind.py) al registrar muchas
+transacciones seguidas, como en las horas de más movimiento en el mostrador.
+
+Para cada modo informa:
+- el tiempo que add_transaction retiene a quien llama (el hilo de la interfaz),
+- el tiempo desde la llamada hasta la confirmación en disco (on_done),
+- el rendimiento total en transacciones por segundo hasta que todo está en disco.
+
+Las mediciones se hacen sobre copias de la base de datos indicada (o sobre una
+base vacía), así el archivo original no cambia. Para comparar a igual durabilidad
+la escritura por fila se mide también con synchronous=FULL, el del hilo escritor.
+
+Uso:
+    python -m benchmarks.write_behind --rows 5000
+    python -m benchmarks.write_behind benchmarks/data/ledger_100k.db --rows 5000 --batch-rows 500 --delay-ms 20
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from benchmarks.suite import percentile
+from database.db_manager import DBManager
+from models.transaction import Transaction
+
+
+def _transactions(rows: int):
+    for number in range(rows):
+        yield Transaction(date="2025-06-15", description=f"Venta mostrador {number % 50}",
+                          amount=5 + number % 40, type="Ingreso", category="Venta")
+
+
+def _copy_database(source, directory: str, name: str) -> str:
+    path = os.path.join(directory, name)
+    if source:
+        source_db = DBManager(source)
+        source_db.create_snapshot(path)
+        source_db.close()
+    return path
+
+
+def measure(db_path: str, rows: int, write_behind: bool = False, synchronous: str = None,
+            batch_rows: int = 500, delay_ms: int = 50) -> dict:
+    db_manager = DBManager(db_path)
+    if synchronous:
+        db_manager.conn.execute(f"PRAGMA synchronous = {synchronous}")
+    if write_behind:
+        db_manager.enable_write_behind(batch_rows, delay_ms)
+
+    call_ms, ack_ms = [], []
+
+    def acknowledged(submitted):
+        return lambda error: ack_ms.append((time.perf_counter() - submitted) * 1000)
+
+    started = time.perf_counter()
+    for transaction in _transactions(rows):
+        submitted = time.perf_counter()
+        db_manager.add_transaction(transaction, on_done=acknowledged(submitted))
+        call_ms.append((time.perf_counter() - submitted) * 1000)
+        # El hilo de la interfaz entregaría los resultados cuando el escritor avisa
+        db_manager.deliver_write_results()
+    db_manager.flush_writes()
+    elapsed = time.perf_counter() - started
+    db_manager.close()
+
+    call_ms.sort()
+    ack_ms.sort()
+    return {
+        "rows_per_second": rows / elapsed,
+        "call_p50_ms": percentile(call_ms, 0.50),
+        "call_p99_ms": percentile(call_ms, 0.99),
+        "ack_p50_ms": percentile(ack_ms, 0.50),
+        "ack_p99_ms": percentile(ack_ms, 0.99),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compara la escritura por fila con la escritura diferida.")
+    parser.add_argument("db_path", nargs="?", help="Base de datos de partida (se copia); por defecto, una vacía.")
+    parser.add_argument("--rows", type=int, default=5000, help="Transacciones a registrar en cada modo.")
+    parser.add_argument("--batch-rows", type=int, default=500, help="Máximo de operaciones por lote.")
+    parser.add_argument("--delay-ms", type=int, default=50, help="Espera máxima para completar un lote.")
+    args = parser.parse_args(argv)
+
+    modes = [
+        ("por fila (NORMAL)", {}),
+        ("por fila (FULL)", {"synchronous": "FULL"}),
+        ("diferida por lotes", {"write_behind": True, "batch_rows": args.batch_rows, "delay_ms": args.delay_ms}),
+    ]
+    directory = tempfile.mkdtemp(prefix="eltropezon_escritura_")
+    try:
+        print(f"{'Modo':<22} {'Trans./s':>10} {'Llamada p50':>12} {'p99':>9} {'En disco p50':>13} {'p99':>9}")
+        for index, (name, options) in enumerate(modes):
+            db_path = _copy_database(args.db_path, directory, f"modo_{index}.db")
+            result = measure(db_path, args.rows, **options)
+            print(f"{name:<22} {result['rows_per_second']:>10.0f} {result['call_p50_ms']:>9.3f} ms "
+                  f"{result['call_p99_ms']:>6.3f} ms {result['ack_p50_ms']:>10.3f} ms {result['ack_p99_ms']:>6.3f} ms")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
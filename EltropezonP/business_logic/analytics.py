@@ -1,30 +1,223 @@
-import pandas as pd
+import functools
+from collections import OrderedDict
 from datetime import datetime
+from database.change_events import TransactionChange
 from database.db_manager import DBManager
-from models.transaction import Transaction
+from models.transaction import from_cents, to_cents
+import instrumentation
+
+
+class ResultCache:
+    """
+    Caché LRU de resultados de análisis.
+
+    Cada entrada guarda la versión de los datos con la que se calculó; si la
+    versión actual es otra, la entrada se descarta y cuenta como fallo.
+    """
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, version):
+        """Devuelve (encontrado, valor) para la clave y versión indicadas."""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[1]
+        if entry is not None:
+            del self._entries[key]
+        self.misses += 1
+        return False, None
+
+    def put(self, key, version, value):
+        """Guarda un resultado y expulsa el menos usado si se supera el límite."""
+        self._entries[key] = (version, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def patch(self, previous_version, version, update):
+        """
+        Lleva a la versión nueva las entradas calculadas con previous_version usando
+        update(clave, valor), que devuelve el valor corregido o None si hay que
+        recalcularlo. Las entradas de otras versiones ya no sirven y se descartan.
+        """
+        for key, (entry_version, value) in list(self._entries.items()):
+            if entry_version == version:
+                # Calculado en otro hilo después del cambio: ya lo incluye
+                continue
+            patched = update(key, value) if entry_version == previous_version else None
+            if patched is None:
+                del self._entries[key]
+            else:
+                self._entries[key] = (version, patched)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+def cached(method):
+    """
+    Memoriza un método de análisis por nombre y rango de fechas.
+    Los resultados se comparten entre llamadas y no deben modificarse.
+    """
+
+    @functools.wraps(method)
+    def wrapper(self, start_date=None, end_date=None):
+        key = (method.__name__, start_date, end_date)
+        # Los archivos de ejercicios cerrados se adjuntan antes: dentro de la instantánea ya no se puede
+        self.db.attach_archives(start_date, end_date)
+        with self.db.read_snapshot():
+            version = self.db.get_data_version()
+            found, value = self.cache.get(key, version)
+            if not found:
+                value = method(self, start_date, end_date)
+                self.cache.put(key, version, value)
+        return value
+
+    return wrapper
 
 
 class FinancialAnalytics:
     """Clase para el análisis financiero de los datos de transacciones."""
 
+    # Resultados en caché que apply_change sabe corregir, por método
+    DELTA_PATCHES = {
+        "get_financial_summary": "_patch_summary",
+        "get_monthly_summary": "_patch_monthly",
+        "get_expenses_by_category": "_patch_expenses",
+    }
+
     def __init__(self, db_manager: DBManager):
+        """
+        Args:
+            db_manager (DBManager): Base de datos a analizar, o un BranchSet con varias
+                sucursales (ver for_branches), que responde a las mismas consultas.
+        """
         self.db = db_manager
+        self.cache = ResultCache()
+        self._branch_analytics = {}
+        # Un BranchSet no escribe ni publica cambios; sus resultados se recalculan con la versión
+        if hasattr(db_manager, "changes"):
+            db_manager.changes.subscribe(self.apply_change)
 
-    def get_financial_summary(self, start_date=None, end_date=None):
+    @classmethod
+    def for_branches(cls, branches: dict) -> "FinancialAnalytics":
+        """
+        Análisis consolidado de varias bases de datos (nombre de sucursal -> ruta).
+        Cada consulta se ejecuta en todas las sucursales en paralelo y se suman los resultados.
+        """
+        from database.branches import BranchSet
+        return cls(BranchSet(branches))
+
+    @property
+    def branch_names(self) -> list:
+        """Sucursales que abarca el análisis; vacío si es una sola base de datos."""
+        return getattr(self.db, "branch_names", [])
 
-        transactions = self.db.get_all_transactions()
-        if not transactions:
-            return {"Ingresos Totales": 0.0, "Gastos Totales": 0.0, "Utilidad Neta": 0.0}
+    def branch(self, name: str) -> "FinancialAnalytics":
+        """Análisis de una sola sucursal, con su propia caché y las mismas conexiones."""
+        if name not in self._branch_analytics:
+            self._branch_analytics[name] = FinancialAnalytics(self.db.subset([name]))
+        return self._branch_analytics[name]
 
-        df = pd.DataFrame([t.__dict__ for t in transactions])
+    def peek(self, method_name: str, start_date=None, end_date=None):
+        """Devuelve (encontrado, valor) desde la caché sin calcular nada."""
+        return self.cache.get((method_name, start_date, end_date), self.db.get_data_version())
 
-        if start_date and end_date:
-            df['date'] = pd.to_datetime(df['date'])
-            df = df[(df['date'] >= start_date) & (df['date'] <= end_date)]
+    def remember(self, method_name: str, version, value, start_date=None, end_date=None):
+        """Guarda un resultado calculado en otro hilo con la versión de los datos que leyó."""
+        self.cache.put((method_name, start_date, end_date), version, value)
 
-        total_income = df[df['type'] == 'Ingreso']['amount'].sum()
-        total_expenses = df[df['type'] == 'Gasto']['amount'].sum()
-        net_profit = total_income - total_expenses
+    def apply_change(self, change: TransactionChange):
+        """
+        Corrige los resultados en caché con una transacción añadida, modificada o borrada,
+        sin volver a consultar la base de datos. Los que no se pueden corregir (un mes
+        o una categoría que aparece o puede desaparecer) se recalcularán al pedirlos.
+        """
+        with instrumentation.span("analytics", "apply_change", kind=change.kind):
+            self.cache.patch(change.previous_version, change.version,
+                             lambda key, value: self._patch_result(key, value, change))
+
+    def _patch_result(self, key, value, change: TransactionChange):
+        method_name, start_date, end_date = key
+        deltas = [(transaction, sign) for transaction, sign in change.deltas()
+                  if not (start_date and end_date) or start_date <= transaction.date[:10] <= end_date]
+        if not deltas:
+            return value
+        patch_name = self.DELTA_PATCHES.get(method_name)
+        return getattr(self, patch_name)(value, deltas) if patch_name else None
+
+    @staticmethod
+    def _patch_summary(summary: dict, deltas: list):
+        cents = {"Ingreso": to_cents(summary["Ingresos Totales"]), "Gasto": to_cents(summary["Gastos Totales"])}
+        for transaction, sign in deltas:
+            if transaction.type in cents:
+                cents[transaction.type] += sign * to_cents(transaction.amount)
+        total_income, total_expenses = from_cents(cents["Ingreso"]), from_cents(cents["Gasto"])
+        return {
+            "Ingresos Totales": total_income,
+            "Gastos Totales": total_expenses,
+            "Utilidad Neta": round(total_income - total_expenses, 2)
+        }
+
+    @staticmethod
+    def _patch_monthly(monthly: dict, deltas: list):
+        patched = {"labels": monthly["labels"], "income": list(monthly["income"]),
+                   "expenses": list(monthly["expenses"])}
+        series = {"Ingreso": patched["income"], "Gasto": patched["expenses"]}
+        for transaction, sign in deltas:
+            label = datetime.strptime(transaction.date[:7], '%Y-%m').strftime('%b %y')
+            if label not in patched["labels"]:
+                return None
+            position = patched["labels"].index(label)
+            if transaction.type in series:
+                values = series[transaction.type]
+                values[position] = from_cents(to_cents(values[position]) + sign * to_cents(transaction.amount))
+            # Un mes que se queda en cero puede haber quedado sin transacciones
+            if sign < 0 and not patched["income"][position] and not patched["expenses"][position]:
+                return None
+        return patched
+
+    @staticmethod
+    def _patch_expenses(expenses_df, deltas: list):
+        expenses = [(transaction, sign) for transaction, sign in deltas if transaction.type == 'Gasto']
+        if not expenses:
+            return expenses_df
+        if expenses_df.empty:
+            return None
+        patched = expenses_df.copy()
+        for transaction, sign in expenses:
+            matches = patched.index[patched["category"] == transaction.category]
+            if not len(matches):
+                return None
+            total = to_cents(patched.at[matches[0], "amount"]) + sign * to_cents(transaction.amount)
+            # Una categoría en cero puede haber quedado sin gastos
+            if not total:
+                return None
+            patched.at[matches[0], "amount"] = from_cents(total)
+        return patched
+
+    @instrumentation.timed("analytics")
+    @cached
+    def get_financial_summary(self, start_date=None, end_date=None):
+        """
+        Calcula los ingresos, gastos y utilidad neta en un rango de fechas.
+        La suma se realiza en la base de datos agrupando por tipo.
+        """
+        totals = self.db.get_totals_by_type(start_date, end_date)
+
+        total_income = totals.get('Ingreso') or 0.0
+        total_expenses = totals.get('Gasto') or 0.0
+        # Los totales vienen de sumas exactas en céntimos; se redondea para no introducir error al restar
+        net_profit = round(total_income - total_expenses, 2)
 
         return {
             "Ingresos Totales": total_income,
@@ -32,6 +225,8 @@ class FinancialAnalytics:
             "Utilidad Neta": net_profit
         }
 
+    @instrumentation.timed("analytics")
+    @cached
     def get_monthly_summary(self, start_date=None, end_date=None) -> dict:
         """
         Calcula los ingresos y gastos totales por mes en un rango de fechas.
@@ -43,32 +238,22 @@ class FinancialAnalytics:
         Returns:
             dict: Un diccionario con las etiquetas de los meses, y listas de ingresos y gastos.
         """
-        transactions = self.db.get_all_transactions()
-        if not transactions:
+        monthly_totals = self.db.get_monthly_totals(start_date, end_date)
+        if not monthly_totals:
             return {"labels": [], "income": [], "expenses": []}
 
-        df = pd.DataFrame([t.__dict__ for t in transactions])
-        df['date'] = pd.to_datetime(df['date'])
-
-        if start_date and end_date:
-            df = df[(df['date'] >= start_date) & (df['date'] <= end_date)]
-
-        # Pivotar la tabla para tener Ingreso y Gasto como columnas
-        monthly_summary = df.pivot_table(
-            index=df['date'].dt.to_period('M'),
-            columns='type',
-            values='amount',
-            aggfunc='sum'
-        ).fillna(0)
-
-        for col in ["Ingreso", "Gasto"]:
-            if col not in monthly_summary.columns:
-                monthly_summary[col] = 0
+        # Agrupar los totales por mes con Ingreso y Gasto como columnas
+        months = {}
+        for month, transaction_type, total in monthly_totals:
+            months.setdefault(month, {"Ingreso": 0.0, "Gasto": 0.0})
+            if transaction_type in months[month]:
+                months[month][transaction_type] = total
 
         # Preparar los datos para el gráfico
-        labels = [m.strftime('%b %y') for m in monthly_summary.index]
-        income = monthly_summary['Ingreso'].tolist()
-        expenses = monthly_summary['Gasto'].tolist()
+        ordered_months = sorted(months)
+        labels = [datetime.strptime(m, '%Y-%m').strftime('%b %y') for m in ordered_months]
+        income = [months[m]["Ingreso"] for m in ordered_months]
+        expenses = [months[m]["Gasto"] for m in ordered_months]
 
         return {
             "labels": labels,
@@ -76,6 +261,8 @@ class FinancialAnalytics:
             "expenses": expenses
         }
 
+    @instrumentation.timed("analytics")
+    @cached
     def get_expenses_by_category(self, start_date=None, end_date=None):
         """
         Calcula el total de gastos por categoría en un rango de fechas.
@@ -87,19 +274,40 @@ class FinancialAnalytics:
         Returns:
             DataFrame: Un DataFrame de pandas con los gastos por categoría.
         """
-        transactions = self.db.get_all_transactions()
-        if not transactions:
+        # pandas tarda en importarse; se carga solo cuando se pide este reporte
+        import pandas as pd
+
+        category_totals = self.db.get_category_totals('Gasto', start_date, end_date)
+        if not category_totals:
             return pd.DataFrame()
 
-        df = pd.DataFrame([t.__dict__ for t in transactions])
+        return pd.DataFrame(category_totals, columns=['category', 'amount'])
 
-        if start_date and end_date:
-            df['date'] = pd.to_datetime(df['date'])
-            df = df[(df['date'] >= start_date) & (df['date'] <= end_date)]
+    @instrumentation.timed("analytics")
+    def get_transactions_frame(self, start_date=None, end_date=None, include_descriptions=False):
+        """
+        Devuelve las transacciones de un rango de fechas como DataFrame con tipos compactos:
+        fechas datetime64, montos float64 y tipo/categoría categóricos.
 
-        expenses_df = df[df['type'] == 'Gasto']
-        return expenses_df.groupby('category')['amount'].sum().reset_index()
+        Se construye con las columnas de NumPy de DBManager.get_transaction_columns,
+        sin pasar por objetos Transaction. No se guarda en la caché por su tamaño.
+        """
+        import pandas as pd
+
+        columns = self.db.get_transaction_columns(start_date, end_date, include_descriptions)
+        data = {
+            "id": columns["id"],
+            # Los días desde 1970-01-01 son directamente fechas datetime64[D]
+            "date": columns["day"].astype("datetime64[D]").astype("datetime64[s]"),
+            "amount": columns["amount_cents"] / 100,
+            "type": pd.Categorical.from_codes(columns["type"], categories=columns["type_values"]),
+            "category": pd.Categorical.from_codes(columns["category"], categories=columns["category_values"]),
+        }
+        if include_descriptions:
+            data["description"] = columns["description"]
+        return pd.DataFrame(data, copy=False)
 
+    @instrumentation.timed("analytics")
     def get_break_even_point(self, fixed_costs, price_per_unit, variable_cost_per_unit):
         """
         Calcula el punto de equilibrio en unidades.
@@ -0,0 +1,149 @@
+# business_logic/description_index.py
+
+import unicodedata
+from bisect import bisect_left, insort
+from dataclasses import dataclass
+from datetime import date
+from typing import Optional
+
+from database.db_manager import DBManager
+from models.transaction import Transaction, date_to_day, EPOCH_ORDINAL
+
+# Días en los que el peso de los usos de una descripción se reduce a la mitad
+RECENCY_HALF_LIFE_DAYS = 90
+
+
+def normalize_text(text: str) -> str:
+    """Pasa un texto a minúsculas sin acentos ni espacios sobrantes."""
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    return " ".join(text.lower().split())
+
+
+@dataclass(slots=True)
+class DescriptionTemplate:
+    """Uso de una descripción y datos de su transacción más reciente."""
+    uses: int
+    last_day: int
+    amount: float
+    type: str
+    category: str
+
+
+class DescriptionIndex:
+    """
+    Índice en memoria de las descripciones para el autocompletado del formulario.
+
+    Guarda una lista ordenada de pares (palabra normalizada, descripción), de modo
+    que buscar por prefijo de palabra es una búsqueda binaria ("caj" encuentra
+    "Inversión en caja fuerte"). Las sugerencias se ordenan por
+    frecuencia de uso ponderada por lo reciente del último uso. Además guarda, por
+    descripción, el monto, tipo y categoría de su transacción más reciente.
+
+    Se carga una vez desde la base de datos y después se actualiza con record() en
+    cada guardado confirmado; solo se recarga si otra ventana o proceso cambió los datos.
+    """
+
+    def __init__(self, db_manager: DBManager):
+        self.db = db_manager
+        self.templates = {}
+        self._word_keys = []
+        self._sorted_descriptions = []
+        self.version = None
+
+    def load(self):
+        """Carga todas las descripciones y sus plantillas desde la base de datos."""
+        self.version = self.db.get_data_version()
+        self.templates = {}
+        word_keys = []
+        for description, uses, last_day, amount, transaction_type, category in self.db.get_description_templates():
+            self.templates[description] = DescriptionTemplate(uses, last_day, amount, transaction_type, category)
+            word_keys.extend(self._keys_for(description))
+        word_keys.sort()
+        self._word_keys = word_keys
+        self._sorted_descriptions = sorted(self.templates)
+
+    def ensure_current(self) -> bool:
+        """Recarga el índice si los datos cambiaron fuera de record(). Devuelve True si recargó."""
+        if self.version == self.db.get_data_version():
+            return False
+        self.load()
+        return True
+
+    @staticmethod
+    def _keys_for(description: str) -> list:
+        """Claves (palabra normalizada, descripción) de una descripción."""
+        return [(word, description) for word in set(normalize_text(description).split())]
+
+    def descriptions(self) -> list:
+        """Todas las descripciones en orden alfabético."""
+        return self._sorted_descriptions
+
+    def template(self, description: str):
+        """Datos de la transacción más reciente con esa descripción, o None."""
+        return self.templates.get(description)
+
+    def _score(self, description: str, today: int) -> float:
+        template = self.templates[description]
+        age = max(today - template.last_day, 0)
+        return template.uses * 0.5 ** (age / RECENCY_HALF_LIFE_DAYS)
+
+    def _prefix_range(self, prefix: str) -> tuple:
+        """Posiciones [inicio, fin) de las claves que empiezan por el prefijo."""
+        return (bisect_left(self._word_keys, (prefix, "")),
+                bisect_left(self._word_keys, (prefix + "\uffff", "")))
+
+    def search(self, text: str, limit: int = 20) -> list:
+        """
+        Descripciones en las que cada palabra del texto es el inicio de alguna de sus
+        palabras ("inv caj" encuentra "Inversión en caja fuerte"), ordenadas de mayor
+        a menor uso ponderado por recencia.
+        """
+        tokens = normalize_text(text).split()
+        if not tokens:
+            return []
+
+        # Se recorren solo las claves de la palabra más selectiva y se filtra por las demás
+        ranges = {token: self._prefix_range(token) for token in tokens}
+        start, end = min(ranges.values(), key=lambda r: r[1] - r[0])
+        matches = {description for _, description in self._word_keys[start:end]}
+        if len(tokens) > 1:
+            matches = {d for d in matches if self._has_word_prefixes(d, tokens)}
+
+        today = date.today().toordinal() - EPOCH_ORDINAL
+        ranked = sorted(matches, key=lambda d: (-self._score(d, today), d))
+        return ranked[:limit]
+
+    @staticmethod
+    def _has_word_prefixes(description: str, prefixes: list) -> bool:
+        words = normalize_text(description).split(" ")
+        return all(any(word.startswith(prefix) for word in words) for prefix in prefixes)
+
+    def record(self, transaction: Transaction, previous_version: Optional[int] = None,
+               version: Optional[int] = None):
+        """
+        Actualiza el índice con una transacción ya confirmada, sin recargarlo.
+
+        Args:
+            previous_version, version (int, opcional): Versiones de los datos antes y
+                después de la escritura (ver TransactionChange). El índice pasa a la
+                nueva versión solo si estaba en la anterior; si entretanto cambió algo
+                más, se recarga en el próximo ensure_current().
+        """
+        day = date_to_day(transaction.date)
+        template = self.templates.get(transaction.description)
+        if template is None:
+            self.templates[transaction.description] = DescriptionTemplate(
+                1, day, transaction.amount, transaction.type, transaction.category)
+            for key in self._keys_for(transaction.description):
+                insort(self._word_keys, key)
+            insort(self._sorted_descriptions, transaction.description)
+        else:
+            template.uses += 1
+            if day >= template.last_day:
+                template.last_day = day
+                template.amount = transaction.amount
+                template.type = transaction.type
+                template.category = transaction.category
+        # La escritura propia ya está reflejada; no hace falta recargar por ella
+        if previous_version is not None and self.version == previous_version:
+            self.version = version
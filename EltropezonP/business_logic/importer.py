@@ -0,0 +1,241 @@
+# business_logic/importer.py
+
+import csv
+import os
+import time
+import unicodedata
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Callable, Iterator, Optional
+
+from config import EXPENSE_CATEGORIES, INCOME_CATEGORIES, TRANSACTION_TYPES
+from database.db_manager import DBManager
+from models.transaction import Transaction
+
+# Nombres de columna aceptados (sin acentos y en minúsculas) para cada campo de la transacción
+COLUMN_ALIASES = {
+    "date": ["fecha", "date", "fecha operacion", "fecha valor"],
+    "description": ["descripcion", "description", "concepto", "detalle", "producto"],
+    "amount": ["monto", "amount", "importe", "total", "valor"],
+    "type": ["tipo", "type"],
+    "category": ["categoria", "category", "rubro"],
+}
+
+DATE_FORMATS = ["%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%Y/%m/%d", "%d/%m/%y"]
+
+
+def _normalize(text) -> str:
+    """Pasa un texto a minúsculas sin acentos ni espacios sobrantes."""
+    text = unicodedata.normalize("NFKD", str(text)).encode("ascii", "ignore").decode("ascii")
+    return " ".join(text.lower().split())
+
+
+CATEGORIES_BY_TYPE = {
+    "Ingreso": {_normalize(c): c for c in INCOME_CATEGORIES},
+    "Gasto": {_normalize(c): c for c in EXPENSE_CATEGORIES},
+}
+TYPES = {_normalize(t): t for t in TRANSACTION_TYPES}
+
+
+@dataclass
+class ImportReport:
+    """Resultado de una importación."""
+    processed: int = 0
+    inserted: int = 0
+    # Filas rechazadas como (número de fila en el archivo, motivo)
+    rejected: list = field(default_factory=list)
+    elapsed: float = 0.0
+    cancelled: bool = False
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.inserted / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        text = (f"{self.inserted} transacciones importadas, {len(self.rejected)} rechazadas "
+                f"en {self.elapsed:.1f} s ({self.rows_per_second:.0f} filas/s).")
+        if self.cancelled:
+            text += " Importación cancelada."
+        return text
+
+
+def parse_date(value) -> str:
+    """Convierte una fecha de la exportación al formato YYYY-MM-DD."""
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d")
+    if isinstance(value, date):
+        return value.isoformat()
+    text = str(value or "").strip()
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    raise ValueError(f"fecha no reconocida '{text}'")
+
+
+def parse_amount(value) -> float:
+    """Convierte un monto con coma o punto decimal (y separador de miles) a float."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value or "").strip().replace("Bs", "").replace(" ", "")
+    if "," in text and "." in text:
+        # El separador que aparece último es el decimal
+        if text.rfind(",") > text.rfind("."):
+            text = text.replace(".", "").replace(",", ".")
+        else:
+            text = text.replace(",", "")
+    else:
+        text = text.replace(",", ".")
+    try:
+        return float(text)
+    except ValueError:
+        raise ValueError(f"monto no válido '{value}'")
+
+
+def parse_record(record: dict) -> Transaction:
+    """
+    Valida una fila ya mapeada a los campos de la transacción.
+    Si falta el tipo, se deduce del signo del monto (negativo = Gasto).
+    """
+    description = str(record.get("description") or "").strip()
+    if not description:
+        raise ValueError("descripción vacía")
+
+    amount = parse_amount(record.get("amount"))
+    raw_type = record.get("type")
+    if raw_type in (None, ""):
+        transaction_type = "Gasto" if amount < 0 else "Ingreso"
+    else:
+        transaction_type = TYPES.get(_normalize(raw_type))
+        if transaction_type is None:
+            raise ValueError(f"tipo no válido '{raw_type}'")
+    amount = abs(amount)
+    if amount == 0:
+        raise ValueError("monto igual a cero")
+
+    raw_category = record.get("category")
+    category = CATEGORIES_BY_TYPE[transaction_type].get(_normalize(raw_category or ""))
+    if category is None:
+        raise ValueError(f"categoría '{raw_category}' no válida para {transaction_type}")
+
+    return Transaction(date=parse_date(record.get("date")), description=description, amount=amount,
+                       type=transaction_type, category=category)
+
+
+def _map_header(header: list) -> dict:
+    """Relaciona cada campo de la transacción con la posición de su columna en el archivo."""
+    positions = {}
+    normalized = [_normalize(h or "") for h in header]
+    for field_name, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in normalized:
+                positions[field_name] = normalized.index(alias)
+                break
+    missing = {"date", "description", "amount"} - positions.keys()
+    if missing:
+        raise ValueError(f"Faltan columnas obligatorias: {', '.join(sorted(missing))}")
+    return positions
+
+
+def _iter_csv(path: str) -> Iterator[list]:
+    with open(path, newline="", encoding="utf-8-sig") as file:
+        sample = file.read(4096)
+        file.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        yield from csv.reader(file, dialect)
+
+
+def _iter_xlsx(path: str) -> Iterator[list]:
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError("Para importar archivos .xlsx se necesita el paquete openpyxl.")
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        for row in workbook.active.iter_rows(values_only=True):
+            yield list(row)
+    finally:
+        workbook.close()
+
+
+def iter_records(path: str) -> Iterator[tuple]:
+    """
+    Lee el archivo fila a fila sin cargarlo completo en memoria.
+
+    Yields:
+        tuple: (número de fila, dict con los campos de la transacción).
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".xlsx", ".xlsm"):
+        rows = _iter_xlsx(path)
+    elif extension in (".csv", ".txt"):
+        rows = _iter_csv(path)
+    else:
+        raise ValueError(f"Formato de archivo no soportado: {extension}")
+
+    positions = None
+    for line_number, row in enumerate(rows, start=1):
+        if not any(cell not in (None, "") for cell in row):
+            continue
+        if positions is None:
+            positions = _map_header(row)
+            continue
+        yield line_number, {name: row[index] if index < len(row) else None for name, index in positions.items()}
+
+
+class TransactionImporter:
+    """Importa transacciones desde exportaciones CSV/XLSX del banco o del punto de venta."""
+
+    def __init__(self, db_manager: DBManager, chunk_size: int = 5000):
+        self.db = db_manager
+        self.chunk_size = chunk_size
+
+    def import_file(self, path: str,
+                    progress_callback: Optional[Callable[[ImportReport], None]] = None,
+                    is_cancelled: Optional[Callable[[], bool]] = None) -> ImportReport:
+        """
+        Importa un archivo por bloques; cada bloque se inserta en una sola transacción.
+
+        Args:
+            path (str): Ruta del archivo CSV o XLSX.
+            progress_callback (callable, opcional): Se llama tras cada bloque con el reporte parcial.
+            is_cancelled (callable, opcional): Si devuelve True se detiene antes del siguiente bloque.
+
+        Returns:
+            ImportReport: Filas procesadas, insertadas y rechazadas, con el tiempo empleado.
+
+        Raises:
+            sqlite3.Error: Si no se pudo guardar un bloque; los bloques anteriores ya están guardados
+                y progress_callback ya informó de ellos.
+        """
+        report = ImportReport()
+        started = time.perf_counter()
+        chunk = []
+
+        def flush():
+            report.inserted += self.db.add_transactions_bulk(chunk, chunk_size=len(chunk))
+            chunk.clear()
+            report.elapsed = time.perf_counter() - started
+            if progress_callback:
+                progress_callback(report)
+
+        for line_number, record in iter_records(path):
+            report.processed += 1
+            try:
+                chunk.append(parse_record(record))
+            except ValueError as e:
+                report.rejected.append((line_number, str(e)))
+            if len(chunk) >= self.chunk_size:
+                flush()
+                if is_cancelled and is_cancelled():
+                    report.cancelled = True
+                    break
+        if chunk:
+            flush()
+
+        report.elapsed = time.perf_counter() - started
+        return report
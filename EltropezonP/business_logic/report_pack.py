@@ -0,0 +1,222 @@
+# business_logic/report_pack.py
+"""
+Genera el paquete de informes de cierre sin interfaz gráfica.
+
+Divide un rango de fechas en meses, trimestres o años y, para cada período,
+guarda los gráficos de la aplicación (gui/charts.py con el backend Agg) en PNG
+o PDF y los datos en CSV. Los períodos se reparten entre varios procesos; todos
+leen la misma copia de solo lectura de la base de datos, así el paquete entero
+corresponde a un único momento aunque la aplicación siga registrando datos.
+
+Uso:
+    python -m eltropezon report --from 2025-01-01 --to 2025-12-31 --by month
+"""
+
+import csv
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import List, Optional
+
+from database.db_manager import DBManager
+
+PERIOD_KINDS = ["month", "quarter", "year"]
+OUTPUT_FORMATS = ["png", "pdf", "csv"]
+CHART_DPI = 100
+
+# Estado de cada proceso de trabajo: analítica sobre la copia y gráficos reutilizables
+_worker = {}
+
+
+@dataclass
+class Period:
+    """Un período del paquete, con sus dos fechas incluidas."""
+    label: str
+    start: date
+    end: date
+
+
+@dataclass
+class ReportPackResult:
+    """Resultado de generar el paquete."""
+    periods: List[dict] = field(default_factory=list)
+    files: int = 0
+    elapsed: float = 0.0
+
+    def summary(self) -> str:
+        return f"{len(self.periods)} períodos, {self.files} archivos generados en {self.elapsed:.1f} s."
+
+
+def _next_period_start(day: date, by: str) -> date:
+    """Primer día del período siguiente al que contiene day."""
+    if by == "year":
+        return date(day.year + 1, 1, 1)
+    months = 3 if by == "quarter" else 1
+    first_month = (day.month - 1) // months * months + 1
+    month_index = day.year * 12 + first_month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def _period_label(day: date, by: str) -> str:
+    if by == "year":
+        return f"{day.year}"
+    if by == "quarter":
+        return f"{day.year}-T{(day.month - 1) // 3 + 1}"
+    return day.strftime("%Y-%m")
+
+
+def split_periods(start: date, end: date, by: str = "month") -> List[Period]:
+    """
+    Divide [start, end] en meses, trimestres o años naturales; el primero y el último
+    se recortan al rango pedido.
+    """
+    if by not in PERIOD_KINDS:
+        raise ValueError(f"Tipo de período desconocido: {by}")
+    if start > end:
+        raise ValueError("La fecha de inicio es posterior a la fecha de fin.")
+    periods = []
+    current = start
+    while current <= end:
+        following = _next_period_start(current, by)
+        periods.append(Period(_period_label(current, by), current, min(following - timedelta(days=1), end)))
+        current = following
+    return periods
+
+
+def _init_worker(snapshot_path: str):
+    """Prepara un proceso de trabajo: backend Agg, conexión de solo lectura y gráficos."""
+    import matplotlib
+    matplotlib.use("Agg")
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    from business_logic.analytics import FinancialAnalytics
+    from gui.charts import BACKGROUND_COLOR, CategoryPieChart, IncomeExpensesBarChart, MonthlyPerformanceChart
+
+    _worker["analytics"] = FinancialAnalytics(DBManager(snapshot_path, initialize=False, read_only=True))
+
+    # Cada gráfico se construye una vez por proceso y se actualiza en cada período
+    figures = {
+        "ingresos_vs_gastos": Figure(figsize=(10, 6), facecolor=BACKGROUND_COLOR),
+        "gastos_por_categoria": Figure(figsize=(10, 6), facecolor=BACKGROUND_COLOR),
+        "rendimiento_mensual": Figure(figsize=(10, 5), facecolor=BACKGROUND_COLOR),
+    }
+    for figure in figures.values():
+        FigureCanvasAgg(figure)
+    _worker["charts"] = {
+        "ingresos_vs_gastos": IncomeExpensesBarChart(figures["ingresos_vs_gastos"].add_subplot(111)),
+        "gastos_por_categoria": CategoryPieChart(figures["gastos_por_categoria"].add_subplot(111)),
+        "rendimiento_mensual": MonthlyPerformanceChart(figures["rendimiento_mensual"]),
+    }
+
+
+def _write_csv(path: str, header: list, rows) -> str:
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(header)
+        writer.writerows(rows)
+    return path
+
+
+def _render_period(period: Period, out_dir: str, formats: list) -> dict:
+    """Genera los archivos de un período en su carpeta y devuelve su resumen."""
+    analytics = _worker["analytics"]
+    charts = _worker["charts"]
+    start_date, end_date = period.start.isoformat(), period.end.isoformat()
+
+    summary = analytics.get_financial_summary(start_date, end_date)
+    expenses = analytics.get_expenses_by_category(start_date, end_date)
+    monthly = analytics.get_monthly_summary(start_date, end_date)
+    expense_rows = [] if expenses.empty else list(zip(expenses["category"], expenses["amount"]))
+
+    period_dir = os.path.join(out_dir, period.label)
+    os.makedirs(period_dir, exist_ok=True)
+    files = []
+
+    chart_data = {
+        "ingresos_vs_gastos": summary,
+        "gastos_por_categoria": expenses,
+        "rendimiento_mensual": monthly,
+    }
+    image_formats = [output_format for output_format in formats if output_format != "csv"]
+    if image_formats:
+        for name, chart in charts.items():
+            chart.update(chart_data[name])
+            for image_format in image_formats:
+                path = os.path.join(period_dir, f"{name}.{image_format}")
+                chart.figure.savefig(path, format=image_format, dpi=CHART_DPI,
+                                     facecolor=chart.figure.get_facecolor())
+                files.append(path)
+
+    if "csv" in formats:
+        files.append(_write_csv(os.path.join(period_dir, "resumen.csv"), ["concepto", "monto"], summary.items()))
+        files.append(_write_csv(os.path.join(period_dir, "gastos_por_categoria.csv"), ["categoria", "monto"],
+                                expense_rows))
+        files.append(_write_csv(os.path.join(period_dir, "mensual.csv"), ["mes", "ingresos", "gastos"],
+                                zip(monthly["labels"], monthly["income"], monthly["expenses"])))
+
+    return {
+        "period": period.label,
+        "start": start_date,
+        "end": end_date,
+        "income": summary["Ingresos Totales"],
+        "expenses": summary["Gastos Totales"],
+        "net": summary["Utilidad Neta"],
+        "files": len(files),
+    }
+
+
+def generate_report_pack(db_manager: DBManager, start: date, end: date, out_dir: str, by: str = "month",
+                         formats: Optional[list] = None, workers: Optional[int] = None,
+                         progress_callback=None) -> ReportPackResult:
+    """
+    Genera los informes de cada período de [start, end] en out_dir/<período>/.
+
+    Args:
+        db_manager (DBManager): Base de datos de origen; se copia una vez antes de empezar.
+        by (str): "month", "quarter" o "year".
+        formats (list, opcional): Subconjunto de OUTPUT_FORMATS; por defecto todos.
+        workers (int, opcional): Procesos de trabajo; por defecto uno por CPU (como máximo uno por período).
+        progress_callback (callable, opcional): Recibe el resumen de cada período terminado.
+
+    Returns:
+        ReportPackResult: Resumen por período (también se guarda en out_dir/resumen_periodos.csv).
+    """
+    formats = formats or OUTPUT_FORMATS
+    unknown = set(formats) - set(OUTPUT_FORMATS)
+    if unknown:
+        raise ValueError(f"Formatos desconocidos: {', '.join(sorted(unknown))}")
+    periods = split_periods(start, end, by)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(periods)))
+
+    started = time.perf_counter()
+    os.makedirs(out_dir, exist_ok=True)
+    snapshot_dir = tempfile.mkdtemp(prefix="eltropezon_informes_")
+    try:
+        snapshot_path = os.path.join(snapshot_dir, "snapshot.db")
+        if not db_manager.create_snapshot(snapshot_path):
+            raise OSError("No se pudo copiar la base de datos para generar los informes.")
+
+        result = ReportPackResult()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(snapshot_path,)) as executor:
+            futures = [executor.submit(_render_period, period, out_dir, formats) for period in periods]
+            for future in futures:
+                period_summary = future.result()
+                result.periods.append(period_summary)
+                result.files += period_summary["files"]
+                if progress_callback:
+                    progress_callback(period_summary)
+    finally:
+        shutil.rmtree(snapshot_dir, ignore_errors=True)
+
+    _write_csv(os.path.join(out_dir, "resumen_periodos.csv"),
+               ["periodo", "desde", "hasta", "ingresos", "gastos", "utilidad_neta"],
+               [(p["period"], p["start"], p["end"], p["income"], p["expenses"], p["net"]) for p in result.periods])
+    result.files += 1
+    result.elapsed = time.perf_counter() - started
+    return result
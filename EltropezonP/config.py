@@ -1,10 +1,13 @@
 # config.py
 
+import json
 import os
 import sys
 
 # Nombre del archivo de la base de datos
 DATABASE_NAME = "finances.db"
+# Archivo de cada ejercicio cerrado, junto a la base de datos (ver DBManager.close_fiscal_year)
+ARCHIVE_NAME = "finances_{year}.db"
 
 
 def get_base_path():
@@ -28,6 +31,52 @@ def get_base_path():
 BASE_PATH = get_base_path()
 DB_PATH = os.path.join(BASE_PATH, DATABASE_NAME)
 
+# Sucursales para el análisis consolidado: JSON {"nombre": "ruta de su finances.db", ...}.
+# Sin este archivo solo se analiza la base de datos local.
+BRANCHES_FILE = os.path.join(BASE_PATH, "sucursales.json")
+LOCAL_BRANCH_NAME = "Local"
+
+
+def load_branches() -> dict:
+    """
+    Devuelve las sucursales configuradas (nombre -> ruta). La base de datos local
+    se incluye siempre, con el nombre LOCAL_BRANCH_NAME si el archivo no la nombra.
+    """
+    branches = {}
+    if os.path.exists(BRANCHES_FILE):
+        with open(BRANCHES_FILE, encoding="utf-8") as file:
+            branches = {name: os.path.abspath(os.path.expanduser(path)) for name, path in json.load(file).items()}
+    if os.path.abspath(DB_PATH) not in branches.values():
+        branches = {LOCAL_BRANCH_NAME: os.path.abspath(DB_PATH), **branches}
+    return branches
+
+
+# Perfil de las conexiones SQLite: "tuned" (WAL, caché y mmap grandes) o "conservative"
+# (valores por defecto de SQLite). Se puede cambiar con la variable de entorno ELTROPEZON_DB_PROFILE.
+DB_CONNECTION_PROFILE = os.environ.get("ELTROPEZON_DB_PROFILE", "tuned")
+
+# Nivel del registro (DEBUG, INFO, WARNING, ERROR); con DEBUG se ve cada operación. Sin la variable
+# de entorno, la aplicación registra desde WARNING y los comandos de eltropezon.py desde INFO.
+LOG_LEVEL = os.environ.get("ELTROPEZON_LOG_LEVEL", "").upper() or None
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+# Escritura diferida: las altas, modificaciones y borrados se confirman en lotes desde un hilo
+# escritor (ver database/write_behind.py). Se activa con ELTROPEZON_WRITE_BEHIND=1.
+WRITE_BEHIND_ENABLED = os.environ.get("ELTROPEZON_WRITE_BEHIND") == "1"
+WRITE_BEHIND_BATCH_ROWS = 500
+WRITE_BEHIND_MAX_DELAY_MS = 50
+
+# Copias de seguridad en línea (ver database/backup.py): carpeta, copias periódicas que se conservan,
+# páginas copiadas en cada paso y cada cuántas horas la aplicación abierta hace una copia automática.
+BACKUP_DIR = os.path.join(BASE_PATH, "copias")
+BACKUP_KEEP = 10
+BACKUP_PAGES_PER_STEP = 1024
+BACKUP_INTERVAL_HOURS = 24
+
+# Medición de tiempos de consultas, análisis y gráficos desde el arranque (ver instrumentation.py).
+# También se puede activar desde la página oculta "Rendimiento" (Ctrl+Shift+P).
+INSTRUMENTATION_ENABLED = os.environ.get("ELTROPEZON_PROFILE") == "1"
+
 # Categorías de ejemplo
 INCOME_CATEGORIES = ["Venta", "Servicio", "Inversión", "Otros Ingresos"]
 EXPENSE_CATEGORIES = ["Materia Prima", "Mano de Obra", "Gastos Operativos", "Salarios Fijos", "Publicidad",
@@ -0,0 +1,336 @@
+# database/backup.py
+"""
+Copias de seguridad en línea y restauración.
+
+create_backup copia la base de datos con la API de copia de SQLite
+(sqlite3.Connection.backup) mientras la aplicación sigue abierta. La copia avanza
+de pages_per_step páginas por paso desde una conexión de solo lectura que fija
+una instantánea al empezar: con WAL los que escriben no esperan a la copia, y la
+copia no se reinicia aunque lleguen escrituras entre pasos. Está pensada para
+ejecutarse en un hilo de trabajo; SQLite libera el GIL durante cada paso.
+
+Cada copia se comprueba con PRAGMA quick_check antes de comprimirla con gzip en
+BACKUP_DIR, y solo se conservan las últimas keep copias. El registro anota el
+tamaño, la duración y el rendimiento (MB/s) de cada una.
+
+Los archivos de los ejercicios cerrados (ver DBManager.close_fiscal_year) forman
+parte de la copia: los que registra la tabla archives de la instantánea se copian
+igual, comprimidos en la carpeta ARCHIVES_SUFFIX junto a la copia, y se comprueba
+que cada uno tiene las transacciones que la base de datos dice haberle movido.
+
+restore_backup sustituye la base de datos por una copia, con la aplicación cerrada:
+descomprime y comprueba la copia (y sus ejercicios cerrados) junto a los archivos
+originales y los reemplaza con os.replace, después de guardar una copia del estado
+actual. La base de datos se reemplaza la última.
+
+Uso:
+    python -m eltropezon backup [--keep 10]
+    python -m eltropezon backup --list
+    python -m eltropezon restore copias/finances-20250101-120000.db.gz
+"""
+
+import gzip
+import logging
+import os
+import re
+import shutil
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from config import ARCHIVE_NAME, BACKUP_DIR, BACKUP_KEEP, BACKUP_PAGES_PER_STEP, DB_PATH
+from database.connection import open_connection
+from database.db_manager import locate_archive
+
+logger = logging.getLogger(__name__)
+
+BACKUP_PREFIX = "finances-"
+BACKUP_SUFFIX = ".db.gz"
+# Carpeta junto a cada copia con los archivos de los ejercicios cerrados: finances-...-000000.archivos
+ARCHIVES_SUFFIX = ".archivos"
+# gzip rápido: comprimir es lo más lento de la copia y el nivel 6 apenas ahorra un 10 % más
+COMPRESS_LEVEL = 1
+# Copias periódicas, las únicas que se rotan; las que llevan etiqueta (p. ej. antes de restaurar) se conservan
+# (las anteriores a los microsegundos en el nombre tampoco los llevan)
+_ROTATED_NAME = re.compile(rf"^{re.escape(BACKUP_PREFIX)}\d{{8}}-\d{{6}}(-\d{{6}})?{re.escape(BACKUP_SUFFIX)}$")
+
+
+@dataclass
+class BackupResult:
+    """Una copia terminada: el archivo comprimido y lo que costó hacerla."""
+    path: str
+    database_bytes: int
+    compressed_bytes: int
+    copy_seconds: float
+    total_seconds: float
+    # Ejercicios cerrados copiados con la base de datos: año -> archivo comprimido
+    archives: Dict[int, str] = field(default_factory=dict)
+
+    @property
+    def mb_per_second(self) -> float:
+        """Rendimiento de la copia en línea, sin contar la comprobación ni la compresión."""
+        return self.database_bytes / 2 ** 20 / self.copy_seconds if self.copy_seconds else 0.0
+
+    def summary(self) -> str:
+        return (f"Copia guardada en {self.path}: {self.database_bytes / 2 ** 20:.1f} MB copiados en "
+                f"{self.copy_seconds:.2f} s ({self.mb_per_second:.1f} MB/s), "
+                f"{self.compressed_bytes / 2 ** 20:.1f} MB comprimida, {self.total_seconds:.2f} s en total."
+                + (f" Incluye {len(self.archives)} ejercicios cerrados." if self.archives else ""))
+
+
+def _quick_check(path: str):
+    """Comprueba la integridad de una base de datos copiada; lanza ValueError si está dañada."""
+    conn = sqlite3.connect(path)
+    try:
+        problems = [row[0] for row in conn.execute("PRAGMA quick_check")]
+    finally:
+        conn.close()
+    if problems != ["ok"]:
+        raise ValueError(f"La copia de {path} no pasó quick_check: {'; '.join(problems[:5])}")
+
+
+def _check_archive_rows(path: str, year: int, expected_rows: int):
+    """
+    Comprueba que el archivo de un ejercicio tiene las transacciones que la base de
+    datos registra como movidas a él; lanza ValueError si no coinciden.
+    """
+    conn = sqlite3.connect(path)
+    try:
+        rows = conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+    finally:
+        conn.close()
+    if rows != expected_rows:
+        raise ValueError(f"El archivo del ejercicio {year} ({path}) tiene {rows} transacciones y la base de datos "
+                         f"registra {expected_rows}; ¿se cerró un ejercicio durante la copia?")
+
+
+def _closed_years(copied_db: str, db_path: str) -> Dict[int, tuple]:
+    """
+    Ejercicios cerrados que registra una copia de la base de datos db_path:
+    año -> (ruta de su archivo junto a db_path, transacciones movidas a él).
+    """
+    conn = sqlite3.connect(copied_db)
+    try:
+        rows = conn.execute("SELECT year, path, rows FROM archives ORDER BY year").fetchall()
+    except sqlite3.OperationalError:
+        # Copia anterior a los ejercicios cerrados (migración 10)
+        rows = []
+    finally:
+        conn.close()
+    return {year: (locate_archive(db_path, year, path), count) for year, path, count in rows}
+
+
+def archives_dir(backup_path: str) -> str:
+    """Carpeta con los ejercicios cerrados de una copia."""
+    return backup_path[:-len(BACKUP_SUFFIX)] + ARCHIVES_SUFFIX
+
+
+def _copy_online(db_path: str, target_path: str, pages_per_step: int,
+                 progress_callback: Optional[Callable[[int, int], None]] = None):
+    """Copia db_path a target_path por pasos sobre una instantánea fija de la base de datos."""
+    source = open_connection(db_path, read_only=True)
+    target = sqlite3.connect(target_path)
+    try:
+        # La transacción de lectura fija la instantánea que se copia entera, paso a paso
+        source.execute("BEGIN")
+        source.execute("SELECT 1 FROM sqlite_master LIMIT 1")
+
+        def progress(status, remaining, total):
+            if progress_callback:
+                progress_callback(total - remaining, total)
+
+        source.backup(target, pages=pages_per_step, progress=progress)
+        source.rollback()
+        # La copia queda sin WAL: un solo archivo, listo para comprimir
+        target.execute("PRAGMA journal_mode = DELETE")
+    finally:
+        target.close()
+        source.close()
+
+
+def _decompress(compressed_path: str, path: str):
+    """Descomprime una copia (o la copia tal cual si no está comprimida)."""
+    opener = gzip.open if compressed_path.endswith(".gz") else open
+    with opener(compressed_path, "rb") as source, open(path, "wb") as target:
+        shutil.copyfileobj(source, target, 1024 * 1024)
+
+
+def _compress(path: str, compressed_path: str):
+    """Comprime con gzip en un archivo temporal y lo renombra al terminar."""
+    partial_path = compressed_path + ".parcial"
+    with open(path, "rb") as source, gzip.open(partial_path, "wb", compresslevel=COMPRESS_LEVEL) as target:
+        shutil.copyfileobj(source, target, 1024 * 1024)
+    os.replace(partial_path, compressed_path)
+
+
+def list_backups(backup_dir: str = BACKUP_DIR) -> List[str]:
+    """Copias de BACKUP_DIR, de la más reciente a la más antigua."""
+    if not os.path.isdir(backup_dir):
+        return []
+    names = [name for name in os.listdir(backup_dir)
+             if name.startswith(BACKUP_PREFIX) and name.endswith(BACKUP_SUFFIX)]
+    return [os.path.join(backup_dir, name) for name in sorted(names, reverse=True)]
+
+
+def _rotate(backup_dir: str, keep: int) -> List[str]:
+    """Borra las copias periódicas más antiguas que las últimas keep; devuelve las borradas."""
+    rotated = [path for path in list_backups(backup_dir) if _ROTATED_NAME.match(os.path.basename(path))]
+    removed = rotated[keep:]
+    for path in removed:
+        os.remove(path)
+        shutil.rmtree(archives_dir(path), ignore_errors=True)
+        logger.info("Copia antigua borrada: %s", path)
+    return removed
+
+
+def last_backup_time(backup_dir: str = BACKUP_DIR) -> Optional[float]:
+    """Momento (como time.time()) de la copia más reciente, o None si no hay ninguna."""
+    backups = list_backups(backup_dir)
+    return os.path.getmtime(backups[0]) if backups else None
+
+
+def create_backup(db_path: str = DB_PATH, backup_dir: str = BACKUP_DIR, keep: int = BACKUP_KEEP,
+                  pages_per_step: int = BACKUP_PAGES_PER_STEP, label: str = "",
+                  progress_callback: Optional[Callable[[int, int], None]] = None) -> BackupResult:
+    """
+    Hace una copia comprimida y comprobada de la base de datos, con los archivos de sus
+    ejercicios cerrados, sin bloquear a los que escriben.
+
+    Args:
+        keep (int): Copias periódicas que se conservan; las copias con etiqueta no se rotan.
+        pages_per_step (int): Páginas copiadas en cada paso de la API de copia.
+        label (str, opcional): Se añade al nombre del archivo, p. ej. "antes-de-restaurar".
+        progress_callback (callable, opcional): Recibe (páginas copiadas, páginas totales) tras cada paso.
+
+    Returns:
+        BackupResult: Archivo creado, tamaños y tiempos.
+
+    Raises:
+        sqlite3.Error, OSError: Si no se pudo leer la base de datos o escribir la copia.
+        ValueError: Si la copia no pasó PRAGMA quick_check o un ejercicio cerrado no
+            coincide con lo que registra la base de datos (no se guarda).
+    """
+    os.makedirs(backup_dir, exist_ok=True)
+    # Con microsegundos: dos copias en el mismo segundo (la automática y la del botón) no se pisan
+    name = BACKUP_PREFIX + datetime.now().strftime("%Y%m%d-%H%M%S-%f") + (f"-{label}" if label else "")
+    copy_path = os.path.join(backup_dir, f".{name}.db")
+    backup_path = os.path.join(backup_dir, name + BACKUP_SUFFIX)
+    archive_dir = archives_dir(backup_path)
+
+    started = time.perf_counter()
+    # Copia sin comprimir -> archivo comprimido final, la base de datos primero
+    copies = {copy_path: backup_path}
+    archives = {}
+    try:
+        _copy_online(db_path, copy_path, pages_per_step, progress_callback)
+        # Los ejercicios cerrados de la instantánea van con ella: sin sus archivos faltarían sus transacciones.
+        # Se copian después, así un cierre simultáneo solo puede añadirles filas, y eso lo detecta la comprobación.
+        closed_years = _closed_years(copy_path, db_path)
+        for year, (archive_path, rows) in closed_years.items():
+            if not os.path.exists(archive_path):
+                logger.warning("No se encuentra el archivo del ejercicio %s (%s); la copia no lo incluye.",
+                               year, archive_path)
+                continue
+            archive_copy = os.path.join(backup_dir, f".{name}.{year}.db")
+            archives[year] = os.path.join(archive_dir, ARCHIVE_NAME.format(year=year) + ".gz")
+            copies[archive_copy] = archives[year]
+            _copy_online(archive_path, archive_copy, pages_per_step)
+        copied = time.perf_counter()
+
+        _quick_check(copy_path)
+        for year in archives:
+            archive_copy = os.path.join(backup_dir, f".{name}.{year}.db")
+            _quick_check(archive_copy)
+            _check_archive_rows(archive_copy, year, closed_years[year][1])
+        database_bytes = sum(os.path.getsize(path) for path in copies)
+        if archives:
+            os.makedirs(archive_dir, exist_ok=True)
+        # La base de datos se comprime la última: la copia solo aparece en list_backups cuando está completa
+        for path in reversed(list(copies)):
+            _compress(path, copies[path])
+    except BaseException:
+        shutil.rmtree(archive_dir, ignore_errors=True)
+        raise
+    finally:
+        for path in copies:
+            if os.path.exists(path):
+                os.remove(path)
+
+    result = BackupResult(backup_path, database_bytes, sum(os.path.getsize(path) for path in copies.values()),
+                          copied - started, time.perf_counter() - started, archives)
+    logger.info("Copia de seguridad %s: %.1f MB en %.2f s (%.1f MB/s), comprimida a %.1f MB, %.2f s en total, "
+                "%d ejercicios cerrados.", backup_path, database_bytes / 2 ** 20, result.copy_seconds,
+                result.mb_per_second, result.compressed_bytes / 2 ** 20, result.total_seconds, len(archives))
+    if not label:
+        _rotate(backup_dir, keep)
+    return result
+
+
+def _replace_database(new_path: str, db_path: str):
+    """Sustituye db_path por new_path con un solo os.replace, sin dejar un WAL viejo junto al nuevo archivo."""
+    if os.path.exists(db_path):
+        # Pasa al archivo principal lo que quede en el WAL; un WAL viejo junto a la copia la dañaría
+        conn = sqlite3.connect(db_path)
+        try:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        finally:
+            conn.close()
+    os.replace(new_path, db_path)
+    for suffix in ("-wal", "-shm"):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+
+def restore_backup(backup_path: str, db_path: str = DB_PATH, backup_dir: str = BACKUP_DIR) -> Optional[str]:
+    """
+    Sustituye la base de datos y los archivos de sus ejercicios cerrados por una
+    copia (comprimida con gzip o sin comprimir). Solo debe hacerse con la aplicación cerrada.
+
+    Todo se descomprime y se comprueba junto a los archivos que sustituye antes de
+    tocar ninguno, y cada archivo se reemplaza con un solo os.replace. Los ejercicios
+    cerrados van primero y la base de datos la última: si se interrumpe, la base de
+    datos sigue siendo la anterior y basta con volver a restaurar. Antes se guarda
+    una copia del estado actual, que no se rota.
+
+    Returns:
+        str: Ruta de la copia del estado anterior, o None si no existía la base de datos.
+
+    Raises:
+        sqlite3.Error, OSError: Si no se pudo leer la copia o escribir la base de datos.
+        ValueError: Si la copia o uno de sus ejercicios cerrados no pasó las comprobaciones
+            (no se toca nada).
+    """
+    started = time.perf_counter()
+    restored_path = db_path + ".restaurando"
+    # Archivo de un ejercicio cerrado -> su versión restaurada
+    restored_archives = {}
+    try:
+        _decompress(backup_path, restored_path)
+        _quick_check(restored_path)
+        for year, (archive_path, rows) in _closed_years(restored_path, db_path).items():
+            compressed_archive = os.path.join(archives_dir(backup_path), ARCHIVE_NAME.format(year=year) + ".gz")
+            if not os.path.exists(compressed_archive):
+                logger.warning("La copia %s no incluye el archivo del ejercicio %s; se conserva %s.",
+                               backup_path, year, archive_path)
+                continue
+            restored_archives[archive_path] = archive_path + ".restaurando"
+            _decompress(compressed_archive, restored_archives[archive_path])
+            _quick_check(restored_archives[archive_path])
+            _check_archive_rows(restored_archives[archive_path], year, rows)
+
+        previous_backup = None
+        if os.path.exists(db_path):
+            previous_backup = create_backup(db_path, backup_dir, label="antes-de-restaurar").path
+        for archive_path, restored_archive in restored_archives.items():
+            _replace_database(restored_archive, archive_path)
+        _replace_database(restored_path, db_path)
+    finally:
+        for path in (restored_path, *restored_archives.values()):
+            if os.path.exists(path):
+                os.remove(path)
+
+    logger.info("Base de datos %s restaurada desde %s (%d ejercicios cerrados) en %.2f s.", db_path, backup_path,
+                len(restored_archives), time.perf_counter() - started)
+    return previous_backup
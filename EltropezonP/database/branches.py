@@ -0,0 +1,213 @@
+# database/branches.py
+"""
+Lectura consolidada de las bases de datos de varias sucursales.
+
+Cada sucursal tiene su propio finances.db. BranchSet ofrece los mismos métodos de
+agregación que DBManager (totales por tipo, por mes y por categoría, columnas de
+transacciones y versión de los datos), pero los ejecuta en todas las sucursales
+a la vez y fusiona los resultados parciales. Cada sucursal tiene un hilo propio
+con su conexión de solo lectura; SQLite libera el GIL mientras ejecuta la
+consulta, así el tiempo total es el de la sucursal más lenta y no la suma.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Dict, Iterable, Optional
+
+from database.connection import open_connection
+from database.db_manager import DBManager
+from database.migrations import SCHEMA_VERSION, get_schema_version
+from models.transaction import from_cents, to_cents
+
+logger = logging.getLogger(__name__)
+
+
+class BranchReader:
+    """
+    Conexión de solo lectura a una sucursal, usada siempre desde su propio hilo. El
+    archivo de la sucursal nunca se modifica: no se migra, así que tiene que estar ya
+    en la versión actual del esquema (basta con abrirlo una vez con la aplicación).
+    """
+
+    def __init__(self, name: str, db_path: str):
+        """
+        Raises:
+            sqlite3.Error: Si no se pudo abrir la base de datos.
+            ValueError: Si su esquema es anterior al actual.
+        """
+        self.name = name
+        self.db_path = db_path
+        self.db = None
+        # La versión de los datos se consulta en una conexión aparte, desde cualquier hilo,
+        # para no esperar detrás de una consulta larga de la sucursal
+        self._version_conn = open_connection(db_path, read_only=True, check_same_thread=False)
+        self._version_lock = threading.Lock()
+        schema_version = get_schema_version(self._version_conn)
+        if schema_version < SCHEMA_VERSION:
+            self._version_conn.close()
+            raise ValueError(f"su esquema está en la versión {schema_version} y la actual es {SCHEMA_VERSION}; "
+                             f"ábrala una vez con la aplicación de la sucursal para actualizarla")
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"sucursal-{name}",
+                                           initializer=self._open)
+
+    def _open(self):
+        self.db = DBManager(self.db_path, initialize=False, read_only=True)
+
+    def submit(self, method_name: str, *args):
+        """Ejecuta un método de DBManager en el hilo de la sucursal y devuelve el Future."""
+        return self.executor.submit(lambda: getattr(self.db, method_name)(*args))
+
+    def data_version(self):
+        """Contador de cambios de la sucursal (tabla data_changes), como DBManager.get_data_version."""
+        try:
+            with self._version_lock:
+                return self._version_conn.execute("SELECT version FROM data_changes WHERE id = 1").fetchone()[0]
+        except sqlite3.Error as e:
+            logger.error("Error al obtener la versión de los datos de la sucursal %s: %s", self.name, e)
+            return None
+
+    def interrupt(self):
+        if self.db:
+            self.db.interrupt()
+
+    def close(self):
+        if self.db:
+            self.executor.submit(self.db.close).result()
+        self.executor.shutdown(wait=True)
+        self._version_conn.close()
+
+
+class BranchSet:
+    """
+    Conjunto de sucursales que se consulta como si fuera un único DBManager de solo lectura.
+
+    subset() y spawn() devuelven vistas que comparten los hilos y conexiones de las
+    sucursales; solo el conjunto original los cierra.
+    """
+
+    def __init__(self, branches: Dict[str, str], _readers: Optional[Dict[str, BranchReader]] = None):
+        """
+        Args:
+            branches (dict): Nombre de la sucursal -> ruta de su base de datos.
+        """
+        self._owner = _readers is None
+        if _readers is None:
+            _readers = {}
+            for name, db_path in branches.items():
+                if not os.path.exists(db_path):
+                    logger.error("No existe la base de datos de la sucursal %s: %s", name, db_path)
+                    continue
+                try:
+                    _readers[name] = BranchReader(name, db_path)
+                except (sqlite3.Error, ValueError) as e:
+                    logger.error("No se puede leer la base de datos de la sucursal %s (%s): %s", name, db_path, e)
+        self.readers = {name: _readers[name] for name in branches if name in _readers}
+
+    @property
+    def branch_names(self) -> list:
+        return list(self.readers)
+
+    def subset(self, names: Iterable[str]) -> "BranchSet":
+        """Vista con solo algunas sucursales."""
+        return BranchSet({name: self.readers[name].db_path for name in names if name in self.readers},
+                         self.readers)
+
+    def spawn(self) -> "BranchSet":
+        """Vista para las tareas en segundo plano; las consultas ya se hacen en los hilos de las sucursales."""
+        return BranchSet({name: reader.db_path for name, reader in self.readers.items()}, self.readers)
+
+    def _gather(self, method_name: str, *args) -> dict:
+        """Lanza el método en todas las sucursales a la vez y espera sus resultados."""
+        futures = {name: reader.submit(method_name, *args) for name, reader in self.readers.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+    def per_branch(self, method_name: str, *args) -> dict:
+        """Resultado de un método de DBManager en cada sucursal, sin fusionar."""
+        return self._gather(method_name, *args)
+
+    def get_data_version(self) -> tuple:
+        return tuple((name, reader.data_version()) for name, reader in self.readers.items())
+
+    def read_snapshot(self):
+        # Cada sucursal se lee en su hilo y sus resultados no se corrigen con cambios, solo se recalculan
+        return nullcontext()
+
+    def attach_archives(self, start_date: Optional[str] = None, end_date: Optional[str] = None):
+        # Cada sucursal adjunta sus ejercicios cerrados en su hilo, al consultarlos
+        pass
+
+    def get_totals_by_type(self, start_date: Optional[str] = None, end_date: Optional[str] = None) -> dict:
+        totals = {}
+        for partial in self._gather("get_totals_by_type", start_date, end_date).values():
+            for transaction_type, total in partial.items():
+                totals[transaction_type] = totals.get(transaction_type, 0) + to_cents(total)
+        return {transaction_type: from_cents(total) for transaction_type, total in totals.items()}
+
+    def get_monthly_totals(self, start_date: Optional[str] = None, end_date: Optional[str] = None) -> list:
+        totals = {}
+        for partial in self._gather("get_monthly_totals", start_date, end_date).values():
+            for month, transaction_type, total in partial:
+                key = (month, transaction_type)
+                totals[key] = totals.get(key, 0) + to_cents(total)
+        return sorted((month, transaction_type, from_cents(total))
+                      for (month, transaction_type), total in totals.items())
+
+    def get_category_totals(self, transaction_type: str, start_date: Optional[str] = None,
+                            end_date: Optional[str] = None) -> list:
+        totals = {}
+        for partial in self._gather("get_category_totals", transaction_type, start_date, end_date).values():
+            for category, total in partial:
+                totals[category] = totals.get(category, 0) + to_cents(total)
+        return sorted((category, from_cents(total)) for category, total in totals.items())
+
+    def get_transaction_columns(self, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                                include_descriptions: bool = False, chunk_size: int = 50000) -> dict:
+        """
+        Columnas de todas las sucursales concatenadas y ordenadas por día, como en
+        DBManager.get_transaction_columns. Los ids solo son únicos dentro de cada
+        sucursal; la columna "branch" indica el índice de la sucursal en "branch_values".
+        """
+        import numpy as np
+
+        parts = list(self._gather("get_transaction_columns", start_date, end_date, include_descriptions,
+                                  chunk_size).values())
+        fields = ["id", "day", "amount_cents"] + (["description"] if include_descriptions else [])
+        dtypes = {"id": np.int64, "day": np.int32, "amount_cents": np.int64, "description": object}
+        merged = {field: np.concatenate([part[field] for part in parts]) if parts else np.empty(0, dtypes[field])
+                  for field in fields}
+        merged["branch"] = np.concatenate([np.full(len(part["id"]), index, dtype=np.int16)
+                                           for index, part in enumerate(parts)] or [np.empty(0, np.int16)])
+        merged["branch_values"] = self.branch_names
+
+        # Los códigos de tipo y categoría de cada sucursal se traducen a los del conjunto
+        for field in ("type", "category"):
+            values, recoded = [], []
+            for part in parts:
+                mapping = []
+                for value in part[f"{field}_values"]:
+                    if value not in values:
+                        values.append(value)
+                    mapping.append(values.index(value))
+                recoded.append(np.array(mapping, dtype=np.int16)[part[field]] if mapping else part[field])
+            merged[field] = np.concatenate(recoded or [np.empty(0, np.int16)])
+            merged[f"{field}_values"] = values
+
+        order = np.lexsort((merged["id"], merged["branch"], merged["day"]))
+        for field in fields + ["branch", "type", "category"]:
+            merged[field] = merged[field][order]
+        return merged
+
+    def interrupt(self):
+        for reader in self.readers.values():
+            reader.interrupt()
+
+    def close(self):
+        """Cierra las conexiones de las sucursales; en una vista no hace nada."""
+        if not self._owner:
+            return
+        for reader in self.readers.values():
+            reader.close()
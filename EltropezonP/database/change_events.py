@@ -0,0 +1,66 @@
+# database/change_events.py
+"""
+Avisos de los cambios que hace un DBManager en las transacciones.
+
+Cada alta, modificación o borrado individual publica un TransactionChange con los
+valores de antes y de después, y las versiones de los datos antes y después de la
+escritura. Con eso quien guarda resultados calculados (la caché de
+FinancialAnalytics) puede corregirlos sumando y restando la transacción en lugar
+de recalcularlos. Las escrituras en bloque no publican nada; cambian la versión
+de los datos y los resultados se recalculan.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+from models.transaction import Transaction
+
+logger = logging.getLogger(__name__)
+
+INSERTED = "insert"
+UPDATED = "update"
+DELETED = "delete"
+
+
+@dataclass(frozen=True)
+class TransactionChange:
+    """Un cambio confirmado en una transacción, con sus valores guardados antes y después."""
+    kind: str
+    before: Optional[Transaction]
+    after: Optional[Transaction]
+    # Valores de DBManager.get_data_version; None si no se pudieron leer
+    previous_version: Optional[int]
+    version: Optional[int]
+
+    def deltas(self) -> List[Tuple[Transaction, int]]:
+        """Pares (transacción, signo): los valores anteriores se restan y los nuevos se suman."""
+        deltas = []
+        if self.before is not None:
+            deltas.append((self.before, -1))
+        if self.after is not None:
+            deltas.append((self.after, 1))
+        return deltas
+
+
+class ChangeBus:
+    """Lista de suscriptores a los que se entrega cada cambio en el hilo que escribió."""
+
+    def __init__(self):
+        self._subscribers = []
+
+    def subscribe(self, callback: Callable[[TransactionChange], None]):
+        if callback not in self._subscribers:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[TransactionChange], None]):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def publish(self, change: TransactionChange):
+        # Un suscriptor que falla no debe impedir que los demás reciban el cambio
+        for callback in list(self._subscribers):
+            try:
+                callback(change)
+            except Exception as e:
+                logger.error("Error al notificar un cambio de transacción: %s", e)
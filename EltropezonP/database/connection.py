@@ -0,0 +1,88 @@
+# database/connection.py
+
+import sqlite3
+from pathlib import Path
+
+from config import DB_CONNECTION_PROFILE
+
+# Perfiles de configuración de las conexiones. Cada PRAGMA se aplica en este orden al abrir.
+CONNECTION_PROFILES = {
+    # WAL permite que los lectores sigan consultando mientras se escribe; synchronous=NORMAL
+    # es seguro con WAL (solo puede perderse la última transacción ante un corte de luz).
+    "tuned": [
+        ("journal_mode", "WAL"),
+        ("synchronous", "NORMAL"),
+        ("mmap_size", 256 * 1024 * 1024),
+        ("cache_size", -64000),  # Negativo = KiB, es decir unos 64 MB
+        ("temp_store", "MEMORY"),
+        ("busy_timeout", 5000),
+    ],
+    # Valores por defecto de SQLite, por si el perfil optimizado da problemas en algún equipo
+    "conservative": [
+        ("journal_mode", "DELETE"),
+        ("synchronous", "FULL"),
+        ("mmap_size", 0),
+        ("cache_size", -2000),
+        ("temp_store", "DEFAULT"),
+        ("busy_timeout", 5000),
+    ],
+}
+
+# PRAGMA que se informan en el diagnóstico de una conexión
+DIAGNOSTIC_PRAGMAS = ["journal_mode", "synchronous", "mmap_size", "cache_size", "temp_store", "busy_timeout",
+                      "query_only", "page_size", "wal_autocheckpoint"]
+
+# El modo del diario se guarda en el archivo; solo lo cambia una conexión de escritura
+_WRITER_ONLY_PRAGMAS = {"journal_mode"}
+
+
+def _read_only_uri(db_path: str) -> str:
+    return f"{Path(db_path).absolute().as_uri()}?mode=ro"
+
+
+def open_connection(db_path: str, read_only: bool = False, profile: str = None,
+                    check_same_thread: bool = True) -> sqlite3.Connection:
+    """
+    Abre una conexión SQLite y le aplica un perfil de configuración.
+
+    Args:
+        db_path (str): Ruta del archivo de la base de datos.
+        read_only (bool): Abre la conexión en modo solo lectura (URI mode=ro), pensada
+            para las consultas en segundo plano, que así nunca toman bloqueos de escritura.
+        profile (str, opcional): Nombre del perfil; por defecto DB_CONNECTION_PROFILE.
+        check_same_thread (bool): Con False la conexión se puede usar desde varios hilos;
+            quien la use debe serializar el acceso.
+
+    Returns:
+        sqlite3.Connection: La conexión configurada.
+    """
+    profile = profile or DB_CONNECTION_PROFILE
+    if profile not in CONNECTION_PROFILES:
+        raise ValueError(f"Perfil de conexión desconocido: {profile}")
+
+    if read_only and db_path != ":memory:":
+        try:
+            conn = sqlite3.connect(_read_only_uri(db_path), uri=True, check_same_thread=check_same_thread)
+            # Comprobar que el archivo se puede leer (con WAL requiere acceso al archivo -shm)
+            conn.execute("SELECT 1 FROM sqlite_master LIMIT 1")
+        except sqlite3.OperationalError:
+            # Sin permiso para el modo solo lectura: conexión normal que rechaza escrituras
+            conn = sqlite3.connect(db_path, check_same_thread=check_same_thread)
+            conn.execute("PRAGMA query_only = ON")
+    else:
+        conn = sqlite3.connect(db_path, check_same_thread=check_same_thread)
+
+    for pragma, value in CONNECTION_PROFILES[profile]:
+        if read_only and pragma in _WRITER_ONLY_PRAGMAS:
+            continue
+        conn.execute(f"PRAGMA {pragma} = {value}")
+    return conn
+
+
+def active_pragmas(conn: sqlite3.Connection) -> dict:
+    """Devuelve los valores actuales de los PRAGMA relevantes de una conexión."""
+    values = {}
+    for pragma in DIAGNOSTIC_PRAGMAS:
+        row = conn.execute(f"PRAGMA {pragma}").fetchone()
+        values[pragma] = row[0] if row else None
+    return values
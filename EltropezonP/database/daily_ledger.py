@@ -0,0 +1,85 @@
+# database/daily_ledger.py
+"""
+Índice de sumas acumuladas por día para totales de cualquier rango de fechas.
+
+La tabla daily_ledger (migración 8) guarda, mantenida con triggers, el total en
+céntimos y el número de transacciones de cada día y tipo. DailyLedger la carga
+en arreglos de NumPy con las sumas acumuladas desde el primer día, de modo que
+el total de un rango [inicio, fin] son dos lecturas: acumulado[fin] - acumulado[inicio - 1].
+Cargarla cuesta lo que el número de días con datos, no el de transacciones.
+
+Se lee de la vista daily_totals, que añade los totales diarios de los ejercicios
+cerrados (archive_daily_totals), así los rangos que llegan a años archivados
+también se responden sin abrir sus archivos.
+"""
+
+import sqlite3
+
+
+class DailyLedger:
+    """Sumas acumuladas de montos y conteos por tipo de transacción, indexadas por día."""
+
+    def __init__(self):
+        self.first_day = 0
+        self.last_day = -1
+        # Tipo -> (montos acumulados, conteos acumulados); la posición i corresponde al día first_day + i
+        self._cumulative = {}
+
+    def load(self, conn: sqlite3.Connection):
+        """Lee los totales diarios y calcula las sumas acumuladas; un día repetido se suma."""
+        import numpy as np
+
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        rows = cursor.execute("SELECT day, type, total_cents, count FROM daily_totals").fetchall()
+        self._cumulative = {}
+        if not rows:
+            self.first_day, self.last_day = 0, -1
+            return
+        days, types, totals, counts = zip(*rows)
+        self.first_day, self.last_day = min(days), max(days)
+        size = self.last_day - self.first_day + 1
+        offsets = np.asarray(days, dtype=np.int64) - self.first_day
+        totals = np.asarray(totals, dtype=np.int64)
+        counts = np.asarray(counts, dtype=np.int64)
+        types = np.asarray(types, dtype=object)
+        for transaction_type in set(types):
+            mask = types == transaction_type
+            daily_totals = np.zeros(size, dtype=np.int64)
+            daily_counts = np.zeros(size, dtype=np.int64)
+            np.add.at(daily_totals, offsets[mask], totals[mask])
+            np.add.at(daily_counts, offsets[mask], counts[mask])
+            self._cumulative[transaction_type] = (np.cumsum(daily_totals), np.cumsum(daily_counts))
+
+    def _position(self, day: int) -> int:
+        """Posición del último día <= day dentro de los arreglos (-1 si es anterior a todos)."""
+        return min(day, self.last_day) - self.first_day
+
+    def totals(self, start_day=None, end_day=None) -> dict:
+        """
+        Total en céntimos por tipo en [start_day, end_day] (sin límites, todo el libro).
+        Solo incluye los tipos con alguna transacción en el rango, como GROUP BY en SQL.
+        """
+        start = self._position(start_day - 1) if start_day is not None else -1
+        end = self._position(end_day) if end_day is not None else self.last_day - self.first_day
+        result = {}
+        if end < 0 or end <= start:
+            return result
+        for transaction_type, (amounts, counts) in self._cumulative.items():
+            count = counts[end] - (counts[start] if start >= 0 else 0)
+            if count > 0:
+                result[transaction_type] = int(amounts[end] - (amounts[start] if start >= 0 else 0))
+        return result
+
+    def apply(self, day: int, transaction_type: str, amount_cents: int, count: int) -> bool:
+        """
+        Suma (o resta, con valores negativos) una transacción a las sumas acumuladas.
+        Devuelve False si el día o el tipo quedan fuera de los arreglos y hay que recargar.
+        """
+        if transaction_type not in self._cumulative or not self.first_day <= day <= self.last_day:
+            return False
+        amounts, counts = self._cumulative[transaction_type]
+        position = day - self.first_day
+        amounts[position:] += amount_cents
+        counts[position:] += count
+        return True
@@ -1,155 +1,1167 @@
+import logging
+import os
+import queue
+import re
 import sqlite3
-from typing import List, Optional
-from models.transaction import Transaction
-from config import DB_PATH
+import sys
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from typing import Iterable, List, Optional
+from models.transaction import (EPOCH_ORDINAL, Transaction, TransactionFilter, date_to_day, day_to_date,
+                                from_cents, to_cents)
+from config import ARCHIVE_NAME, DB_PATH
+from database.change_events import DELETED, INSERTED, UPDATED, ChangeBus, TransactionChange
+from database.connection import active_pragmas, open_connection
+from database.daily_ledger import DailyLedger
+from database.migrations import apply_migrations, DAILY_LEDGER_REBUILD, ROLLUP_REBUILD
+import instrumentation
+
+logger = logging.getLogger(__name__)
+
+# Archivos de ejercicios cerrados adjuntos a la vez por conexión (SQLite admite 10 bases adjuntas)
+MAX_ATTACHED_ARCHIVES = 8
+
+
+def locate_archive(db_path: str, year: int, stored_path: Optional[str] = None) -> str:
+    """
+    Ruta del archivo de un ejercicio cerrado de la base de datos db_path: la guardada
+    en la tabla archives si existe y, si no (la carpeta se movió), junto a la base de datos.
+    """
+    if stored_path and os.path.exists(stored_path):
+        return stored_path
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), ARCHIVE_NAME.format(year=year))
 
 
 class DBManager:
-    def __init__(self):
+    # Columnas del visor en el orden de las tuplas de get_transactions_page
+    TRANSACTION_COLUMNS = ["id", "date", "description", "amount", "type", "category"]
+    # Columna de la tabla donde se guarda cada campo: las fechas como días desde 1970 y los montos en céntimos
+    STORAGE_COLUMNS = {"id": "id", "date": "day", "description": "description", "amount": "amount_cents",
+                       "type": "type", "category": "category"}
+
+    def __init__(self, db_path: str = DB_PATH, initialize: bool = True, read_only: bool = False):
+        self.db_path = db_path
+        self.read_only = read_only
         self.conn = None
+        self._has_fts = None
+        # Sumas acumuladas por día y la versión de los datos con la que se cargaron
+        self._daily_ledger = None
+        self._daily_ledger_version = None
+        # Avisos de las altas, modificaciones y borrados individuales (ver database/change_events.py)
+        self.changes = ChangeBus()
+        # Cola de escritura diferida (ver enable_write_behind); None = cada escritura se confirma al momento
+        self._write_behind = None
+        # Ejercicios cerrados (año -> archivo) con la versión de los datos con la que se leyeron,
+        # y los archivos adjuntos a la conexión, del usado hace más tiempo al más reciente
+        self._archives = None
+        self._archives_version = None
+        self._attached_archives = OrderedDict()
         self.connect()
-        self._initialize_database()
+        if initialize:
+            self._initialize_database()
 
     def connect(self):
         try:
-            self.conn = sqlite3.connect(DB_PATH)
+            self.conn = open_connection(self.db_path, read_only=self.read_only)
             self.conn.row_factory = sqlite3.Row  # Acceso a columnas por nombre
+        except (sqlite3.Error, ValueError) as e:
+            logger.error("Error al conectar con la base de datos: %s", e)
+
+    def spawn(self) -> "DBManager":
+        """
+        Crea otro gestor de solo lectura sobre el mismo archivo con su propia conexión,
+        para consultar desde un hilo de trabajo sin bloquear las escrituras. El esquema ya está migrado.
+        """
+        return DBManager(self.db_path, initialize=False, read_only=True)
+
+    def get_connection_settings(self) -> dict:
+        """Devuelve los PRAGMA activos de la conexión, para diagnóstico."""
+        try:
+            return active_pragmas(self.conn)
         except sqlite3.Error as e:
-            print(f"Error al conectar con la base de datos: {e}")
+            logger.error("Error al leer la configuración de la conexión: %s", e)
+            return {}
 
     def _initialize_database(self):
         """
-        Crea la tabla si no existe.
+        Crea o actualiza el esquema aplicando las migraciones pendientes.
         """
         try:
-            cursor = self.conn.cursor()
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS transactions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    date TEXT NOT NULL,
-                    description TEXT NOT NULL,
-                    amount REAL NOT NULL,
-                    type TEXT NOT NULL,
-                    category TEXT NOT NULL
-                )
-            ''')
-            self.conn.commit()
-            print("Tabla de transacciones verificada/creada.")
+            version = apply_migrations(self.conn)
+            logger.info("Esquema de la base de datos verificado (versión %s).", version)
         except sqlite3.Error as e:
-            print(f"Error al crear la tabla: {e}")
+            logger.error("Error al migrar la base de datos: %s", e)
 
-    def add_transaction(self, transaction: Transaction):
-        """Añade una nueva transacción a la base de datos."""
+    def _query(self, sql: str, params=(), cursor=None, one: bool = False):
+        """
+        Ejecuta una consulta y devuelve todas sus filas (o solo la primera con one=True).
+        Con la medición activada registra el tiempo, el SQL y las filas bajo el nombre
+        del método que la llama.
+        """
+        cursor = cursor or self.conn.cursor()
+        if not instrumentation.enabled:
+            cursor.execute(sql, params)
+            return cursor.fetchone() if one else cursor.fetchall()
+        with instrumentation.span("sql", sys._getframe(1).f_code.co_name, sql=" ".join(sql.split())) as span:
+            cursor.execute(sql, params)
+            result = cursor.fetchone() if one else cursor.fetchall()
+            span.details["rows"] = int(result is not None) if one else len(result)
+        return result
+
+    def _execute(self, sql: str, params=(), cursor=None, many: bool = False) -> int:
+        """
+        Ejecuta una sentencia de escritura (con executemany si many=True) y devuelve
+        las filas afectadas, midiéndola igual que _query.
+        """
+        cursor = cursor or self.conn.cursor()
+        run = cursor.executemany if many else cursor.execute
+        if not instrumentation.enabled:
+            run(sql, params)
+            return cursor.rowcount
+        with instrumentation.span("sql", sys._getframe(1).f_code.co_name, sql=" ".join(sql.split())) as span:
+            run(sql, params)
+            span.details["rows"] = cursor.rowcount
+        return cursor.rowcount
+
+    def add_transaction(self, transaction: Transaction, on_done=None):
+        """
+        Añade una nueva transacción a la base de datos.
+
+        Args:
+            on_done (callable, opcional): Recibe None cuando la transacción quedó
+                confirmada en disco, o el mensaje de error. Con la escritura diferida
+                se llama más tarde, en el hilo que entrega los resultados.
+        """
         try:
-            cursor = self.conn.cursor()
-            cursor.execute('''
-                INSERT INTO transactions (date, description, amount, type, category)
+            row = self._to_row(transaction)
+            if self._writer():
+                self._write_behind.submit(INSERTED, row, None, on_done)
+                return
+            self._write_now(INSERTED, row)
+            logger.debug("Transacción '%s' añadida correctamente.", transaction.description)
+            self._acknowledge(on_done, None)
+        except (sqlite3.Error, ValueError) as e:
+            logger.error("Error al añadir la transacción: %s", e)
+            self._acknowledge(on_done, str(e))
+
+    def apply_write(self, kind: str, row: Optional[tuple] = None, transaction_id: Optional[int] = None):
+        """
+        Ejecuta un alta, modificación o borrado sin confirmarlo.
+
+        Returns:
+            tuple: (valores anteriores, valores guardados) como Transaction, o None si no cambió ninguna fila.
+        """
+        cursor = self.conn.cursor()
+        if kind == INSERTED:
+            self._execute('''
+                INSERT INTO transactions (day, description, amount_cents, type, category)
                 VALUES (?, ?, ?, ?, ?)
-            ''', (transaction.date, transaction.description, transaction.amount,
-                  transaction.type, transaction.category))
+            ''', row, cursor=cursor)
+            return None, self._stored_transaction(cursor.lastrowid, row)
+
+        previous = self._query("SELECT * FROM transactions WHERE id = ?", (transaction_id,), cursor=cursor, one=True)
+        if previous is None:
+            return None
+        before = self._to_transaction(previous)
+        if kind == UPDATED:
+            self._execute('''
+                UPDATE transactions
+                SET day = ?, description = ?, amount_cents = ?, type = ?, category = ?
+                WHERE id = ?
+            ''', (*row, transaction_id), cursor=cursor)
+            return before, self._stored_transaction(transaction_id, row)
+        self._execute("DELETE FROM transactions WHERE id = ?", (transaction_id,), cursor=cursor)
+        return before, None
+
+    def _write_now(self, kind: str, row: Optional[tuple] = None, transaction_id: Optional[int] = None):
+        """Escribe y confirma en esta conexión, y publica el cambio."""
+        # Con el bloqueo de escritura tomado, las versiones leídas antes y después son exactamente las de este cambio
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            previous_version = self.get_data_version()
+            result = self.apply_write(kind, row, transaction_id)
+            version = self.get_data_version()
             self.conn.commit()
-            print(f"Transacción '{transaction.description}' añadida correctamente.")
-        except sqlite3.Error as e:
-            print(f"Error al añadir la transacción: {e}")
+        except sqlite3.Error:
+            self.conn.rollback()
+            raise
+        if result:
+            self._publish_change(kind, *result, previous_version, version)
+        return result
+
+    @staticmethod
+    def _acknowledge(on_done, error: Optional[str]):
+        if on_done:
+            on_done(error)
+
+    def add_transactions_bulk(self, transactions: Iterable[Transaction], chunk_size: int = 5000) -> int:
+        """
+        Añade muchas transacciones con executemany, confirmando una vez por bloque.
+
+        Returns:
+            int: Número de transacciones insertadas.
+
+        Raises:
+            sqlite3.Error, ValueError: Si falla un bloque; se deshace ese bloque, los anteriores quedan guardados.
+        """
+        inserted = 0
+        chunk = []
+        self.flush_writes()
+        try:
+            cursor = self.conn.cursor()
+            for transaction in transactions:
+                chunk.append(self._to_row(transaction))
+                if len(chunk) >= chunk_size:
+                    inserted += self._insert_chunk(cursor, chunk)
+                    chunk = []
+            if chunk:
+                inserted += self._insert_chunk(cursor, chunk)
+        except (sqlite3.Error, ValueError) as e:
+            self.conn.rollback()
+            logger.error("Error al añadir transacciones en bloque tras insertar %d: %s", inserted, e)
+            raise
+        return inserted
+
+    def _insert_chunk(self, cursor, rows: list) -> int:
+        """Inserta un bloque de filas dentro de una sola transacción."""
+        self._execute('''
+            INSERT INTO transactions (day, description, amount_cents, type, category)
+            VALUES (?, ?, ?, ?, ?)
+        ''', rows, cursor=cursor, many=True)
+        self.conn.commit()
+        return len(rows)
+
+    @staticmethod
+    def _to_row(transaction: Transaction) -> tuple:
+        """Valores de una transacción para las columnas (day, description, amount_cents, type, category)."""
+        return (date_to_day(transaction.date), transaction.description, to_cents(transaction.amount),
+                transaction.type, transaction.category)
+
+    @staticmethod
+    def _to_transaction(row) -> Transaction:
+        """Crea una Transaction a partir de una fila completa de la tabla transactions."""
+        return Transaction(
+            id=row['id'],
+            date=day_to_date(row['day']),
+            description=row['description'],
+            amount=from_cents(row['amount_cents']),
+            type=row['type'],
+            category=row['category']
+        )
+
+    @staticmethod
+    def _stored_transaction(transaction_id: int, row: tuple) -> Transaction:
+        """Transaction con los valores tal como quedaron guardados a partir de una fila de _to_row."""
+        day, description, amount_cents, transaction_type, category = row
+        return Transaction(id=transaction_id, date=day_to_date(day), description=description,
+                           amount=from_cents(amount_cents), type=transaction_type, category=category)
 
     def get_all_transactions(self) -> List[Transaction]:
         """Obtiene todas las transacciones de la base de datos, ordenadas por fecha."""
         try:
-            cursor = self.conn.cursor()
-            cursor.execute("SELECT * FROM transactions ORDER BY date DESC")
-            rows = cursor.fetchall()
-            return [Transaction(
-                        id=row['id'],
-                        date=row['date'],
-                        description=row['description'],
-                        amount=row['amount'],
-                        type=row['type'],
-                        category=row['category']
-                    ) for row in rows]
+            rows = self._query("SELECT * FROM transactions ORDER BY day DESC")
+            return [self._to_transaction(row) for row in rows]
+        except sqlite3.Error as e:
+            logger.error("Error al obtener las transacciones: %s", e)
+            return []
+
+    def get_transaction_columns(self, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                                include_descriptions: bool = False, chunk_size: int = 50000) -> dict:
+        """
+        Lee las transacciones de un rango de fechas directamente en arreglos de NumPy,
+        sin crear un objeto por fila. Las filas se leen por bloques con fetchmany y se
+        copian a arreglos reservados de antemano con el tamaño exacto. Incluye las de
+        los ejercicios cerrados que alcanza el rango.
+
+        Returns:
+            dict: "id" (int64), "day" (int32, días desde 1970-01-01), "amount_cents" (int64),
+                  "type" y "category" (códigos int16) con sus valores en "type_values" y
+                  "category_values", y "description" (object) si se pide. Ordenadas por día e id.
+        """
+        # NumPy se importa aquí para no retrasar el arranque de la aplicación
+        import numpy as np
+
+        def allocate(size):
+            columns = {
+                "id": np.empty(size, dtype=np.int64),
+                "day": np.empty(size, dtype=np.int32),
+                "amount_cents": np.empty(size, dtype=np.int64),
+                "type": np.empty(size, dtype=np.int16),
+                "category": np.empty(size, dtype=np.int16),
+            }
+            if include_descriptions:
+                columns["description"] = np.empty(size, dtype=object)
+            return columns
+
+        # Código de cada valor categórico, en el orden en que aparecen
+        codes = {"type": {}, "category": {}}
+        try:
+            where, params = self._date_range_clause(start_date, end_date)
+            selected = f"id, day, amount_cents, type, category{', description' if include_descriptions else ''}"
+            # Si el rango llega a ejercicios cerrados, se leen también sus archivos
+            with self._transaction_sources(*self._day_range(start_date, end_date)) as groups:
+                cursors = []
+                total = 0
+                for conn, sources in groups:
+                    cursor = conn.cursor()
+                    cursor.row_factory = None  # Tuplas simples: no hace falta crear un sqlite3.Row por fila
+                    cursors.append(cursor)
+                    total += sum(self._query(f"SELECT COUNT(*) FROM {source} {where}", params,
+                                             cursor=cursor, one=True)[0] for source in sources)
+                columns = allocate(total)
+                position = 0
+                for cursor, (conn, sources) in zip(cursors, groups):
+                    sql = " UNION ALL ".join(f"SELECT {selected} FROM {source} {where}" for source in sources)
+                    sql += " ORDER BY day, id"
+                    # Las filas se leen por bloques, así que se mide la consulta junto con la copia
+                    with instrumentation.span("sql", "get_transaction_columns", sql=" ".join(sql.split())) as span:
+                        cursor.execute(sql, params * len(sources))
+                        group_start = position
+                        while position < total:
+                            rows = cursor.fetchmany(min(chunk_size, total - position))
+                            if not rows:
+                                break
+                            end = position + len(rows)
+                            values = list(zip(*rows))
+                            columns["id"][position:end] = values[0]
+                            columns["day"][position:end] = values[1]
+                            columns["amount_cents"][position:end] = values[2]
+                            for name, column_values in (("type", values[3]), ("category", values[4])):
+                                mapping = codes[name]
+                                columns[name][position:end] = [mapping.setdefault(value, len(mapping))
+                                                               for value in column_values]
+                            if include_descriptions:
+                                columns["description"][position:end] = values[5]
+                            position = end
+                        span.details["rows"] = position - group_start
+            if position < total:
+                # Otra conexión borró filas después del COUNT
+                columns = {name: column[:position] for name, column in columns.items()}
+            if len(groups) > 1:
+                # Cada grupo viene ordenado por su cuenta: se ordena el conjunto por día e id
+                order = np.lexsort((columns["id"], columns["day"]))
+                columns = {name: column[order] for name, column in columns.items()}
+        except (sqlite3.Error, ValueError) as e:
+            logger.error("Error al leer las columnas de transacciones: %s", e)
+            columns, codes = allocate(0), {"type": {}, "category": {}}
+
+        columns["type_values"] = list(codes["type"])
+        columns["category_values"] = list(codes["category"])
+        return columns
+
+    @property
+    def has_fts(self) -> bool:
+        """Indica si existe el índice de texto completo de descripciones (requiere FTS5)."""
+        if self._has_fts is None:
+            try:
+                cursor = self.conn.cursor()
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'descriptions_fts'")
+                self._has_fts = cursor.fetchone() is not None
+            except sqlite3.Error:
+                return False
+        return self._has_fts
+
+    @staticmethod
+    def _fts_query(text: str) -> str:
+        """Convierte el texto del usuario en una consulta FTS5 de prefijos: 'inv caj' -> '"inv"* "caj"*'."""
+        return " ".join(f'"{token}"*' for token in re.findall(r"\w+", text))
+
+    def _description_match_clause(self, text: str):
+        """Condición SQL sobre transactions.description para una búsqueda de texto."""
+        fts_query = self._fts_query(text) if self.has_fts else ""
+        if fts_query:
+            return ('''description IN (
+                        SELECT d.description FROM descriptions d
+                        WHERE d.id IN (SELECT rowid FROM descriptions_fts WHERE descriptions_fts MATCH ?))''',
+                    [fts_query])
+        return "description LIKE ?", [f"%{text}%"]
+
+    def _filter_clause(self, filters: Optional[TransactionFilter]):
+        """Construye las condiciones SQL de un filtro del visor de transacciones."""
+        conditions, params = [], []
+        if filters:
+            if filters.type:
+                conditions.append("type = ?")
+                params.append(filters.type)
+            if filters.category:
+                conditions.append("category = ?")
+                params.append(filters.category)
+            if filters.search:
+                condition, condition_params = self._description_match_clause(filters.search)
+                # Solo un texto numérico puede coincidir con el monto; así el resto usa el índice
+                if re.fullmatch(r"[\d.,]+", filters.search):
+                    condition = f"({condition} OR printf('%.2f', amount_cents / 100.0) LIKE ?)"
+                    condition_params.append(f"%{filters.search.replace(',', '.')}%")
+                conditions.append(condition)
+                params.extend(condition_params)
+            if filters.min_amount is not None:
+                conditions.append("amount_cents >= ?")
+                params.append(to_cents(filters.min_amount))
+            if filters.max_amount is not None:
+                conditions.append("amount_cents <= ?")
+                params.append(to_cents(filters.max_amount))
+        return conditions, params
+
+    @classmethod
+    def _sort_order(cls, filters: Optional[TransactionFilter]):
+        """Devuelve el campo de orden (validado) y si el orden es descendente."""
+        if filters and filters.sort_column in cls.TRANSACTION_COLUMNS:
+            return filters.sort_column, filters.sort_descending
+        return "date", True
+
+    @classmethod
+    def page_key(cls, row: tuple, filters: Optional[TransactionFilter] = None) -> tuple:
+        """
+        Clave (valor guardado de la columna de orden, id) de una fila devuelta por
+        get_transactions_page; las fechas pasan a número de día y los montos a céntimos.
+        """
+        sort_column, _ = cls._sort_order(filters)
+        value = row[cls.TRANSACTION_COLUMNS.index(sort_column)]
+        if sort_column == "date":
+            value = date_to_day(value)
+        elif sort_column == "amount":
+            value = to_cents(value)
+        return value, row[0]
+
+    @classmethod
+    def key_precedes(cls, key: tuple, other: tuple, filters: Optional[TransactionFilter] = None) -> bool:
+        """Indica si la fila con clave key (ver page_key) va antes que la de clave other en el orden del filtro."""
+        _, descending = cls._sort_order(filters)
+        return key > other if descending else key < other
+
+    @staticmethod
+    def page_row(transaction: Transaction) -> tuple:
+        """Tupla (id, fecha, descripción, monto, tipo, categoría) como las de get_transactions_page."""
+        return (transaction.id, transaction.date, transaction.description, transaction.amount, transaction.type,
+                transaction.category)
+
+    def count_transactions(self, filters: Optional[TransactionFilter] = None) -> int:
+        """Cuenta las transacciones que cumplen el filtro."""
+        conditions, params = self._filter_clause(filters)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        try:
+            return self._query(f"SELECT COUNT(*) FROM transactions {where}", params, one=True)[0]
         except sqlite3.Error as e:
-            print(f"Error al obtener las transacciones: {e}")
+            logger.error("Error al contar las transacciones: %s", e)
+            return 0
+
+    def get_transactions_page(self, after: Optional[tuple] = None, until: Optional[tuple] = None,
+                              limit: Optional[int] = None, filters: Optional[TransactionFilter] = None) -> list:
+        """
+        Obtiene una página de transacciones filtradas y ordenadas por la columna del
+        filtro (fecha descendente por defecto) e id, usando paginación por clave
+        (keyset) en lugar de OFFSET.
+
+        Args:
+            after (tuple, opcional): Clave de la última fila de la página anterior (ver page_key).
+            until (tuple, opcional): Clave de la última fila a incluir.
+            limit (int, opcional): Número máximo de filas.
+            filters (TransactionFilter, opcional): Criterios de filtrado y orden.
+
+        Returns:
+            list: Tuplas (id, fecha, descripción, monto, tipo, categoría).
+        """
+        conditions, params = self._filter_clause(filters)
+        sort_field, descending = self._sort_order(filters)
+        sort_column = self.STORAGE_COLUMNS[sort_field]
+        direction = "DESC" if descending else "ASC"
+        if after:
+            conditions.append(f"({sort_column}, id) {'<' if descending else '>'} (?, ?)")
+            params.extend(after)
+        if until:
+            conditions.append(f"({sort_column}, id) {'>=' if descending else '<='} (?, ?)")
+            params.extend(until)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        limit_clause = "LIMIT ?" if limit else ""
+        if limit:
+            params.append(limit)
+        try:
+            rows = self._query(f'''
+                SELECT id, day, description, amount_cents, type, category
+                FROM transactions {where}
+                ORDER BY {sort_column} {direction}, id {direction} {limit_clause}
+            ''', params)
+            return [(row[0], day_to_date(row[1]), row[2], from_cents(row[3]), row[4], row[5]) for row in rows]
+        except sqlite3.Error as e:
+            logger.error("Error al obtener la página de transacciones: %s", e)
             return []
 
+    def interrupt(self):
+        """Cancela la consulta en curso de esta conexión; se puede llamar desde otro hilo."""
+        try:
+            if self.conn:
+                self.conn.interrupt()
+        except sqlite3.ProgrammingError:
+            # La conexión ya se cerró; no hay consulta que cancelar
+            pass
+
     def get_transaction_by_id(self, transaction_id: int) -> Optional[Transaction]:
         """Obtiene una transacción por su ID."""
         try:
-            cursor = self.conn.cursor()
-            cursor.execute("SELECT * FROM transactions WHERE id = ?", (transaction_id,))
-            row = cursor.fetchone()
+            row = self._query("SELECT * FROM transactions WHERE id = ?", (transaction_id,), one=True)
             if row:
-                return Transaction(
-                    id=row['id'],
-                    date=row['date'],
-                    description=row['description'],
-                    amount=row['amount'],
-                    type=row['type'],
-                    category=row['category']
-                )
+                return self._to_transaction(row)
             return None
         except sqlite3.Error as e:
-            print(f"Error al obtener la transacción por ID: {e}")
+            logger.error("Error al obtener la transacción por ID: %s", e)
             return None
 
-    def update_transaction(self, transaction: Transaction):
-        """Actualiza una transacción existente en la base de datos."""
+    def update_transaction(self, transaction: Transaction, on_done=None):
+        """Actualiza una transacción existente en la base de datos (on_done como en add_transaction)."""
         try:
-            cursor = self.conn.cursor()
-            cursor.execute('''
-                UPDATE transactions
-                SET date = ?, description = ?, amount = ?, type = ?, category = ?
-                WHERE id = ?
-            ''', (transaction.date, transaction.description, transaction.amount,
-                  transaction.type, transaction.category, transaction.id))
-            self.conn.commit()
-            print(f"Transacción ID {transaction.id} actualizada correctamente.")
-        except sqlite3.Error as e:
-            print(f"Error al actualizar la transacción: {e}")
+            row = self._to_row(transaction)
+            if self._writer():
+                self._write_behind.submit(UPDATED, row, transaction.id, on_done)
+                return
+            self._write_now(UPDATED, row, transaction.id)
+            logger.debug("Transacción ID %s actualizada correctamente.", transaction.id)
+            self._acknowledge(on_done, None)
+        except (sqlite3.Error, ValueError) as e:
+            logger.error("Error al actualizar la transacción: %s", e)
+            self._acknowledge(on_done, str(e))
 
-    def delete_transaction(self, transaction_id: int):
-        """Borra una transacción de la base de datos por su ID."""
+    def delete_transaction(self, transaction_id: int, on_done=None):
+        """Borra una transacción de la base de datos por su ID (on_done como en add_transaction)."""
         try:
-            cursor = self.conn.cursor()
-            cursor.execute("DELETE FROM transactions WHERE id = ?", (transaction_id,))
-            self.conn.commit()
-            print(f"Transacción ID {transaction_id} borrada correctamente.")
+            if self._writer():
+                self._write_behind.submit(DELETED, None, transaction_id, on_done)
+                return
+            self._write_now(DELETED, None, transaction_id)
+            logger.debug("Transacción ID %s borrada correctamente.", transaction_id)
+            self._acknowledge(on_done, None)
         except sqlite3.Error as e:
-            print(f"Error al borrar la transacción: {e}")
+            logger.error("Error al borrar la transacción: %s", e)
+            self._acknowledge(on_done, str(e))
+
+    def enable_write_behind(self, max_batch_rows: int = 500, max_delay_ms: int = 50, notify=None):
+        """
+        Activa la escritura diferida: las altas, modificaciones y borrados se encolan
+        y un hilo escritor los confirma en lotes (ver database/write_behind.py).
+
+        Los resultados de cada lote (avisos de cambio y llamadas on_done) se entregan
+        en el hilo de este gestor con deliver_write_results. El escritor llama a
+        notify() desde su hilo tras cada lote, para que el dueño programe esa entrega.
+        """
+        if self._write_behind or self.read_only:
+            return
+        from database.write_behind import WriteBehindQueue
+
+        self._write_behind = WriteBehindQueue(self.db_path, max_batch_rows, max_delay_ms, notify=notify)
+
+    def _writer(self):
+        """
+        La cola de escritura diferida, o None si no hay. Si su hilo se detuvo, entrega
+        sus resultados fallidos y la desactiva: desde entonces se escribe al momento.
+        """
+        if self._write_behind and self._write_behind.failure:
+            logger.error("La escritura diferida se detuvo (%s); se vuelve a escribir al momento.",
+                         self._write_behind.failure)
+            self.deliver_write_results()
+            self._write_behind = None
+        return self._write_behind
+
+    def flush_writes(self):
+        """Espera a que se confirmen las escrituras encoladas y entrega sus resultados."""
+        if self._write_behind:
+            try:
+                self._write_behind.flush()
+            except sqlite3.Error as e:
+                logger.error("Error al esperar las escrituras diferidas: %s", e)
+            self.deliver_write_results()
+            self._writer()
+
+    def deliver_write_results(self) -> int:
+        """
+        Publica los cambios y llama a on_done de los lotes ya confirmados por el
+        escritor, en orden. Devuelve el número de lotes entregados.
+        """
+        if not self._write_behind:
+            return 0
+        delivered = 0
+        while True:
+            try:
+                batch = self._write_behind.completed.get_nowait()
+            except queue.Empty:
+                return delivered
+            self._deliver_batch(batch)
+            delivered += 1
+
+    def _deliver_batch(self, results: list):
+        for result in results:
+            if result.error:
+                logger.error("Error en la escritura diferida: %s", result.error)
+            elif result.written:
+                self._publish_change(result.kind, *result.written, result.previous_version, result.version)
+            self._acknowledge(result.on_done, result.error)
 
     def get_transaction_by_description(self, description: str) -> Optional[Transaction]:
         """Obtiene la transacción más reciente por su descripción."""
         try:
-            cursor = self.conn.cursor()
-            cursor.execute(
-                "SELECT * FROM transactions WHERE description = ? ORDER BY date DESC LIMIT 1",
-                (description,))
-            row = cursor.fetchone()
+            row = self._query("SELECT * FROM transactions WHERE description = ? ORDER BY day DESC LIMIT 1",
+                              (description,), one=True)
             if row:
-                return Transaction(
-                    id=row['id'],
-                    date=row['date'],
-                    description=row['description'],
-                    amount=row['amount'],
-                    type=row['type'],
-                    category=row['category']
-                )
+                return self._to_transaction(row)
             return None
         except sqlite3.Error as e:
-            print(f"Error al obtener la transacción por descripción: {e}")
+            logger.error("Error al obtener la transacción por descripción: %s", e)
             return None
 
     def get_all_unique_descriptions(self) -> list:
         """Obtiene todas las descripciones únicas de la base de datos, ordenadas alfabéticamente."""
         try:
-            cursor = self.conn.cursor()
-            cursor.execute("SELECT DISTINCT description FROM transactions ORDER BY description ASC")
-            rows = cursor.fetchall()
+            rows = self._query("SELECT description FROM descriptions ORDER BY description ASC")
             return [row[0] for row in rows]
         except sqlite3.Error as e:
-            print(f"Error al obtener las descripciones: {e}")
+            logger.error("Error al obtener las descripciones: %s", e)
             return []
 
+    def get_description_templates(self) -> list:
+        """
+        Obtiene cada descripción única con su frecuencia de uso y los datos de su
+        transacción más reciente, para autocompletar el formulario.
+
+        Returns:
+            list: Tuplas (descripción, usos, último día, monto, tipo, categoría).
+        """
+        try:
+            rows = self._query('''
+                SELECT d.description, d.uses, d.last_day, t.amount_cents, t.type, t.category
+                FROM descriptions d
+                JOIN transactions t ON t.id = (
+                    SELECT id FROM transactions
+                    WHERE description = d.description
+                    ORDER BY day DESC, id DESC LIMIT 1)
+            ''')
+            return [(row[0], row[1], row[2], from_cents(row[3]), row[4], row[5]) for row in rows]
+        except sqlite3.Error as e:
+            logger.error("Error al obtener las plantillas de descripciones: %s", e)
+            return []
+
+    def search_descriptions(self, text: str, limit: int = 20) -> list:
+        """
+        Busca descripciones únicas por palabras o prefijos de palabras, sin distinguir
+        acentos ni mayúsculas ("inversion" encuentra "Inversión"). Las más usadas primero.
+        """
+        fts_query = self._fts_query(text) if self.has_fts else ""
+        try:
+            if fts_query:
+                rows = self._query('''
+                    SELECT d.description
+                    FROM descriptions_fts JOIN descriptions d ON d.id = descriptions_fts.rowid
+                    WHERE descriptions_fts MATCH ?
+                    ORDER BY d.uses DESC, d.description
+                    LIMIT ?
+                ''', (fts_query, limit))
+            else:
+                rows = self._query(
+                    "SELECT description FROM descriptions WHERE description LIKE ? "
+                    "ORDER BY uses DESC, description LIMIT ?",
+                    (f"%{text.strip()}%", limit))
+            return [row[0] for row in rows]
+        except sqlite3.Error as e:
+            logger.error("Error al buscar descripciones: %s", e)
+            return []
+
+    def get_data_version(self) -> Optional[int]:
+        """
+        Devuelve un identificador que cambia cada vez que se modifican las transacciones.
+
+        Es el contador de la tabla data_changes, que los triggers suman en cada fila
+        añadida, modificada o borrada desde cualquier conexión. A diferencia de
+        PRAGMA data_version, todas las conexiones ven el mismo valor para el mismo
+        estado, y un cambio de una fila lo sube exactamente en uno.
+        """
+        try:
+            return self._query("SELECT version FROM data_changes WHERE id = 1", one=True)[0]
+        except (sqlite3.Error, TypeError) as e:
+            logger.error("Error al obtener la versión de los datos: %s", e)
+            return None
+
+    @contextmanager
+    def read_snapshot(self):
+        """
+        Hace que las consultas del bloque lean todas el mismo estado de la base de datos,
+        para que un resultado y la versión con la que se guarda no mezclen escrituras de
+        otras conexiones confirmadas entre medias. Dentro de una transacción no hace nada.
+        """
+        if self.conn is None or self.conn.in_transaction:
+            yield
+            return
+        self.conn.execute("BEGIN")
+        try:
+            yield
+        finally:
+            if self.conn.in_transaction:
+                self.conn.commit()
+
+    @staticmethod
+    def _date_range_clause(start_date: Optional[str], end_date: Optional[str]):
+        """
+        Construye la condición WHERE para un rango de fechas (ambos extremos incluidos).
+        Solo se filtra si se indican las dos fechas, igual que en el análisis financiero.
+        """
+        if start_date and end_date:
+            return "WHERE day BETWEEN ? AND ?", [date_to_day(start_date), date_to_day(end_date)]
+        return "", []
+
+    @staticmethod
+    def _day_range(start_date: Optional[str], end_date: Optional[str]):
+        """(primer día, último día) del rango, o (None, None) sin las dos fechas, como _date_range_clause."""
+        if start_date and end_date:
+            return date_to_day(start_date), date_to_day(end_date)
+        return None, None
+
+    @staticmethod
+    def _year_days(year: int):
+        return date_to_day(f"{year}-01-01"), date_to_day(f"{year}-12-31")
+
+    def archive_path(self, year: int) -> str:
+        """Ruta del archivo de un ejercicio cerrado, junto a esta base de datos."""
+        return locate_archive(self.db_path, year)
+
+    def get_archives(self) -> dict:
+        """Ejercicios cerrados: año -> ruta de su archivo. Se vuelven a leer si los datos cambiaron."""
+        version = self.get_data_version()
+        if self._archives is None or self._archives_version != version:
+            try:
+                rows = self._query("SELECT year, path FROM archives ORDER BY year")
+                self._archives = {year: locate_archive(self.db_path, year, path) for year, path in rows}
+            except sqlite3.Error as e:
+                logger.error("Error al leer los ejercicios cerrados: %s", e)
+                self._archives = {}
+            self._archives_version = version
+        return self._archives
+
+    def _archived_years(self, start_day: Optional[int], end_day: Optional[int]) -> list:
+        """Ejercicios cerrados que alcanza un rango de días (None = sin límite)."""
+        years = []
+        for year in self.get_archives():
+            first_day, last_day = self._year_days(year)
+            if (start_day is None or last_day >= start_day) and (end_day is None or first_day <= end_day):
+                years.append(year)
+        return years
+
+    def attach_archives(self, start_date: Optional[str] = None, end_date: Optional[str] = None):
+        """
+        Adjunta (ATTACH) los archivos de los ejercicios cerrados que alcanza el rango,
+        para consultar sus transacciones junto con las de esta base de datos. Dentro
+        de una transacción no se puede adjuntar y no hace nada: FinancialAnalytics lo
+        llama antes de abrir su instantánea de lectura.
+        """
+        if self.conn is None or self.conn.in_transaction:
+            return
+        try:
+            # Los que no caben se leen aparte (ver _transaction_sources); adjuntarlos soltaría los primeros
+            for year in self._archived_years(*self._day_range(start_date, end_date))[:MAX_ATTACHED_ARCHIVES]:
+                self._attach_archive(year)
+        except sqlite3.Error as e:
+            logger.error("Error al adjuntar los ejercicios cerrados: %s", e)
+
+    def _attach_archive(self, year: int, path: Optional[str] = None, pinned: Iterable[int] = ()) -> str:
+        """
+        Adjunta el archivo de un ejercicio si aún no lo está y devuelve su esquema. Para
+        hacer sitio suelta el usado hace más tiempo que no esté en pinned.
+        """
+        schema = f"archivo_{year}"
+        if year in self._attached_archives:
+            self._attached_archives.move_to_end(year)
+            return schema
+        path = path or self.get_archives()[year]
+        if not os.path.exists(path):
+            # ATTACH crearía un archivo vacío
+            raise sqlite3.OperationalError(f"No se encuentra el archivo del ejercicio {year}: {path}")
+        if self.conn.in_transaction:
+            raise sqlite3.OperationalError(f"El archivo del ejercicio {year} no se puede adjuntar en una transacción")
+        if len(self._attached_archives) >= MAX_ATTACHED_ARCHIVES:
+            oldest = next(attached for attached in self._attached_archives if attached not in pinned)
+            self.conn.execute(f"DETACH DATABASE {self._attached_archives.pop(oldest)}")
+        self.conn.execute(f"ATTACH DATABASE ? AS {schema}", (path,))
+        self._attached_archives[year] = schema
+        return schema
+
+    @contextmanager
+    def _transaction_sources(self, start_day: Optional[int] = None, end_day: Optional[int] = None):
+        """
+        Tablas con transacciones del rango, agrupadas por la conexión que las lee:
+        lista de (conexión, [tablas]) para consultar cada grupo con un solo UNION ALL.
+
+        El primer grupo es esta conexión, con transactions y los ejercicios cerrados
+        que caben adjuntos; ninguno se suelta mientras dura el bloque. Los que no caben
+        (más de MAX_ATTACHED_ARCHIVES, o los no adjuntos si ya hay una transacción
+        abierta, donde no se puede adjuntar) se leen cada uno con una conexión de solo
+        lectura propia, que se cierra al salir del bloque.
+        """
+        years = self._archived_years(start_day, end_day)
+        attached = [year for year in years if year in self._attached_archives][:MAX_ATTACHED_ARCHIVES]
+        pending = [year for year in years if year not in attached]
+        if not self.conn.in_transaction:
+            while pending and len(attached) < MAX_ATTACHED_ARCHIVES:
+                year = pending.pop(0)
+                self._attach_archive(year, pinned=attached)
+                attached.append(year)
+        for year in attached:
+            self._attached_archives.move_to_end(year)
+        groups = [(self.conn, ["transactions"] + [f"{self._attached_archives[year]}.transactions"
+                                                  for year in sorted(attached)])]
+        separate = []
+        try:
+            for year in pending:
+                path = self.get_archives()[year]
+                if not os.path.exists(path):
+                    raise sqlite3.OperationalError(f"No se encuentra el archivo del ejercicio {year}: {path}")
+                separate.append(open_connection(path, read_only=True))
+                groups.append((separate[-1], ["transactions"]))
+            yield groups
+        finally:
+            for conn in separate:
+                conn.close()
+
+    def _current_daily_ledger(self) -> DailyLedger:
+        """Sumas acumuladas por día, recargadas desde daily_totals si los datos cambiaron."""
+        with self.read_snapshot():
+            version = self.get_data_version()
+            if self._daily_ledger is None or self._daily_ledger_version != version:
+                ledger = DailyLedger()
+                with instrumentation.span("sql", "load_daily_ledger", sql="SELECT ... FROM daily_totals"):
+                    ledger.load(self.conn)
+                self._daily_ledger, self._daily_ledger_version = ledger, version
+        return self._daily_ledger
+
+    def _publish_change(self, kind: str, before: Optional[Transaction], after: Optional[Transaction],
+                        previous_version: Optional[int], version: Optional[int]):
+        """Actualiza las sumas acumuladas con una escritura propia y avisa a los suscriptores."""
+        change = TransactionChange(kind, before, after, previous_version, version)
+        self._update_daily_ledger(change)
+        self.changes.publish(change)
+
+    def _update_daily_ledger(self, change: TransactionChange):
+        """
+        Suma y resta en las sumas acumuladas los valores de un cambio propio. Si estaban
+        cargadas con otra versión (otra conexión escribió entretanto) o el día queda
+        fuera de los arreglos, se descartan y se recargan en la próxima consulta.
+        """
+        if self._daily_ledger is None:
+            return
+        if (change.previous_version is not None and self._daily_ledger_version == change.previous_version
+                and all(self._daily_ledger.apply(date_to_day(transaction.date), transaction.type,
+                                                 sign * to_cents(transaction.amount), sign)
+                        for transaction, sign in change.deltas())):
+            self._daily_ledger_version = change.version
+        else:
+            self._daily_ledger = None
+
+    def get_totals_by_type(self, start_date: Optional[str] = None, end_date: Optional[str] = None) -> dict:
+        """
+        Obtiene la suma de montos por tipo de transacción en un rango de fechas
+        con dos lecturas de las sumas acumuladas por día (ver database/daily_ledger.py).
+        """
+        try:
+            if start_date and end_date:
+                start_day, end_day = date_to_day(start_date), date_to_day(end_date)
+            else:
+                start_day = end_day = None
+            totals = self._current_daily_ledger().totals(start_day, end_day)
+            return {transaction_type: from_cents(total) for transaction_type, total in totals.items()}
+        except (sqlite3.Error, ValueError) as e:
+            logger.error("Error al obtener los totales por tipo: %s", e)
+            return {}
+
+    @staticmethod
+    def _month_range_clause(first_month: Optional[str], last_month: Optional[str]):
+        """Construye la condición WHERE sobre el resumen mensual para un rango de meses 'YYYY-MM'."""
+        if first_month and last_month:
+            return "WHERE month BETWEEN ? AND ?", [first_month, last_month]
+        return "", []
+
+    @staticmethod
+    def _split_month_range(start_date: Optional[str], end_date: Optional[str]):
+        """
+        Divide un rango de fechas en meses completos y fragmentos de mes en los extremos.
+
+        Returns:
+            tuple: ((primer_mes, último_mes) o None, lista de rangos (inicio, fin) parciales).
+                   Sin rango de fechas se devuelve (None, None), que abarca todos los meses.
+        """
+        if not (start_date and end_date):
+            return (None, None), []
+        try:
+            start = datetime.strptime(start_date, '%Y-%m-%d').date()
+            end = datetime.strptime(end_date, '%Y-%m-%d').date()
+        except ValueError:
+            return None, [(start_date, end_date)]
+        if start > end:
+            return None, [(start_date, end_date)]
+
+        # Primer día del primer mes completo y primer día del mes siguiente al último completo
+        first_full = start if start.day == 1 else (start.replace(day=1) + timedelta(days=32)).replace(day=1)
+        end_is_month_end = (end + timedelta(days=1)).day == 1
+        after_last_full = (end + timedelta(days=1)) if end_is_month_end else end.replace(day=1)
+        if first_full >= after_last_full:
+            return None, [(start_date, end_date)]
+
+        edges = []
+        if start < first_full:
+            edges.append((start_date, (first_full - timedelta(days=1)).isoformat()))
+        if after_last_full <= end:
+            edges.append((after_last_full.isoformat(), end_date))
+        last_full = after_last_full - timedelta(days=1)
+        return (first_full.strftime('%Y-%m'), last_full.strftime('%Y-%m')), edges
+
+    def get_monthly_totals(self, start_date: Optional[str] = None, end_date: Optional[str] = None) -> list:
+        """
+        Obtiene la suma de montos por mes y tipo en un rango de fechas.
+        Los meses completos se leen del resumen mensual y los extremos parciales de
+        las sumas acumuladas por día.
+
+        Returns:
+            list: Tuplas (mes 'YYYY-MM', tipo, total) ordenadas por mes.
+        """
+        full_months, edges = self._split_month_range(start_date, end_date)
+        try:
+            rows = []
+            if full_months:
+                where, params = self._month_range_clause(*full_months)
+                rows.extend(self._query(f'''
+                    SELECT month, type, SUM(total_cents)
+                    FROM month_totals {where}
+                    GROUP BY month, type
+                ''', params))
+            if edges:
+                ledger = self._current_daily_ledger()
+            for edge_start, edge_end in edges:
+                for month, month_start, month_end in self._month_pieces(date_to_day(edge_start),
+                                                                        date_to_day(edge_end)):
+                    rows.extend((month, transaction_type, total)
+                                for transaction_type, total in ledger.totals(month_start, month_end).items())
+            return sorted((month, transaction_type, from_cents(total)) for month, transaction_type, total in rows)
+        except (sqlite3.Error, ValueError) as e:
+            logger.error("Error al obtener los totales mensuales: %s", e)
+            return []
+
+    @staticmethod
+    def _month_pieces(start_day: int, end_day: int):
+        """Divide un rango de días en tramos de un mismo mes: (mes 'YYYY-MM', primer día, último día)."""
+        day = start_day
+        while day <= end_day:
+            current = date.fromordinal(day + EPOCH_ORDINAL)
+            next_month = (current.replace(day=28) + timedelta(days=4)).replace(day=1)
+            piece_end = min(next_month.toordinal() - EPOCH_ORDINAL - 1, end_day)
+            yield current.strftime('%Y-%m'), day, piece_end
+            day = piece_end + 1
+
+    def get_category_totals(self, transaction_type: str, start_date: Optional[str] = None,
+                            end_date: Optional[str] = None) -> list:
+        """
+        Obtiene la suma de montos por categoría para un tipo de transacción.
+        Usa el resumen mensual para los meses completos del rango; los extremos
+        que caen en ejercicios cerrados se leen de sus archivos.
+
+        Returns:
+            list: Tuplas (categoría, total) ordenadas por categoría.
+        """
+        full_months, edges = self._split_month_range(start_date, end_date)
+        try:
+            totals = {}
+            if full_months:
+                where, params = self._month_range_clause(*full_months)
+                where = f"{where} AND type = ?" if where else "WHERE type = ?"
+                rows = self._query(
+                    f"SELECT category, SUM(total_cents) FROM month_totals {where} GROUP BY category",
+                    params + [transaction_type])
+                for category, total in rows:
+                    totals[category] = totals.get(category, 0) + total
+            for edge_start, edge_end in edges:
+                edge_days = (date_to_day(edge_start), date_to_day(edge_end))
+                with self._transaction_sources(*edge_days) as groups:
+                    for conn, sources in groups:
+                        for source in sources:
+                            rows = self._query(f'''
+                                SELECT category, SUM(amount_cents) FROM {source}
+                                WHERE type = ? AND day BETWEEN ? AND ?
+                                GROUP BY category
+                            ''', (transaction_type, *edge_days), cursor=conn.cursor())
+                            for category, total in rows:
+                                totals[category] = totals.get(category, 0) + total
+            return sorted((category, from_cents(total)) for category, total in totals.items())
+        except (sqlite3.Error, ValueError) as e:
+            logger.error("Error al obtener los totales por categoría: %s", e)
+            return []
+
+    def rebuild_rollup(self):
+        """Recalcula el resumen mensual por tipo y categoría y los totales diarios desde las transacciones."""
+        self.flush_writes()
+        try:
+            cursor = self.conn.cursor()
+            for statement in ROLLUP_REBUILD + DAILY_LEDGER_REBUILD:
+                self._execute(statement, cursor=cursor)
+            # Los totales pueden cambiar sin tocar las transacciones: los resultados guardados dejan de valer
+            self._execute("UPDATE data_changes SET version = version + 1 WHERE id = 1", cursor=cursor)
+            self.conn.commit()
+            self._daily_ledger = None
+            logger.info("Resumen mensual recalculado correctamente.")
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            logger.error("Error al recalcular el resumen mensual: %s", e)
+
+    def close_fiscal_year(self, year: int, vacuum: bool = False) -> int:
+        """
+        Cierra un ejercicio: mueve sus transacciones a un archivo propio (ARCHIVE_NAME,
+        junto a la base de datos) y deja aquí solo sus totales por mes y por día, que
+        siguen sumando en los resúmenes y en el libro diario. Las consultas que llegan
+        a ese año adjuntan el archivo y leen sus transacciones de allí.
+
+        Primero se copian las filas al archivo y se comprueba que están todas; solo
+        entonces se borran de aquí, en otra transacción. Si se interrumpe entre las dos,
+        volver a cerrar el año continúa donde quedó. Mientras el año no figure en
+        archives, su archivo se rehace con las filas de aquí: uno que quedó de antes
+        (p. ej. tras restaurar una copia anterior al cierre) no añade filas viejas.
+
+        Las copias de seguridad (database/backup.py) incluyen los archivos de los
+        ejercicios cerrados junto con la base de datos.
+
+        Args:
+            year (int): Año a cerrar; tiene que ser anterior al actual.
+            vacuum (bool): Compacta después la base de datos para devolver el espacio al disco.
+
+        Returns:
+            int: Transacciones movidas al archivo.
+
+        Raises:
+            sqlite3.Error, OSError: Si no se pudo escribir el archivo o la base de datos.
+            ValueError: Si el año no está cerrado o la copia en el archivo no coincide.
+        """
+        if year >= date.today().year:
+            raise ValueError(f"El ejercicio {year} aún no ha terminado.")
+        self.flush_writes()
+        started = time.perf_counter()
+        already_closed = year in self.get_archives()
+        path = self.get_archives().get(year) or self.archive_path(year)
+        if not os.path.exists(path):
+            # El archivo tiene el esquema completo: se puede abrir por sí solo como una base de datos más
+            DBManager(path).close()
+        schema = self._attach_archive(year, path)
+        self.conn.execute(f"PRAGMA {schema}.synchronous = FULL")
+        first_day, last_day = self._year_days(year)
+        columns = "id, day, description, amount_cents, type, category"
+        cursor = self.conn.cursor()
+        try:
+            self.conn.execute("BEGIN IMMEDIATE")
+            if not already_closed:
+                self._execute(f"DELETE FROM {schema}.transactions", cursor=cursor)
+            self._execute(f'''
+                INSERT OR IGNORE INTO {schema}.transactions ({columns})
+                SELECT {columns} FROM main.transactions WHERE day BETWEEN ? AND ?
+            ''', (first_day, last_day), cursor=cursor)
+            missing = self._query(f'''
+                SELECT COUNT(*) FROM main.transactions t
+                WHERE t.day BETWEEN ? AND ? AND NOT EXISTS (
+                    SELECT 1 FROM {schema}.transactions a
+                    WHERE a.id = t.id AND a.day = t.day AND a.description = t.description
+                      AND a.amount_cents = t.amount_cents AND a.type = t.type AND a.category = t.category)
+            ''', (first_day, last_day), cursor=cursor, one=True)[0]
+            if missing:
+                raise ValueError(f"{missing} transacciones de {year} no coinciden con las del archivo {path}.")
+            self.conn.commit()
+
+            self.conn.execute("BEGIN IMMEDIATE")
+            self._execute('''
+                INSERT INTO archive_month_totals (month, type, category, total_cents, count)
+                SELECT strftime('%Y-%m', day * 86400, 'unixepoch'), type, category, SUM(amount_cents), COUNT(*)
+                FROM main.transactions WHERE day BETWEEN ? AND ?
+                GROUP BY 1, type, category
+                ON CONFLICT (month, type, category) DO UPDATE
+                SET total_cents = total_cents + excluded.total_cents, count = count + excluded.count
+            ''', (first_day, last_day), cursor=cursor)
+            self._execute('''
+                INSERT INTO archive_daily_totals (day, type, total_cents, count)
+                SELECT day, type, SUM(amount_cents), COUNT(*)
+                FROM main.transactions WHERE day BETWEEN ? AND ?
+                GROUP BY day, type
+                ON CONFLICT (day, type) DO UPDATE
+                SET total_cents = total_cents + excluded.total_cents, count = count + excluded.count
+            ''', (first_day, last_day), cursor=cursor)
+            moved = self._execute("DELETE FROM main.transactions WHERE day BETWEEN ? AND ?",
+                                  (first_day, last_day), cursor=cursor)
+            self._execute('''
+                INSERT INTO archives (year, path, rows, closed_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT (year) DO UPDATE
+                SET path = excluded.path, rows = rows + excluded.rows, closed_at = excluded.closed_at
+            ''', (year, path, moved, datetime.now().isoformat(timespec="seconds")), cursor=cursor)
+            self.conn.commit()
+        except (sqlite3.Error, ValueError):
+            self.conn.rollback()
+            raise
+        finally:
+            self._daily_ledger = None
+            self._archives = None
+
+        logger.info("Ejercicio %s cerrado: %d transacciones movidas a %s en %.2f s.",
+                    year, moved, path, time.perf_counter() - started)
+        if vacuum:
+            self._execute("VACUUM main")
+        return moved
+
+    def create_snapshot(self, path: str) -> bool:
+        """
+        Copia la base de datos a otro archivo con la API de copia en línea de SQLite.
+        La copia es coherente aunque haya escrituras en curso y queda sin WAL, lista
+        para abrirse en solo lectura desde varios procesos. Incluye las escrituras diferidas pendientes.
+
+        Los archivos de los ejercicios cerrados se copian también, junto a la copia, y
+        su tabla archives apunta a esas copias: la instantánea no depende de los
+        archivos en uso, que pueden cambiar si se cierra un ejercicio mientras se lee.
+        """
+        self.flush_writes()
+        try:
+            snapshot = sqlite3.connect(path)
+            try:
+                with instrumentation.span("sql", "create_snapshot", sql="backup"):
+                    self.conn.backup(snapshot)
+                snapshot.execute("PRAGMA journal_mode = DELETE")
+                self._snapshot_archives(snapshot, path)
+            finally:
+                snapshot.close()
+            return True
+        except sqlite3.Error as e:
+            logger.error("Error al copiar la base de datos: %s", e)
+            return False
+
+    def _snapshot_archives(self, snapshot: sqlite3.Connection, path: str):
+        """Copia los ejercicios cerrados que registra una instantánea junto a ella y la apunta a las copias."""
+        try:
+            archives = snapshot.execute("SELECT year, path, rows FROM archives").fetchall()
+        except sqlite3.OperationalError:
+            # Instantánea de un esquema anterior a los ejercicios cerrados
+            return
+        stem = os.path.splitext(path)[0]
+        for year, stored_path, rows in archives:
+            archive_path = locate_archive(self.db_path, year, stored_path)
+            copy_path = f"{stem}_{ARCHIVE_NAME.format(year=year)}"
+            source = open_connection(archive_path, read_only=True)
+            target = sqlite3.connect(copy_path)
+            try:
+                with instrumentation.span("sql", "create_snapshot", sql="backup", year=year):
+                    source.backup(target)
+                target.execute("PRAGMA journal_mode = DELETE")
+                copied_rows = target.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+            finally:
+                target.close()
+                source.close()
+            if copied_rows != rows:
+                # Un cierre simultáneo movió filas después de la copia de la base de datos
+                raise sqlite3.OperationalError(f"El archivo del ejercicio {year} tiene {copied_rows} transacciones "
+                                               f"y la instantánea registra {rows}.")
+            snapshot.execute("UPDATE archives SET path = ? WHERE year = ?", (os.path.abspath(copy_path), year))
+        snapshot.commit()
+
     def close(self):
-        """Cierra la conexión a la base de datos."""
+        """Cierra la conexión a la base de datos, tras confirmar las escrituras diferidas pendientes."""
+        if self._write_behind:
+            self._write_behind.close()
+            self.deliver_write_results()
+            self._write_behind = None
         if self.conn:
             self.conn.close()
-            print("Conexión a la base de datos cerrada.")
+            logger.debug("Conexión a la base de datos cerrada.")
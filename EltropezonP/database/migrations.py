@@ -0,0 +1,656 @@
+# database/migrations.py
+
+import logging
+import sqlite3
+
+logger = logging.getLogger(__name__)
+
+# Recalcula el resumen mensual por tipo y categoría a partir de las transacciones.
+ROLLUP_REBUILD = [
+    "DELETE FROM rollup_month_type_category",
+    '''
+    INSERT INTO rollup_month_type_category (month, type, category, total_cents, count)
+    SELECT strftime('%Y-%m', day * 86400, 'unixepoch'), type, category, SUM(amount_cents), COUNT(*)
+    FROM transactions
+    GROUP BY 1, 2, 3
+    ''',
+]
+
+# Recalcula el total diario por tipo (índice de sumas acumuladas, ver database/daily_ledger.py).
+DAILY_LEDGER_REBUILD = [
+    "DELETE FROM daily_ledger",
+    '''
+    INSERT INTO daily_ledger (day, type, total_cents, count)
+    SELECT day, type, SUM(amount_cents), COUNT(*)
+    FROM transactions
+    GROUP BY day, type
+    ''',
+]
+
+# Transacciones en días desde 1970-01-01: julianday('1970-01-01') = 2440587.5
+SQL_DAY_FROM_DATE = "CAST(julianday({}) - 2440587.5 AS INTEGER)"
+
+# Filas copiadas por lote en las migraciones que se pueden reanudar
+MIGRATION_BATCH_SIZE = 50000
+
+FTS_TOKENIZER = "unicode61 remove_diacritics 2"
+
+
+def fts5_available(conn: sqlite3.Connection) -> bool:
+    """Indica si la versión de SQLite incluye el módulo FTS5."""
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)")
+        conn.execute("DROP TABLE temp.fts5_probe")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def _create_descriptions_fts(conn: sqlite3.Connection):
+    """
+    Crea el índice de texto completo sobre las descripciones, sincronizado con triggers.
+    Sin FTS5 no se crea y las búsquedas usan LIKE sobre la tabla de descripciones.
+    """
+    if not fts5_available(conn):
+        logger.warning("SQLite no incluye FTS5; la búsqueda de descripciones usará LIKE.")
+        return
+    for statement in [
+        # Sin acentos: "inversion" encuentra "Inversión"; índices de prefijo para el autocompletado
+        f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS descriptions_fts USING fts5(
+            description, content='descriptions', content_rowid='id',
+            tokenize='{FTS_TOKENIZER}', prefix='1 2 3'
+        )
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_descriptions_fts_insert AFTER INSERT ON descriptions
+        BEGIN
+            INSERT INTO descriptions_fts (rowid, description) VALUES (NEW.id, NEW.description);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_descriptions_fts_delete AFTER DELETE ON descriptions
+        BEGIN
+            INSERT INTO descriptions_fts (descriptions_fts, rowid, description)
+            VALUES ('delete', OLD.id, OLD.description);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_descriptions_fts_update AFTER UPDATE OF description ON descriptions
+        BEGIN
+            INSERT INTO descriptions_fts (descriptions_fts, rowid, description)
+            VALUES ('delete', OLD.id, OLD.description);
+            INSERT INTO descriptions_fts (rowid, description) VALUES (NEW.id, NEW.description);
+        END
+        ''',
+        "INSERT INTO descriptions_fts (descriptions_fts) VALUES ('rebuild')",
+    ]:
+        conn.execute(statement)
+
+
+def _copy_transactions_to_cents_and_days(conn: sqlite3.Connection):
+    """
+    Copia las transacciones a la tabla con montos en céntimos y fechas como número de día.
+
+    La copia se hace por lotes de ids crecientes y cada lote se confirma por separado,
+    así una base de datos grande no queda bloqueada en una sola transacción y, si el
+    proceso se interrumpe, la siguiente ejecución continúa desde el último id copiado.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS transactions_v7 (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            day INTEGER NOT NULL,
+            description TEXT NOT NULL,
+            amount_cents INTEGER NOT NULL,
+            type TEXT NOT NULL,
+            category TEXT NOT NULL
+        )
+    ''')
+    conn.commit()
+
+    last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM transactions_v7").fetchone()[0]
+    pending = conn.execute("SELECT COUNT(*) FROM transactions WHERE id > ?", (last_id,)).fetchone()[0]
+    copied = 0
+    while True:
+        cursor = conn.execute(f'''
+            INSERT INTO transactions_v7 (id, day, description, amount_cents, type, category)
+            SELECT id, {SQL_DAY_FROM_DATE.format("date")}, description, CAST(ROUND(amount * 100) AS INTEGER),
+                   type, category
+            FROM transactions WHERE id > ? ORDER BY id LIMIT ?
+        ''', (last_id, MIGRATION_BATCH_SIZE))
+        conn.commit()
+        if cursor.rowcount <= 0:
+            break
+        copied += cursor.rowcount
+        last_id = conn.execute("SELECT MAX(id) FROM transactions_v7").fetchone()[0]
+        logger.info("Convirtiendo transacciones a céntimos: %s de %s.", copied, pending)
+
+
+# Índices, resumen mensual y descripciones sobre la tabla de transacciones en céntimos y días
+_CENTS_AND_DAYS_SCHEMA = [
+    "DROP TABLE transactions",
+    "ALTER TABLE transactions_v7 RENAME TO transactions",
+    # Rangos de días y totales por tipo (cubre day, type y amount_cents)
+    "CREATE INDEX idx_transactions_day_type_amount ON transactions (day, type, amount_cents)",
+    # Autocompletado y búsqueda de la transacción más reciente por descripción
+    "CREATE INDEX idx_transactions_description_day ON transactions (description, day)",
+    # Totales por categoría de un tipo en un rango de días
+    "CREATE INDEX idx_transactions_type_day_category ON transactions (type, day, category, amount_cents)",
+    # Orden del visor por (columna, id)
+    "CREATE INDEX idx_transactions_day ON transactions (day)",
+    "CREATE INDEX idx_transactions_description ON transactions (description)",
+    "CREATE INDEX idx_transactions_amount_cents ON transactions (amount_cents)",
+    "CREATE INDEX idx_transactions_type ON transactions (type)",
+    "CREATE INDEX idx_transactions_category ON transactions (category)",
+
+    "DROP TABLE rollup_month_type_category",
+    '''
+    CREATE TABLE rollup_month_type_category (
+        month TEXT NOT NULL,
+        type TEXT NOT NULL,
+        category TEXT NOT NULL,
+        total_cents INTEGER NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (month, type, category)
+    ) WITHOUT ROWID
+    ''',
+    '''
+    CREATE TRIGGER trg_rollup_insert AFTER INSERT ON transactions
+    BEGIN
+        INSERT INTO rollup_month_type_category (month, type, category, total_cents, count)
+        VALUES (strftime('%Y-%m', NEW.day * 86400, 'unixepoch'), NEW.type, NEW.category, NEW.amount_cents, 1)
+        ON CONFLICT (month, type, category)
+        DO UPDATE SET total_cents = total_cents + excluded.total_cents, count = count + 1;
+    END
+    ''',
+    '''
+    CREATE TRIGGER trg_rollup_delete AFTER DELETE ON transactions
+    BEGIN
+        UPDATE rollup_month_type_category
+        SET total_cents = total_cents - OLD.amount_cents, count = count - 1
+        WHERE month = strftime('%Y-%m', OLD.day * 86400, 'unixepoch') AND type = OLD.type
+          AND category = OLD.category;
+        DELETE FROM rollup_month_type_category
+        WHERE month = strftime('%Y-%m', OLD.day * 86400, 'unixepoch') AND type = OLD.type
+          AND category = OLD.category AND count <= 0;
+    END
+    ''',
+    '''
+    CREATE TRIGGER trg_rollup_update AFTER UPDATE OF day, amount_cents, type, category ON transactions
+    BEGIN
+        UPDATE rollup_month_type_category
+        SET total_cents = total_cents - OLD.amount_cents, count = count - 1
+        WHERE month = strftime('%Y-%m', OLD.day * 86400, 'unixepoch') AND type = OLD.type
+          AND category = OLD.category;
+        DELETE FROM rollup_month_type_category
+        WHERE month = strftime('%Y-%m', OLD.day * 86400, 'unixepoch') AND type = OLD.type
+          AND category = OLD.category AND count <= 0;
+        INSERT INTO rollup_month_type_category (month, type, category, total_cents, count)
+        VALUES (strftime('%Y-%m', NEW.day * 86400, 'unixepoch'), NEW.type, NEW.category, NEW.amount_cents, 1)
+        ON CONFLICT (month, type, category)
+        DO UPDATE SET total_cents = total_cents + excluded.total_cents, count = count + 1;
+    END
+    ''',
+    *ROLLUP_REBUILD,
+
+    # Las descripciones conservan su id (que es el rowid del índice de texto completo)
+    '''
+    CREATE TABLE descriptions_v7 (
+        id INTEGER PRIMARY KEY,
+        description TEXT NOT NULL UNIQUE,
+        uses INTEGER NOT NULL,
+        last_day INTEGER NOT NULL
+    )
+    ''',
+    '''
+    INSERT INTO descriptions_v7 (id, description, uses, last_day)
+    SELECT d.id, d.description, d.uses,
+           COALESCE((SELECT MAX(t.day) FROM transactions t WHERE t.description = d.description), 0)
+    FROM descriptions d
+    ''',
+    "DROP TABLE descriptions",
+    "ALTER TABLE descriptions_v7 RENAME TO descriptions",
+    '''
+    CREATE TRIGGER trg_descriptions_insert AFTER INSERT ON transactions
+    BEGIN
+        INSERT INTO descriptions (description, uses, last_day) VALUES (NEW.description, 1, NEW.day)
+        ON CONFLICT (description)
+        DO UPDATE SET uses = uses + 1, last_day = max(last_day, excluded.last_day);
+    END
+    ''',
+    '''
+    CREATE TRIGGER trg_descriptions_delete AFTER DELETE ON transactions
+    BEGIN
+        UPDATE descriptions
+        SET uses = uses - 1,
+            last_day = COALESCE((SELECT MAX(day) FROM transactions WHERE description = OLD.description), last_day)
+        WHERE description = OLD.description;
+        DELETE FROM descriptions WHERE description = OLD.description AND uses <= 0;
+    END
+    ''',
+    '''
+    CREATE TRIGGER trg_descriptions_update AFTER UPDATE OF description, day ON transactions
+    BEGIN
+        UPDATE descriptions
+        SET uses = uses - 1,
+            last_day = COALESCE((SELECT MAX(day) FROM transactions WHERE description = OLD.description), last_day)
+        WHERE description = OLD.description;
+        DELETE FROM descriptions WHERE description = OLD.description AND uses <= 0;
+        INSERT INTO descriptions (description, uses, last_day) VALUES (NEW.description, 1, NEW.day)
+        ON CONFLICT (description)
+        DO UPDATE SET uses = uses + 1, last_day = max(last_day, excluded.last_day);
+    END
+    ''',
+    # Los triggers del índice de texto completo estaban sobre la tabla anterior
+    _create_descriptions_fts,
+]
+
+# Migraciones del esquema en orden. Cada una es (versión, descripción, pasos). Un paso es
+# una sentencia SQL o una función que recibe la conexión.
+# La versión aplicada se guarda en PRAGMA user_version, así cada migración se ejecuta una sola vez.
+MIGRATIONS = [
+    (1, "Tabla de transacciones", [
+        '''
+        CREATE TABLE IF NOT EXISTS transactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT NOT NULL,
+            description TEXT NOT NULL,
+            amount REAL NOT NULL,
+            type TEXT NOT NULL,
+            category TEXT NOT NULL
+        )
+        ''',
+    ]),
+    (2, "Índices para fecha, tipo, descripción y categoría", [
+        # Rangos de fechas y totales por tipo (cubre date, type y amount)
+        "CREATE INDEX IF NOT EXISTS idx_transactions_date_type_amount ON transactions (date, type, amount)",
+        # Autocompletado y búsqueda de la transacción más reciente por descripción
+        "CREATE INDEX IF NOT EXISTS idx_transactions_description_date ON transactions (description, date)",
+        # Totales por categoría de un tipo en un rango de fechas
+        "CREATE INDEX IF NOT EXISTS idx_transactions_type_date_category "
+        "ON transactions (type, date, category, amount)",
+    ]),
+    (3, "Resumen mensual por tipo y categoría mantenido con triggers", [
+        '''
+        CREATE TABLE IF NOT EXISTS rollup_month_type_category (
+            month TEXT NOT NULL,
+            type TEXT NOT NULL,
+            category TEXT NOT NULL,
+            total REAL NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (month, type, category)
+        ) WITHOUT ROWID
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_insert AFTER INSERT ON transactions
+        BEGIN
+            INSERT INTO rollup_month_type_category (month, type, category, total, count)
+            VALUES (strftime('%Y-%m', NEW.date), NEW.type, NEW.category, NEW.amount, 1)
+            ON CONFLICT (month, type, category)
+            DO UPDATE SET total = total + excluded.total, count = count + 1;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_delete AFTER DELETE ON transactions
+        BEGIN
+            UPDATE rollup_month_type_category
+            SET total = total - OLD.amount, count = count - 1
+            WHERE month = strftime('%Y-%m', OLD.date) AND type = OLD.type AND category = OLD.category;
+            DELETE FROM rollup_month_type_category
+            WHERE month = strftime('%Y-%m', OLD.date) AND type = OLD.type AND category = OLD.category
+              AND count <= 0;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_update AFTER UPDATE OF date, amount, type, category ON transactions
+        BEGIN
+            UPDATE rollup_month_type_category
+            SET total = total - OLD.amount, count = count - 1
+            WHERE month = strftime('%Y-%m', OLD.date) AND type = OLD.type AND category = OLD.category;
+            DELETE FROM rollup_month_type_category
+            WHERE month = strftime('%Y-%m', OLD.date) AND type = OLD.type AND category = OLD.category
+              AND count <= 0;
+            INSERT INTO rollup_month_type_category (month, type, category, total, count)
+            VALUES (strftime('%Y-%m', NEW.date), NEW.type, NEW.category, NEW.amount, 1)
+            ON CONFLICT (month, type, category)
+            DO UPDATE SET total = total + excluded.total, count = count + 1;
+        END
+        ''',
+        '''
+        INSERT INTO rollup_month_type_category (month, type, category, total, count)
+        SELECT strftime('%Y-%m', date), type, category, SUM(amount), COUNT(*)
+        FROM transactions
+        GROUP BY 1, 2, 3
+        ''',
+    ]),
+    (4, "Índice por fecha e id para la paginación del visor", [
+        # El índice incluye el rowid, así que también ordena por (date, id)
+        "CREATE INDEX IF NOT EXISTS idx_transactions_date_id ON transactions (date)",
+    ]),
+    (5, "Índices para ordenar el visor por cualquier columna", [
+        # Igual que el de fecha, cada índice incluye el rowid y ordena por (columna, id)
+        "CREATE INDEX IF NOT EXISTS idx_transactions_description ON transactions (description)",
+        "CREATE INDEX IF NOT EXISTS idx_transactions_amount ON transactions (amount)",
+        "CREATE INDEX IF NOT EXISTS idx_transactions_type ON transactions (type)",
+        "CREATE INDEX IF NOT EXISTS idx_transactions_category ON transactions (category)",
+    ]),
+    (6, "Descripciones únicas con índice de texto completo", [
+        '''
+        CREATE TABLE IF NOT EXISTS descriptions (
+            id INTEGER PRIMARY KEY,
+            description TEXT NOT NULL UNIQUE,
+            uses INTEGER NOT NULL,
+            last_date TEXT NOT NULL
+        )
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_descriptions_insert AFTER INSERT ON transactions
+        BEGIN
+            INSERT INTO descriptions (description, uses, last_date) VALUES (NEW.description, 1, NEW.date)
+            ON CONFLICT (description)
+            DO UPDATE SET uses = uses + 1, last_date = max(last_date, excluded.last_date);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_descriptions_delete AFTER DELETE ON transactions
+        BEGIN
+            UPDATE descriptions
+            SET uses = uses - 1,
+                last_date = COALESCE((SELECT MAX(date) FROM transactions WHERE description = OLD.description),
+                                     last_date)
+            WHERE description = OLD.description;
+            DELETE FROM descriptions WHERE description = OLD.description AND uses <= 0;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_descriptions_update AFTER UPDATE OF description, date ON transactions
+        BEGIN
+            UPDATE descriptions
+            SET uses = uses - 1,
+                last_date = COALESCE((SELECT MAX(date) FROM transactions WHERE description = OLD.description),
+                                     last_date)
+            WHERE description = OLD.description;
+            DELETE FROM descriptions WHERE description = OLD.description AND uses <= 0;
+            INSERT INTO descriptions (description, uses, last_date) VALUES (NEW.description, 1, NEW.date)
+            ON CONFLICT (description)
+            DO UPDATE SET uses = uses + 1, last_date = max(last_date, excluded.last_date);
+        END
+        ''',
+        '''
+        INSERT OR IGNORE INTO descriptions (description, uses, last_date)
+        SELECT description, COUNT(*), MAX(date) FROM transactions GROUP BY description
+        ''',
+        _create_descriptions_fts,
+    ]),
+    (7, "Montos en céntimos enteros y fechas como número de día", _CENTS_AND_DAYS_SCHEMA),
+    (8, "Totales diarios por tipo para las sumas acumuladas", [
+        '''
+        CREATE TABLE IF NOT EXISTS daily_ledger (
+            day INTEGER NOT NULL,
+            type TEXT NOT NULL,
+            total_cents INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (day, type)
+        ) WITHOUT ROWID
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_daily_ledger_insert AFTER INSERT ON transactions
+        BEGIN
+            INSERT INTO daily_ledger (day, type, total_cents, count)
+            VALUES (NEW.day, NEW.type, NEW.amount_cents, 1)
+            ON CONFLICT (day, type)
+            DO UPDATE SET total_cents = total_cents + excluded.total_cents, count = count + 1;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_daily_ledger_delete AFTER DELETE ON transactions
+        BEGIN
+            UPDATE daily_ledger
+            SET total_cents = total_cents - OLD.amount_cents, count = count - 1
+            WHERE day = OLD.day AND type = OLD.type;
+            DELETE FROM daily_ledger WHERE day = OLD.day AND type = OLD.type AND count <= 0;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_daily_ledger_update AFTER UPDATE OF day, amount_cents, type ON transactions
+        BEGIN
+            UPDATE daily_ledger
+            SET total_cents = total_cents - OLD.amount_cents, count = count - 1
+            WHERE day = OLD.day AND type = OLD.type;
+            DELETE FROM daily_ledger WHERE day = OLD.day AND type = OLD.type AND count <= 0;
+            INSERT INTO daily_ledger (day, type, total_cents, count)
+            VALUES (NEW.day, NEW.type, NEW.amount_cents, 1)
+            ON CONFLICT (day, type)
+            DO UPDATE SET total_cents = total_cents + excluded.total_cents, count = count + 1;
+        END
+        ''',
+        *DAILY_LEDGER_REBUILD,
+    ]),
+    (9, "Contador de cambios en las transacciones para la versión de los datos", [
+        '''
+        CREATE TABLE IF NOT EXISTS data_changes (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL
+        )
+        ''',
+        "INSERT OR IGNORE INTO data_changes (id, version) VALUES (1, 0)",
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_data_changes_insert AFTER INSERT ON transactions
+        BEGIN
+            UPDATE data_changes SET version = version + 1 WHERE id = 1;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_data_changes_delete AFTER DELETE ON transactions
+        BEGIN
+            UPDATE data_changes SET version = version + 1 WHERE id = 1;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_data_changes_update AFTER UPDATE ON transactions
+        BEGIN
+            UPDATE data_changes SET version = version + 1 WHERE id = 1;
+        END
+        ''',
+    ]),
+    (10, "Ejercicios cerrados: registro de archivos y totales de los años archivados", [
+        '''
+        CREATE TABLE IF NOT EXISTS archives (
+            year INTEGER PRIMARY KEY,
+            path TEXT NOT NULL,
+            rows INTEGER NOT NULL,
+            closed_at TEXT NOT NULL
+        )
+        ''',
+        # Lo que queda en la base de datos de las transacciones archivadas, para responder sin abrir el archivo
+        '''
+        CREATE TABLE IF NOT EXISTS archive_month_totals (
+            month TEXT NOT NULL,
+            type TEXT NOT NULL,
+            category TEXT NOT NULL,
+            total_cents INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (month, type, category)
+        ) WITHOUT ROWID
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS archive_daily_totals (
+            day INTEGER NOT NULL,
+            type TEXT NOT NULL,
+            total_cents INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (day, type)
+        ) WITHOUT ROWID
+        ''',
+        # Totales de las transacciones en curso y de las archivadas; un mes o día puede estar en las dos
+        '''
+        CREATE VIEW IF NOT EXISTS month_totals AS
+        SELECT month, type, category, total_cents, count FROM rollup_month_type_category
+        UNION ALL
+        SELECT month, type, category, total_cents, count FROM archive_month_totals
+        ''',
+        '''
+        CREATE VIEW IF NOT EXISTS daily_totals AS
+        SELECT day, type, total_cents, count FROM daily_ledger
+        UNION ALL
+        SELECT day, type, total_cents, count FROM archive_daily_totals
+        ''',
+    ]),
+]
+
+# Versión del esquema tras aplicar todas las migraciones
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+# Pasos previos de una migración que se ejecutan fuera de su transacción, confirmando por
+# lotes para poder reanudarse si se interrumpen. La migración en sí se aplica después.
+PREPARE_STEPS = {
+    7: _copy_transactions_to_cents_and_days,
+}
+
+# Consultas frecuentes de DBManager con parámetros de ejemplo, para revisar su plan de ejecución.
+HOT_QUERIES = {
+    "get_all_transactions": (
+        "SELECT * FROM transactions ORDER BY day DESC", ()),
+    "count_transactions": (
+        "SELECT COUNT(*) FROM transactions", ()),
+    "get_transactions_page": (
+        "SELECT * FROM transactions WHERE (day, id) < (?, ?) ORDER BY day DESC, id DESC LIMIT 500",
+        (19875, 1000)),
+    "get_transactions_page_by_amount": (
+        "SELECT * FROM transactions WHERE (amount_cents, id) > (?, ?) ORDER BY amount_cents ASC, id ASC LIMIT 500",
+        (10000, 1000)),
+    "get_transactions_page_by_description": (
+        "SELECT * FROM transactions WHERE (description, id) < (?, ?) ORDER BY description DESC, id DESC LIMIT 500",
+        ("Venta", 1000)),
+    "get_transaction_by_description": (
+        "SELECT * FROM transactions WHERE description = ? ORDER BY day DESC LIMIT 1", ("Venta",)),
+    "get_all_unique_descriptions": (
+        "SELECT description FROM descriptions ORDER BY description ASC", ()),
+    "search_descriptions": (
+        "SELECT d.description FROM descriptions_fts JOIN descriptions d ON d.id = descriptions_fts.rowid "
+        "WHERE descriptions_fts MATCH ? ORDER BY d.uses DESC, d.description LIMIT 20",
+        ('"inv"*',)),
+    "get_transactions_page_by_search": (
+        "SELECT * FROM transactions WHERE description IN (SELECT d.description FROM descriptions d "
+        "WHERE d.id IN (SELECT rowid FROM descriptions_fts WHERE descriptions_fts MATCH ?)) "
+        "ORDER BY day DESC, id DESC LIMIT 500",
+        ('"inv"*',)),
+    "get_data_version": (
+        "SELECT version FROM data_changes WHERE id = 1", ()),
+    # get_totals_by_type y los extremos de get_monthly_totals leen las sumas acumuladas por día
+    "load_daily_ledger": (
+        "SELECT day, type, total_cents, count FROM daily_totals", ()),
+    "get_monthly_totals": (
+        "SELECT month, type, SUM(total_cents) FROM month_totals WHERE month BETWEEN ? AND ? GROUP BY month, type",
+        ("2024-01", "2024-12")),
+    "get_category_totals": (
+        "SELECT category, SUM(total_cents) FROM month_totals WHERE month BETWEEN ? AND ? AND type = ? "
+        "GROUP BY category",
+        ("2024-01", "2024-12", "Gasto")),
+    # Fragmento de mes en un extremo del rango (del 1 al 14 de enero)
+    "get_category_totals_edge": (
+        "SELECT category, SUM(amount_cents) FROM transactions WHERE type = ? AND day BETWEEN ? AND ? "
+        "GROUP BY category",
+        ("Gasto", 19723, 19736)),
+}
+
+# Consultas de HOT_QUERIES que leen a propósito tablas de resumen enteras: basta con que no recorran transactions
+FULL_SCAN_QUERIES = {"load_daily_ledger"}
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Devuelve la versión del esquema guardada en la base de datos."""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def apply_migrations(conn: sqlite3.Connection) -> int:
+    """
+    Aplica en orden las migraciones pendientes.
+
+    Cada migración se ejecuta dentro de su propia transacción junto con la
+    actualización de PRAGMA user_version, de modo que un fallo no deja el
+    esquema a medias. Si tiene un paso previo en PREPARE_STEPS, este se
+    ejecuta antes y puede confirmar su avance por lotes.
+
+    Returns:
+        int: La versión del esquema después de migrar.
+    """
+    current_version = get_schema_version(conn)
+    for version, description, steps in MIGRATIONS:
+        if version <= current_version:
+            continue
+        try:
+            if version in PREPARE_STEPS:
+                PREPARE_STEPS[version](conn)
+            conn.execute("BEGIN")
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        current_version = version
+        logger.info("Migración %s aplicada: %s.", version, description)
+    return current_version
+
+
+def explain_query_plan(conn: sqlite3.Connection, sql: str, params=()) -> list:
+    """Devuelve las líneas de EXPLAIN QUERY PLAN de una consulta."""
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+
+def uses_index(plan: list) -> bool:
+    """Indica si un plan accede a las tablas por índice y nunca las recorre completas."""
+    # Recorrer el resultado de una vista (CO-ROUTINE) no es recorrer una tabla
+    views = {step.split()[1] for step in plan if step.startswith("CO-ROUTINE")}
+    table_steps = [step for step in plan if step.startswith(("SCAN", "SEARCH")) and step.split()[1] not in views]
+    return bool(table_steps) and all("INDEX" in step or "PRIMARY KEY" in step for step in table_steps)
+
+
+def scans_transactions(plan: list) -> bool:
+    """Indica si un plan recorre completa la tabla de transacciones."""
+    return any(step.startswith("SCAN") and step.split()[1] == "transactions"
+               and "INDEX" not in step for step in plan)
+
+
+def check_query_plans(conn: sqlite3.Connection) -> dict:
+    """
+    Revisa el plan de ejecución de cada consulta frecuente.
+
+    Returns:
+        dict: Nombre de la consulta -> (usa índice, líneas del plan).
+    """
+    report = {}
+    for name, (sql, params) in HOT_QUERIES.items():
+        try:
+            plan = explain_query_plan(conn, sql, params)
+        except sqlite3.OperationalError as e:
+            report[name] = (False, [str(e)])
+            continue
+        indexed = not scans_transactions(plan) if name in FULL_SCAN_QUERIES else uses_index(plan)
+        report[name] = (indexed, plan)
+    return report
+
+
+if __name__ == "__main__":
+    # Uso: python -m database.migrations
+    # Migra la base de datos configurada y muestra el plan de cada consulta frecuente.
+    import sys
+    from config import DB_PATH
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    connection = sqlite3.connect(DB_PATH)
+    print(f"Esquema en la versión {apply_migrations(connection)}.")
+
+    all_indexed = True
+    for query_name, (indexed, query_plan) in check_query_plans(connection).items():
+        all_indexed = all_indexed and indexed
+        print(f"[{'OK' if indexed else 'SIN ÍNDICE'}] {query_name}")
+        for line in query_plan:
+            print(f"    {line}")
+    connection.close()
+    sys.exit(0 if all_indexed else 1)
@@ -0,0 +1,218 @@
+# database/write_behind.py
+"""
+Escritura diferida con confirmación agrupada.
+
+Con la escritura normal cada alta se confirma (commit) en el hilo de la interfaz y
+espera su propia sincronización con el disco. En modo diferido DBManager encola
+la escritura y vuelve al momento; un hilo escritor con su propia conexión junta
+lo que llega durante max_delay_ms (o hasta max_batch_rows operaciones) y lo
+confirma en una sola transacción, con una sola sincronización para todo el lote.
+
+El escritor usa synchronous=FULL: cuando un lote se entrega como confirmado ya
+está en disco. Los resultados de cada operación (valores anteriores y guardados,
+versiones de los datos antes y después, o el error) quedan en la cola completed y
+DBManager.deliver_write_results los entrega en el hilo dueño del gestor.
+
+La cola de pendientes tiene un tamaño máximo: si el disco no da abasto, encolar
+espera en lugar de acumular memoria sin límite.
+
+Si el hilo escritor se detiene por un error inesperado, lo pendiente se entrega
+como fallido, los flush en espera se liberan y submit y flush lanzan
+sqlite3.OperationalError; DBManager vuelve entonces a escribir al momento.
+"""
+
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from database.db_manager import DBManager
+import instrumentation
+
+logger = logging.getLogger(__name__)
+
+# Marca para terminar el hilo escritor tras confirmar lo pendiente
+_STOP = object()
+
+
+@dataclass
+class WriteRequest:
+    """Una escritura encolada: tipo de cambio (ver change_events), fila de _to_row e ID."""
+    kind: str
+    row: Optional[tuple]
+    transaction_id: Optional[int]
+    on_done: Optional[Callable[[Optional[str]], None]] = None
+
+
+@dataclass
+class WriteResult:
+    """
+    Resultado de una operación de un lote: (antes, guardado) como Transaction, o None
+    si no cambió ninguna fila, y las versiones de los datos justo antes y después.
+    """
+    kind: str
+    written: Optional[tuple]
+    error: Optional[str]
+    on_done: Optional[Callable[[Optional[str]], None]]
+    previous_version: Optional[int] = None
+    version: Optional[int] = None
+
+
+class WriteBehindQueue:
+    """Cola acotada de escrituras y el hilo que las confirma por lotes."""
+
+    def __init__(self, db_path: str, max_batch_rows: int = 500, max_delay_ms: int = 50,
+                 max_pending: int = 10000, notify: Optional[Callable[[], None]] = None):
+        self.db_path = db_path
+        self.max_batch_rows = max_batch_rows
+        self.max_delay = max_delay_ms / 1000
+        self.notify = notify
+        # Una lista de WriteResult por lote, en el orden en que se confirmaron
+        self.completed = queue.SimpleQueue()
+        # Motivo por el que se detuvo el hilo escritor; None mientras funciona
+        self.failure = None
+        self._requests = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._run, name="escritura-diferida", daemon=True)
+        self._thread.start()
+
+    def submit(self, kind: str, row: Optional[tuple], transaction_id: Optional[int], on_done=None):
+        """Encola una escritura; si la cola está llena, espera a que el escritor libere sitio."""
+        self._check_running()
+        self._requests.put(WriteRequest(kind, row, transaction_id, on_done))
+        if self.failure:
+            # El escritor se detuvo mientras se encolaba: nadie más vaciará la cola
+            self._fail_pending()
+
+    def pending(self) -> int:
+        return self._requests.qsize()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Espera a que se confirme todo lo encolado hasta ahora. Lanza sqlite3.OperationalError
+        si el hilo escritor se detuvo (lo pendiente se entrega como fallido).
+        """
+        self._check_running()
+        done = threading.Event()
+        self._requests.put(done)
+        if self.failure:
+            self._fail_pending()
+        finished = done.wait(timeout)
+        self._check_running()
+        return finished
+
+    def _check_running(self):
+        if self.failure:
+            self._fail_pending()
+            raise sqlite3.OperationalError(f"La escritura diferida se detuvo: {self.failure}")
+
+    def close(self):
+        """Confirma lo pendiente y termina el hilo escritor."""
+        if self._thread.is_alive():
+            self._requests.put(_STOP)
+            self._thread.join()
+
+    def _run(self):
+        db = None
+        batch, flushes = [], []
+        try:
+            db = DBManager(self.db_path, initialize=False)
+            if db.conn is None:
+                raise sqlite3.OperationalError(f"No se pudo abrir {self.db_path}")
+            # Cada lote queda en disco al confirmarse; la sincronización se paga una vez por lote
+            db.conn.execute("PRAGMA synchronous = FULL")
+            stop = False
+            while not stop:
+                batch, flushes, stop = self._collect(self._requests.get())
+                if batch:
+                    self._commit(db, batch)
+                for done in flushes:
+                    done.set()
+                batch, flushes = [], []
+        except Exception as e:
+            # Sin este hilo nadie confirmaría lo encolado: se entrega como fallido y se libera a quien espera
+            logger.exception("El hilo de escritura diferida se detuvo: %s", e)
+            self.failure = str(e) or type(e).__name__
+            if db is not None and db.conn is not None and db.conn.in_transaction:
+                db.conn.rollback()
+            self._publish([WriteResult(request.kind, None, self.failure, request.on_done) for request in batch])
+            for done in flushes:
+                done.set()
+            self._fail_pending()
+        finally:
+            if db is not None:
+                db.close()
+
+    def _fail_pending(self):
+        """Entrega como fallido todo lo que queda en la cola y libera los flush en espera."""
+        results = []
+        while True:
+            try:
+                item = self._requests.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, threading.Event):
+                item.set()
+            elif isinstance(item, WriteRequest):
+                results.append(WriteResult(item.kind, None, self.failure, item.on_done))
+        if results:
+            self._publish(results)
+
+    def _publish(self, results: list):
+        if not results:
+            return
+        self.completed.put(results)
+        if self.notify:
+            self.notify()
+
+    def _collect(self, item):
+        """Junta operaciones hasta max_batch_rows, max_delay o una marca de flush o de fin."""
+        batch, flushes = [], []
+        deadline = time.monotonic() + self.max_delay
+        while True:
+            if item is _STOP:
+                return batch, flushes, True
+            if isinstance(item, threading.Event):
+                flushes.append(item)
+                return batch, flushes, False
+            batch.append(item)
+            remaining = deadline - time.monotonic()
+            if len(batch) >= self.max_batch_rows or remaining <= 0:
+                return batch, flushes, False
+            try:
+                item = self._requests.get(timeout=remaining)
+            except queue.Empty:
+                return batch, flushes, False
+
+    def _commit(self, db: DBManager, batch: list):
+        """
+        Ejecuta el lote en una transacción; cada operación va en su propio punto de guardado.
+        Con el bloqueo de escritura tomado desde el principio, las versiones leídas alrededor
+        de cada operación son exactamente las suyas aunque otras conexiones escriban.
+        """
+        results = []
+        with instrumentation.span("sql", "write_behind_batch", rows=len(batch)):
+            try:
+                db.conn.execute("BEGIN IMMEDIATE")
+                for request in batch:
+                    previous_version = db.get_data_version()
+                    db.conn.execute("SAVEPOINT operacion")
+                    try:
+                        written = db.apply_write(request.kind, request.row, request.transaction_id)
+                        error = None
+                    except sqlite3.Error as e:
+                        # Una operación que falla no arrastra al resto del lote
+                        db.conn.execute("ROLLBACK TO operacion")
+                        written, error = None, str(e)
+                    db.conn.execute("RELEASE operacion")
+                    results.append(WriteResult(request.kind, written, error, request.on_done,
+                                               previous_version, db.get_data_version()))
+                db.conn.commit()
+            except sqlite3.Error as e:
+                logger.error("Error al confirmar un lote de escritura diferida: %s", e)
+                if db.conn.in_transaction:
+                    db.conn.rollback()
+                results = [WriteResult(request.kind, None, str(e), request.on_done) for request in batch]
+        self._publish(results)
@@ -0,0 +1,222 @@
+# eltropezon.py
+"""
+Comandos de mantenimiento sin interfaz gráfica.
+
+Uso:
+    python -m eltropezon rebuild-rollup
+    python -m eltropezon import ventas.csv [--chunk-size 5000]
+    python -m eltropezon db-info
+    python -m eltropezon report --from 2025-01-01 --to 2025-12-31 --by month [--out informes]
+    python -m eltropezon backup [--keep 10] [--list]
+    python -m eltropezon restore copias/finances-20250101-120000.db.gz
+    python -m eltropezon close-year 2023 [--vacuum] [--no-backup]
+"""
+
+import argparse
+import logging
+import sqlite3
+import sys
+from datetime import date
+
+from config import LOG_LEVEL
+from database.db_manager import DBManager
+
+
+def rebuild_rollup(args):
+    """Recalcula el resumen mensual a partir de las transacciones existentes."""
+    db_manager = DBManager()
+    db_manager.rebuild_rollup()
+    db_manager.close()
+    return 0
+
+
+def import_transactions(args):
+    """Importa un archivo CSV/XLSX mostrando el avance por bloques."""
+    from business_logic.importer import TransactionImporter
+
+    db_manager = DBManager()
+    importer = TransactionImporter(db_manager, chunk_size=args.chunk_size)
+    try:
+        report = importer.import_file(
+            args.file,
+            progress_callback=lambda r: print(f"  {r.processed} filas leídas, {r.inserted} importadas, "
+                                              f"{len(r.rejected)} rechazadas ({r.rows_per_second:.0f} filas/s)"))
+    except (sqlite3.Error, ValueError, OSError) as e:
+        print(f"No se pudo importar el archivo: {e}")
+        return 1
+    finally:
+        db_manager.close()
+
+    for line, reason in report.rejected:
+        print(f"Fila {line} rechazada: {reason}")
+    print(report.summary())
+    return 0
+
+
+def show_db_info(args):
+    """Muestra la ruta, el perfil y los PRAGMA activos de las conexiones."""
+    from config import DB_CONNECTION_PROFILE
+
+    db_manager = DBManager()
+    reader = db_manager.spawn()
+    try:
+        print(f"Base de datos: {db_manager.db_path}")
+        print(f"Perfil de conexión: {DB_CONNECTION_PROFILE}")
+        for title, manager in (("Conexión de escritura", db_manager), ("Conexión de lectura", reader)):
+            print(f"{title}:")
+            for pragma, value in manager.get_connection_settings().items():
+                print(f"  {pragma:<20} {value}")
+        archives = db_manager.get_archives()
+        if archives:
+            print("Ejercicios cerrados:")
+            for year, path in archives.items():
+                print(f"  {year:<20} {path}")
+    finally:
+        reader.close()
+        db_manager.close()
+    return 0
+
+
+def generate_reports(args):
+    """Genera los gráficos y CSV de cada período con varios procesos."""
+    from datetime import date
+    from business_logic.report_pack import generate_report_pack
+
+    try:
+        start, end = date.fromisoformat(args.start), date.fromisoformat(args.end)
+    except ValueError as e:
+        print(f"Fecha no válida (se espera AAAA-MM-DD): {e}")
+        return 1
+
+    db_manager = DBManager(args.db) if args.db else DBManager()
+    try:
+        result = generate_report_pack(
+            db_manager, start, end, args.out, by=args.by, formats=args.formats, workers=args.workers,
+            progress_callback=lambda p: print(f"  {p['period']}: ingresos {p['income']:.2f}, "
+                                              f"gastos {p['expenses']:.2f}, utilidad {p['net']:.2f}"))
+    except (ValueError, OSError) as e:
+        print(f"No se pudieron generar los informes: {e}")
+        return 1
+    finally:
+        db_manager.close()
+
+    print(result.summary())
+    print(f"Informes guardados en {args.out}")
+    return 0
+
+
+def create_backup(args):
+    """Hace una copia comprimida y comprobada de la base de datos, o lista las existentes."""
+    from database.backup import create_backup, list_backups
+
+    if args.list:
+        for path in list_backups():
+            print(path)
+        return 0
+    try:
+        result = create_backup(keep=args.keep, pages_per_step=args.pages)
+    except (sqlite3.Error, OSError, ValueError) as e:
+        print(f"No se pudo hacer la copia de seguridad: {e}")
+        return 1
+    # El rendimiento y la duración quedan en el registro
+    print(f"Copia guardada en {result.path}")
+    return 0
+
+
+def restore_backup(args):
+    """Sustituye la base de datos por una copia; la aplicación debe estar cerrada."""
+    from database.backup import restore_backup
+
+    try:
+        previous_backup = restore_backup(args.file)
+    except (sqlite3.Error, OSError, ValueError) as e:
+        print(f"No se pudo restaurar la copia: {e}")
+        return 1
+    if previous_backup:
+        print(f"El estado anterior se guardó en {previous_backup}")
+    print(f"Base de datos restaurada desde {args.file}")
+    return 0
+
+
+def close_fiscal_year(args):
+    """
+    Mueve las transacciones de un año terminado a su archivo, después de hacer una
+    copia de seguridad. Las copias incluyen los archivos de los ejercicios cerrados.
+    """
+    from database.backup import create_backup
+
+    db_manager = DBManager()
+    try:
+        if args.year >= date.today().year:
+            raise ValueError(f"El ejercicio {args.year} aún no ha terminado.")
+        if not args.no_backup:
+            print(f"Copia previa guardada en {create_backup(label=f'antes-de-cerrar-{args.year}').path}")
+        moved = db_manager.close_fiscal_year(args.year, vacuum=args.vacuum)
+    except (sqlite3.Error, OSError, ValueError) as e:
+        print(f"No se pudo cerrar el ejercicio {args.year}: {e}")
+        return 1
+    finally:
+        db_manager.close()
+    print(f"Ejercicio {args.year} cerrado: {moved} transacciones movidas a {db_manager.archive_path(args.year)}")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="eltropezon", description="Herramientas de EL TROPEZON.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    rollup_parser = subparsers.add_parser("rebuild-rollup", help="Recalcula el resumen mensual por categoría y los totales diarios.")
+    rollup_parser.set_defaults(func=rebuild_rollup)
+
+    import_parser = subparsers.add_parser("import", help="Importa transacciones desde un archivo CSV o XLSX.")
+    import_parser.add_argument("file", help="Ruta del archivo exportado.")
+    import_parser.add_argument("--chunk-size", type=int, default=5000, help="Filas por bloque insertado.")
+    import_parser.set_defaults(func=import_transactions)
+
+    info_parser = subparsers.add_parser("db-info", help="Muestra la configuración activa de SQLite.")
+    info_parser.set_defaults(func=show_db_info)
+
+    from business_logic.report_pack import OUTPUT_FORMATS, PERIOD_KINDS
+    report_parser = subparsers.add_parser("report", help="Genera los informes de cierre por período.")
+    report_parser.add_argument("--from", dest="start", required=True, help="Fecha inicial (AAAA-MM-DD).")
+    report_parser.add_argument("--to", dest="end", required=True, help="Fecha final (AAAA-MM-DD).")
+    report_parser.add_argument("--by", choices=PERIOD_KINDS, default="month", help="Tamaño de cada período.")
+    report_parser.add_argument("--out", default="informes", help="Carpeta de salida.")
+    report_parser.add_argument("--formats", nargs="+", choices=OUTPUT_FORMATS, default=OUTPUT_FORMATS,
+                               help="Formatos a generar.")
+    report_parser.add_argument("--workers", type=int, help="Procesos de trabajo (por defecto, uno por CPU).")
+    report_parser.add_argument("--db", help="Base de datos a usar en lugar de la configurada.")
+    report_parser.set_defaults(func=generate_reports)
+
+    from config import BACKUP_KEEP, BACKUP_PAGES_PER_STEP
+    backup_parser = subparsers.add_parser("backup", help="Hace una copia de seguridad sin cerrar la aplicación.")
+    backup_parser.add_argument("--keep", type=int, default=BACKUP_KEEP, help="Copias periódicas que se conservan.")
+    backup_parser.add_argument("--pages", type=int, default=BACKUP_PAGES_PER_STEP, help="Páginas copiadas por paso.")
+    backup_parser.add_argument("--list", action="store_true", help="Lista las copias existentes.")
+    backup_parser.set_defaults(func=create_backup)
+
+    restore_parser = subparsers.add_parser("restore", help="Restaura una copia (con la aplicación cerrada).")
+    restore_parser.add_argument("file", help="Copia a restaurar (.db.gz o .db).")
+    restore_parser.set_defaults(func=restore_backup)
+
+    close_parser = subparsers.add_parser(
+        "close-year", help="Archiva las transacciones de un ejercicio terminado en finances_AAAA.db.",
+        description="Mueve las transacciones del año a finances_AAAA.db, junto a la base de datos, tras hacer una "
+                    "copia de seguridad. Las copias (comando backup) incluyen esos archivos; si se copia la "
+                    "carpeta a mano, hay que llevarlos con finances.db.")
+    close_parser.add_argument("year", type=int, help="Año a cerrar.")
+    close_parser.add_argument("--no-backup", action="store_true", help="No hace la copia previa.")
+    close_parser.add_argument("--vacuum", action="store_true", help="Compacta después la base de datos.")
+    close_parser.set_defaults(func=close_fiscal_year)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=LOG_LEVEL or logging.INFO, format="%(message)s")
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
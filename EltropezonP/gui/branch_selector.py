@@ -0,0 +1,31 @@
+# gui/branch_selector.py
+
+from PyQt6.QtWidgets import QComboBox
+from PyQt6.QtCore import pyqtSignal
+
+from business_logic.analytics import FinancialAnalytics
+
+CONSOLIDATED_LABEL = "Consolidado"
+
+
+class BranchSelector(QComboBox):
+    """
+    Selector entre la vista consolidada y cada sucursal.
+
+    Emite analytics_changed con el FinancialAnalytics de la opción elegida. Con una
+    sola base de datos queda oculto y siempre se usa el análisis recibido.
+    """
+    analytics_changed = pyqtSignal(object)
+
+    def __init__(self, analytics: FinancialAnalytics, parent=None):
+        super().__init__(parent)
+        self.analytics = analytics
+        self.addItem(CONSOLIDATED_LABEL)
+        self.addItems(analytics.branch_names)
+        self.setFixedWidth(150)
+        self.setVisible(len(analytics.branch_names) > 1)
+        self.currentIndexChanged.connect(lambda _: self.analytics_changed.emit(self.selected_analytics()))
+
+    def selected_analytics(self) -> FinancialAnalytics:
+        name = self.currentText()
+        return self.analytics if name == CONSOLIDATED_LABEL else self.analytics.branch(name)
@@ -0,0 +1,17 @@
+# gui/canvas.py
+
+from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg
+
+import instrumentation
+
+
+class FigureCanvas(FigureCanvasQTAgg):
+    """Lienzo de matplotlib para Qt que mide cada dibujado completo de su figura."""
+
+    def __init__(self, figure, name: str):
+        super().__init__(figure)
+        self.name = name
+
+    def draw(self):
+        with instrumentation.span("chart", self.name):
+            super().draw()
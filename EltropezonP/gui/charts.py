@@ -0,0 +1,224 @@
+# gui/charts.py
+
+"""
+Gráficos que se construyen una sola vez y luego solo actualizan sus datos.
+
+Cada gráfico crea sus ejes y artistas al inicio; al recibir datos nuevos cambia
+los valores de esos artistas (set_data, set_height, ángulos de las cuñas) y pide
+un redibujado diferido con draw_idle. Si los datos no cambiaron no se redibuja,
+y si el lienzo no está visible el gráfico queda marcado como pendiente hasta
+que se muestre. No depende de Qt, así que también sirve con el backend Agg.
+"""
+
+import matplotlib
+from matplotlib.patches import Circle, Wedge
+
+import instrumentation
+
+BACKGROUND_COLOR = '#4F4F4F'
+TEXT_COLOR = '#E0E0E0'
+TITLE_COLOR = '#FFFFFF'
+INCOME_COLOR = '#4CAF50'
+EXPENSE_COLOR = '#F44336'
+EMPTY_COLOR = '#555555'
+
+
+def style_axes(ax, title, xlabel=None, ylabel=None, title_color=TEXT_COLOR, title_size=12, label_size=8):
+    """Aplica el estilo oscuro de la aplicación a unos ejes."""
+    ax.set_title(title, color=title_color, fontsize=title_size)
+    if xlabel:
+        ax.set_xlabel(xlabel, color=TEXT_COLOR, fontsize=label_size)
+    if ylabel:
+        ax.set_ylabel(ylabel, color=TEXT_COLOR, fontsize=label_size)
+    ax.set_facecolor(BACKGROUND_COLOR)
+    ax.tick_params(axis='x', colors=TEXT_COLOR, labelsize=label_size)
+    ax.tick_params(axis='y', colors=TEXT_COLOR, labelsize=label_size)
+    ax.spines['bottom'].set_color(TEXT_COLOR)
+    ax.spines['left'].set_color(TEXT_COLOR)
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+
+
+class Chart:
+    """Base de los gráficos: detecta cambios de datos y gestiona el redibujado."""
+
+    def __init__(self, figure, canvas=None):
+        self.figure = figure
+        self.canvas = canvas
+        self.dirty = False
+        self._data_key = None
+
+    def update(self, data) -> bool:
+        """Aplica datos nuevos. Devuelve False si eran iguales a los ya dibujados."""
+        data_key = self.make_key(data)
+        if data_key == self._data_key:
+            return False
+        self._data_key = data_key
+        # El dibujado en sí se mide en el lienzo (gui/canvas.py); aquí, la actualización de los artistas
+        with instrumentation.span("chart", f"{type(self).__name__}.apply"):
+            self.apply(data)
+        self.request_draw()
+        return True
+
+    def make_key(self, data):
+        return data
+
+    def apply(self, data):
+        raise NotImplementedError
+
+    def request_draw(self):
+        """Redibuja cuando Qt esté libre, o lo deja pendiente si el lienzo está oculto."""
+        if self.canvas is None:
+            return
+        if self.canvas.isVisible():
+            self.dirty = False
+            self.canvas.draw_idle()
+        else:
+            self.dirty = True
+
+    def redraw_if_dirty(self):
+        if self.dirty:
+            self.request_draw()
+
+
+class MonthlyPerformanceChart(Chart):
+    """Líneas de ingresos y gastos por mes."""
+
+    def __init__(self, figure, canvas=None):
+        super().__init__(figure, canvas)
+        self.ax = figure.add_subplot(111)
+        self.income_line, = self.ax.plot([], [], marker='o', color=INCOME_COLOR, label='Ingresos')
+        self.expenses_line, = self.ax.plot([], [], marker='o', color=EXPENSE_COLOR, label='Gastos')
+        style_axes(self.ax, "Rendimiento Mensual", "Mes", "Monto (Bs)")
+        self.ax.legend(loc='upper left')
+        self.ax.grid(True, linestyle='--', alpha=0.6, color='#666666')
+        figure.tight_layout()
+
+    def make_key(self, monthly_data):
+        return tuple(monthly_data['labels']), tuple(monthly_data['income']), tuple(monthly_data['expenses'])
+
+    def apply(self, monthly_data):
+        positions = list(range(len(monthly_data['labels'])))
+        self.income_line.set_data(positions, monthly_data['income'])
+        self.expenses_line.set_data(positions, monthly_data['expenses'])
+        self.ax.set_xticks(positions)
+        self.ax.set_xticklabels(monthly_data['labels'])
+        self.ax.relim()
+        self.ax.autoscale_view()
+
+
+class DonutChart(Chart):
+    """Dona de progreso con un texto central."""
+
+    def __init__(self, figure, canvas=None):
+        super().__init__(figure, canvas)
+        self.ax = figure.add_subplot(111)
+        self.ax.set_xlim(-1.1, 1.1)
+        self.ax.set_ylim(-1.1, 1.1)
+        self.ax.set_aspect('equal')
+        self.ax.axis('off')
+        self.filled_wedge = self.ax.add_patch(Wedge((0, 0), 1, 90, 90, width=0.4, facecolor='#FFD700'))
+        self.empty_wedge = self.ax.add_patch(Wedge((0, 0), 1, 90, 450, width=0.4, facecolor=EMPTY_COLOR))
+        self.ax.add_patch(Circle((0, 0), 0.60, fc=BACKGROUND_COLOR))
+        self.label = self.ax.text(0, 0, "", ha='center', va='center', fontsize=14, color=TITLE_COLOR,
+                                  fontweight='bold')
+        figure.set_facecolor(BACKGROUND_COLOR)
+
+    def make_key(self, data):
+        percentage, text_label = data
+        return round(min(max(percentage, 0.0), 1.0), 4), text_label
+
+    def apply(self, data):
+        percentage, text_label = self.make_key(data)
+        color = '#FFD700'
+        if percentage < 0.25:
+            color = EXPENSE_COLOR  # Rojo si es muy bajo
+        elif percentage > 0.90:
+            color = INCOME_COLOR  # Verde si se acerca a la meta
+
+        # La dona empieza arriba (90°) y avanza en sentido antihorario
+        boundary = 90 + 360 * percentage
+        self.filled_wedge.set_theta2(boundary)
+        self.filled_wedge.set_facecolor(color)
+        self.empty_wedge.set_theta1(boundary)
+        self.label.set_text(text_label)
+
+
+class CategoryPieChart(Chart):
+    """Distribución de gastos por categoría; las cuñas se rehacen solo si cambian los datos."""
+
+    def __init__(self, ax, canvas=None):
+        super().__init__(ax.figure, canvas)
+        self.ax = ax
+        self.ax.set_facecolor(BACKGROUND_COLOR)
+        self.ax.set_aspect('equal')
+        self.title = self.ax.set_title("Distribución de Gastos por Categoría", color=TITLE_COLOR, fontsize=18)
+        self.empty_message = self.ax.text(0.5, 0.5, "No hay datos de gastos para mostrar en este período.",
+                                          ha='center', va='center', color=TEXT_COLOR, fontsize=16,
+                                          transform=self.ax.transAxes)
+        self.ax.axis('off')
+        self._artists = []
+
+    def make_key(self, expenses_df):
+        if expenses_df is None or expenses_df.empty:
+            return ()
+        return tuple(zip(expenses_df['category'], expenses_df['amount']))
+
+    def apply(self, expenses_df):
+        for artist in self._artists:
+            artist.remove()
+        self._artists = []
+
+        rows = self.make_key(expenses_df)
+        has_data = bool(rows) and sum(amount for _, amount in rows) > 0
+        self.empty_message.set_visible(not has_data)
+        self.title.set_visible(has_data)
+        if not has_data:
+            return
+
+        categories, amounts = zip(*rows)
+        wedges, texts, autotexts = self.ax.pie(
+            amounts, labels=categories, autopct='%1.1f%%', startangle=90,
+            wedgeprops=dict(width=0.4, edgecolor='#3A3A3A'), colors=matplotlib.colormaps['Dark2'].colors,
+            textprops={'color': TEXT_COLOR})
+        self._artists = [*wedges, *texts, *autotexts]
+        self.ax.set_xlim(-1.25, 1.25)
+        self.ax.set_ylim(-1.25, 1.25)
+
+
+class IncomeExpensesBarChart(Chart):
+    """Barras de ingresos y gastos totales de un período."""
+
+    def __init__(self, ax, canvas=None):
+        super().__init__(ax.figure, canvas)
+        self.ax = ax
+        self.bars = ax.bar(['Ingresos Totales', 'Gastos Totales'], [0, 0], color=['#6A1B9A', '#FFD700'])
+        style_axes(ax, "Ingresos vs. Gastos", ylabel="Monto (Bs)", title_color=TITLE_COLOR, title_size=18,
+                   label_size=10)
+        self.value_labels = [ax.text(bar.get_x() + bar.get_width() / 2, 0, "", ha='center', va='bottom',
+                                     color=TEXT_COLOR) for bar in self.bars]
+        self.empty_message = ax.text(0.5, 0.5, "No hay datos de ingresos o gastos para mostrar en este período.",
+                                     ha='center', va='center', color=TEXT_COLOR, fontsize=16,
+                                     transform=ax.transAxes)
+
+    def make_key(self, summary):
+        return summary['Ingresos Totales'], summary['Gastos Totales']
+
+    def apply(self, summary):
+        values = self.make_key(summary)
+        has_data = sum(values) != 0
+        self.empty_message.set_visible(not has_data)
+        if has_data:
+            self.ax.set_axis_on()
+        else:
+            self.ax.set_axis_off()
+        for artist in [*self.bars, *self.value_labels, self.ax.title]:
+            artist.set_visible(has_data)
+        if not has_data:
+            return
+
+        for bar, value_label, value in zip(self.bars, self.value_labels, values):
+            bar.set_height(value)
+            value_label.set_position((bar.get_x() + bar.get_width() / 2, value + 10))
+            value_label.set_text(f'Bs{value:.2f}')
+        self.ax.set_ylim(0, max(values) * 1.15)
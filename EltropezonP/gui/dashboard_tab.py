@@ -2,20 +2,29 @@ from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QGroupBox, QGridLayout,
     QSpacerItem, QSizePolicy, QComboBox
 )
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, pyqtSignal
+from datetime import date
 from business_logic.analytics import FinancialAnalytics
 from database.db_manager import DBManager
+from gui.branch_selector import BranchSelector
+from gui.workers import AnalyticsRunner
 
-from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
-import matplotlib.pyplot as plt
+
+from gui.canvas import FigureCanvas
+from gui.charts import DonutChart, MonthlyPerformanceChart
 
 
 class DashboardTab(QWidget):
+    # Se emite cada vez que el panel termina de mostrar datos actualizados
+    data_shown = pyqtSignal()
+
     def __init__(self, db_manager: DBManager, analytics: FinancialAnalytics):
         super().__init__()
         self.db_manager = db_manager
         self.analytics = analytics
+        self.analytics_runner = AnalyticsRunner(analytics, self)
+        self.analytics_runner.failed.connect(self.show_load_error)
 
         self.main_layout = QVBoxLayout(self)
         self.main_layout.setContentsMargins(0, 0, 0, 0)
@@ -38,10 +47,19 @@ class DashboardTab(QWidget):
         header_layout.addWidget(title_label)
         header_layout.addStretch()
 
-        period_selector = QComboBox()
-        period_selector.addItems(["Este Mes", "Últimos 3 Meses", "Este Año"])
-        period_selector.setFixedWidth(150)
-        header_layout.addWidget(period_selector)
+        self.loading_label = QLabel("Actualizando...")
+        self.loading_label.hide()
+        header_layout.addWidget(self.loading_label)
+
+        self.branch_selector = BranchSelector(self.analytics)
+        self.branch_selector.analytics_changed.connect(self.set_analytics)
+        header_layout.addWidget(self.branch_selector)
+
+        self.period_selector = QComboBox()
+        self.period_selector.addItems(["Este Mes", "Últimos 3 Meses", "Este Año"])
+        self.period_selector.setFixedWidth(150)
+        self.period_selector.currentIndexChanged.connect(self.update_dashboard)
+        header_layout.addWidget(self.period_selector)
 
         self.main_layout.addLayout(header_layout)
 
@@ -87,25 +105,29 @@ class DashboardTab(QWidget):
         performance_layout.setSpacing(20)
 
         self.monthly_performance_figure = Figure(figsize=(5, 3), facecolor='#4F4F4F')
-        self.monthly_performance_canvas = FigureCanvas(self.monthly_performance_figure)
+        self.monthly_performance_canvas = FigureCanvas(self.monthly_performance_figure, "Rendimiento mensual")
         self.monthly_performance_canvas.setMinimumHeight(200)
         performance_layout.addWidget(self.monthly_performance_canvas)
+        self.monthly_performance_chart = MonthlyPerformanceChart(self.monthly_performance_figure,
+                                                                 self.monthly_performance_canvas)
 
         goals_layout = QVBoxLayout()
         sales_goal_group = QGroupBox("METAS DE VENTAS")
         sales_goal_layout = QVBoxLayout(sales_goal_group)
         self.sales_goal_figure = Figure(figsize=(2, 2), facecolor='#4F4F4F')
-        self.sales_goal_canvas = FigureCanvas(self.sales_goal_figure)
+        self.sales_goal_canvas = FigureCanvas(self.sales_goal_figure, "Metas de ventas")
         self.sales_goal_canvas.setFixedSize(120, 120)
         sales_goal_layout.addWidget(self.sales_goal_canvas, alignment=Qt.AlignmentFlag.AlignCenter)
+        self.sales_goal_chart = DonutChart(self.sales_goal_figure, self.sales_goal_canvas)
         goals_layout.addWidget(sales_goal_group)
 
         expenses_control_group = QGroupBox("CONTROL DE GASTOS")
         expenses_control_layout = QVBoxLayout(expenses_control_group)
         self.expenses_control_figure = Figure(figsize=(2, 2), facecolor='#4F4F4F')
-        self.expenses_control_canvas = FigureCanvas(self.expenses_control_figure)
+        self.expenses_control_canvas = FigureCanvas(self.expenses_control_figure, "Control de gastos")
         self.expenses_control_canvas.setFixedSize(120, 120)
         expenses_control_layout.addWidget(self.expenses_control_canvas, alignment=Qt.AlignmentFlag.AlignCenter)
+        self.expenses_control_chart = DonutChart(self.expenses_control_figure, self.expenses_control_canvas)
         goals_layout.addWidget(expenses_control_group)
 
         performance_layout.addLayout(goals_layout)
@@ -128,87 +150,78 @@ class DashboardTab(QWidget):
 
         self.main_layout.addWidget(tasks_group)
 
+    def set_analytics(self, analytics: FinancialAnalytics):
+        """Cambia entre la vista consolidada y la de una sucursal."""
+        self.analytics_runner.analytics = analytics
+        self.update_dashboard()
+
+    def selected_period(self):
+        """Fechas (inicio, fin) del período elegido, ambas incluidas, en formato YYYY-MM-DD."""
+        today = date.today()
+        index = self.period_selector.currentIndex()
+        if index == 2:  # Este Año
+            return date(today.year, 1, 1).isoformat(), date(today.year, 12, 31).isoformat()
+        months_back = 2 if index == 1 else 0  # Últimos 3 Meses incluye el mes actual
+        month_index = today.year * 12 + today.month - 1
+        start = date((month_index - months_back) // 12, (month_index - months_back) % 12 + 1, 1)
+        end = date((month_index + 1) // 12, (month_index + 1) % 12 + 1, 1).toordinal() - 1
+        return start.isoformat(), date.fromordinal(end).isoformat()
+
     def update_dashboard(self):
+        """Pide los datos del período elegido; se calculan en segundo plano si no están en caché."""
+        start_date, end_date = self.selected_period()
+        loading = self.analytics_runner.request({
+            "summary": ("get_financial_summary", start_date, end_date),
+            "monthly": ("get_monthly_summary", start_date, end_date),
+        }, self.show_dashboard)
+        self.loading_label.setText("Actualizando...")
+        self.loading_label.setVisible(loading)
+
+    def show_load_error(self, message):
+        self.loading_label.setText("Error al actualizar")
+        self.loading_label.show()
+
+    def show_dashboard(self, results):
         """Actualiza todos los datos y gráficos del dashboard."""
-        summary = self.analytics.get_financial_summary()
+        self.loading_label.hide()
+        summary = results["summary"]
         self.total_income_label.setText(f"Bs{summary['Ingresos Totales']:.2f}")
         self.total_expenses_label.setText(f"Bs{summary['Gastos Totales']:.2f}")
         self.net_profit_label.setText(f"Bs{summary['Utilidad Neta']:.2f}")
 
         # Actualizar gráficos con datos reales
-        self.plot_monthly_performance()
-        self.plot_sales_goal_donut()
-        self.plot_expenses_control_donut()
-
-    def plot_monthly_performance(self):
-        """Genera un gráfico de línea de rendimiento mensual con ingresos y gastos."""
-        self.monthly_performance_figure.clear()
-        ax = self.monthly_performance_figure.add_subplot(111)
-
-        monthly_data = self.analytics.get_monthly_summary()
-        months = monthly_data['labels']
-        income = monthly_data['income']
-        expenses = monthly_data['expenses']
-
-        ax.plot(months, income, marker='o', color='#4CAF50', label='Ingresos')
-        ax.plot(months, expenses, marker='o', color='#F44336', label='Gastos')
-
-        ax.set_title("Rendimiento Mensual", color='#E0E0E0', fontsize=12)
-        ax.set_xlabel("Mes", color='#E0E0E0', fontsize=8)
-        ax.set_ylabel("Monto (Bs)", color='#E0E0E0', fontsize=8)
-        ax.set_facecolor('#4F4F4F')
-        ax.tick_params(axis='x', colors='#E0E0E0', labelsize=8)
-        ax.tick_params(axis='y', colors='#E0E0E0', labelsize=8)
-        ax.legend(loc='upper left')
-        ax.grid(True, linestyle='--', alpha=0.6, color='#666666')
-        ax.spines['bottom'].set_color('#E0E0E0')
-        ax.spines['left'].set_color('#E0E0E0')
-        ax.spines['top'].set_visible(False)
-        ax.spines['right'].set_visible(False)
-
-        self.monthly_performance_figure.tight_layout()
-        self.monthly_performance_canvas.draw()
-
-    def plot_sales_goal_donut(self):
+        self.plot_monthly_performance(results["monthly"])
+        self.plot_sales_goal_donut(summary)
+        self.plot_expenses_control_donut(summary)
+        self.data_shown.emit()
+
+    def showEvent(self, event):
+        """Redibuja los gráficos que cambiaron mientras la página estaba oculta."""
+        super().showEvent(event)
+        for chart in (self.monthly_performance_chart, self.sales_goal_chart, self.expenses_control_chart):
+            chart.redraw_if_dirty()
+
+    def plot_monthly_performance(self, monthly_data):
+        """Actualiza el gráfico de línea de rendimiento mensual con ingresos y gastos."""
+        self.monthly_performance_chart.update(monthly_data)
+
+    def plot_sales_goal_donut(self, summary):
         """Calcula y muestra el progreso de la meta de ventas."""
         sales_goal = 50000.00  # Objetivo de ventas (puedes cambiarlo)
-        total_income = self.analytics.get_financial_summary()['Ingresos Totales']
+        total_income = summary['Ingresos Totales']
         percentage = total_income / sales_goal if sales_goal > 0 else 0
 
         text_label = f"{percentage * 100:.0f}%"
-        self._plot_donut_chart_helper(self.sales_goal_figure, self.sales_goal_canvas, percentage, text_label)
+        self.sales_goal_chart.update((percentage, text_label))
 
-    def plot_expenses_control_donut(self):
+    def plot_expenses_control_donut(self, summary):
         """Calcula y muestra el progreso de la meta de control de gastos."""
         expenses_limit = 40000.00  # Límite de gastos (puedes cambiarlo)
-        total_expenses = self.analytics.get_financial_summary()['Gastos Totales']
+        total_expenses = summary['Gastos Totales']
 
         # Invertimos el cálculo para que el verde indique que está por debajo del límite
         percentage = 1 - (total_expenses / expenses_limit) if expenses_limit > 0 else 0
         if percentage < 0: percentage = 0
 
         text_label = f"{total_expenses:.0f}"
-        self._plot_donut_chart_helper(self.expenses_control_figure, self.expenses_control_canvas, percentage,
-                                      text_label)
-
-    def _plot_donut_chart_helper(self, figure, canvas, percentage, text_label):
-        """Función auxiliar para generar gráficos de dona."""
-        figure.clear()
-        ax = figure.add_subplot(111)
-
-        size = [percentage, 1 - percentage]
-        colors = ['#FFD700', '#555555']
-        if percentage < 0.25:
-            colors = ['#F44336', '#555555']  # Rojo si es muy bajo
-        elif percentage > 0.90:
-            colors = ['#4CAF50', '#555555']  # Verde si se acerca a la meta
-
-        wedges, texts = ax.pie(size, colors=colors, startangle=90, wedgeprops=dict(width=0.4))
-
-        centre_circle = plt.Circle((0, 0), 0.60, fc='#4F4F4F')
-        figure.gca().add_artist(centre_circle)
-
-        ax.text(0, 0, text_label, ha='center', va='center', fontsize=14, color='#FFFFFF', fontweight='bold')
-        ax.axis('equal')
-        figure.set_facecolor('#4F4F4F')
-        canvas.draw()
\ No newline at end of file
+        self.expenses_control_chart.update((percentage, text_label))
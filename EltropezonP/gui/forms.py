@@ -2,12 +2,14 @@
 
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QFormLayout, QLineEdit, QComboBox, QPushButton,
-    QMessageBox, QDateEdit, QLabel, QGroupBox
+    QMessageBox, QDateEdit, QLabel, QGroupBox, QCompleter
 )
 from PyQt6.QtGui import QDoubleValidator
-from PyQt6.QtCore import pyqtSignal, QDate, Qt
+from PyQt6.QtCore import pyqtSignal, QDate, Qt, QStringListModel
 
+from business_logic.description_index import DescriptionIndex
 from models.transaction import Transaction
+from database.change_events import INSERTED
 from database.db_manager import DBManager
 from config import INCOME_CATEGORIES, EXPENSE_CATEGORIES, TRANSACTION_TYPES
 
@@ -18,6 +20,10 @@ class TransactionFormWidget(QWidget):
     def __init__(self, db_manager: DBManager, parent=None):
         super().__init__(parent)
         self.db_manager = db_manager
+        self.description_index = DescriptionIndex(db_manager)
+        # Último alta confirmada: DBManager la publica justo antes de llamar a on_done con su resultado
+        self._last_insert = None
+        self.db_manager.changes.subscribe(self.on_transaction_changed)
 
         self.main_layout = QVBoxLayout(self)
         self.main_layout.setContentsMargins(0, 0, 0, 0)
@@ -37,10 +43,17 @@ class TransactionFormWidget(QWidget):
         self.description_input.setPlaceholderText("Descripción de la transacción")
         self.description_input.currentIndexChanged.connect(self.fill_form_with_description)
 
+        # Autocompletado por palabras y prefijos con el índice en memoria
+        self.description_suggestions = QStringListModel(self)
+        self.description_completer = QCompleter(self.description_suggestions, self)
+        self.description_completer.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+        self.description_completer.activated[str].connect(self.fill_form_with_description)
+        self.description_input.setCompleter(self.description_completer)
+        self.description_input.lineEdit().textEdited.connect(self.update_description_suggestions)
+
         self.amount_input = QLineEdit()
         self.amount_input.setPlaceholderText("0.00")
 
-
         self.type_input = QComboBox()
         self.type_input.addItems(TRANSACTION_TYPES)
         self.type_input.currentIndexChanged.connect(self.update_category_combobox)
@@ -65,26 +78,49 @@ class TransactionFormWidget(QWidget):
         self.load_descriptions()
 
     def load_descriptions(self):
-        """Carga las descripciones únicas desde la base de datos al ComboBox."""
+        """Carga el índice de descripciones y las pone en el ComboBox."""
+        self.description_index.load()
+        self.show_descriptions()
+
+    def show_descriptions(self):
+        """Muestra en el ComboBox las descripciones del índice, sin tocar el texto escrito."""
+        text = self.description_input.currentText()
+        self.description_input.blockSignals(True)
         self.description_input.clear()
-        descriptions = self.db_manager.get_all_unique_descriptions()
-        self.description_input.addItems(descriptions)
-
-    def fill_form_with_description(self):
+        self.description_input.addItems(self.description_index.descriptions())
+        self.description_input.setCurrentIndex(-1)
+        self.description_input.setEditText(text)
+        self.description_input.blockSignals(False)
+
+    def refresh_descriptions(self):
+        """Recarga el índice solo si otra ventana cambió las transacciones."""
+        if self.description_index.ensure_current():
+            self.show_descriptions()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh_descriptions()
+
+    def update_description_suggestions(self, text: str):
+        """Actualiza las sugerencias del autocompletado con el índice en memoria."""
+        suggestions = self.description_index.search(text) if text.strip() else []
+        self.description_suggestions.setStringList(suggestions)
+
+    def fill_form_with_description(self, *args):
         """
-        Busca la transacción más reciente por la descripción seleccionada
-        y llena los campos de monto, tipo y categoría.
+        Llena los campos de monto, tipo y categoría con los de la transacción
+        más reciente de la descripción seleccionada.
         """
         description = self.description_input.currentText().strip()
         if not description:
             return
 
-        transaction = self.db_manager.get_transaction_by_description(description)
-        if transaction:
+        template = self.description_index.template(description)
+        if template:
             # Formateamos el monto directamente aquí para asegurar los decimales
-            self.amount_input.setText(f"{transaction.amount:.2f}")
-            self.type_input.setCurrentText(transaction.type)
-            self.category_input.setCurrentText(transaction.category)
+            self.amount_input.setText(f"{template.amount:.2f}")
+            self.type_input.setCurrentText(template.type)
+            self.category_input.setCurrentText(template.category)
 
     def update_category_combobox(self):
         """Actualiza el QComboBox de categorías según el tipo de transacción seleccionado."""
@@ -123,17 +159,37 @@ class TransactionFormWidget(QWidget):
                 type=transaction_type,
                 category=category
             )
-            self.db_manager.add_transaction(transaction)
-
-            QMessageBox.information(self, "Éxito", "Transacción guardada correctamente.")
-
-            self.description_input.clear()
+            self.db_manager.add_transaction(transaction, on_done=self.on_transaction_written)
+            self.description_input.setCurrentIndex(-1)
+            self.description_input.clearEditText()
             self.amount_input.clear()
 
             self.transaction_saved.emit()
-            self.load_descriptions()
 
         except ValueError:
             QMessageBox.warning(self, "Error", "El monto debe ser un número válido.")
         except Exception as e:
-            QMessageBox.critical(self, "Error", f"Ocurrió un error al guardar la transacción: {e}")
\ No newline at end of file
+            QMessageBox.critical(self, "Error", f"Ocurrió un error al guardar la transacción: {e}")
+
+    def on_transaction_changed(self, change):
+        if change.kind == INSERTED:
+            self._last_insert = change
+
+    def on_transaction_written(self, error):
+        """
+        Informa del resultado cuando la transacción quedó guardada en disco (o falló).
+        Solo entonces el autocompletado aprende la descripción, con la versión de los
+        datos de esa escritura.
+        """
+        change, self._last_insert = self._last_insert, None
+        if error:
+            QMessageBox.critical(self, "Error", f"Ocurrió un error al guardar la transacción: {error}")
+            return
+        if change is not None:
+            description = change.after.description
+            is_new_description = self.description_index.template(description) is None
+            self.description_index.record(change.after, change.previous_version, change.version)
+            if is_new_description:
+                self.description_input.insertItem(self.description_index.descriptions().index(description),
+                                                  description)
+        QMessageBox.information(self, "Éxito", "Transacción guardada correctamente.")
\ No newline at end of file
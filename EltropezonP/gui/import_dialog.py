@@ -0,0 +1,155 @@
+# gui/import_dialog.py
+
+import sqlite3
+
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QProgressBar,
+    QFileDialog, QPlainTextEdit, QMessageBox
+)
+from PyQt6.QtCore import QObject, QThread, pyqtSignal
+
+from business_logic.importer import ImportReport, TransactionImporter
+from database.db_manager import DBManager
+
+
+class ImportWorker(QObject):
+    """Ejecuta la importación en un hilo aparte con su propia conexión a la base de datos."""
+    progress = pyqtSignal(object)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, db_path: str, file_path: str):
+        super().__init__()
+        self.db_path = db_path
+        self.file_path = file_path
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        # La conexión SQLite no puede compartirse entre hilos, así que se abre una nueva aquí
+        db_manager = DBManager(self.db_path)
+        try:
+            importer = TransactionImporter(db_manager)
+            report = importer.import_file(self.file_path, progress_callback=self.progress.emit,
+                                          is_cancelled=lambda: self._cancelled)
+            self.finished.emit(report)
+        except (sqlite3.Error, ValueError, OSError) as e:
+            self.failed.emit(str(e))
+        finally:
+            db_manager.close()
+
+
+class ImportDialog(QDialog):
+    """Diálogo para importar transacciones desde archivos CSV o XLSX."""
+    import_finished = pyqtSignal()
+
+    def __init__(self, db_manager: DBManager, parent=None):
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.thread = None
+        self.worker = None
+        # Último avance recibido: si un bloque falla, los anteriores ya quedaron guardados
+        self.last_report = None
+
+        self.setWindowTitle("Importar Transacciones")
+        self.setMinimumSize(500, 320)
+
+        layout = QVBoxLayout(self)
+
+        self.file_label = QLabel("Seleccione un archivo CSV o XLSX exportado del banco o del punto de venta.")
+        self.file_label.setWordWrap(True)
+        layout.addWidget(self.file_label)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.hide()
+        layout.addWidget(self.progress_bar)
+
+        self.status_label = QLabel("")
+        layout.addWidget(self.status_label)
+
+        self.rejected_output = QPlainTextEdit()
+        self.rejected_output.setReadOnly(True)
+        self.rejected_output.setPlaceholderText("Filas rechazadas")
+        layout.addWidget(self.rejected_output)
+
+        button_layout = QHBoxLayout()
+        self.select_button = QPushButton("Seleccionar archivo")
+        self.select_button.clicked.connect(self.select_file)
+        self.cancel_button = QPushButton("Cancelar")
+        self.cancel_button.setEnabled(False)
+        self.cancel_button.clicked.connect(self.cancel_import)
+        button_layout.addStretch()
+        button_layout.addWidget(self.select_button)
+        button_layout.addWidget(self.cancel_button)
+        layout.addLayout(button_layout)
+
+    def select_file(self):
+        file_path, _ = QFileDialog.getOpenFileName(self, "Importar transacciones", "",
+                                                   "Exportaciones (*.csv *.xlsx *.txt)")
+        if file_path:
+            self.start_import(file_path)
+
+    def start_import(self, file_path: str):
+        """Lanza la importación en segundo plano para no bloquear la interfaz."""
+        self.file_label.setText(file_path)
+        self.rejected_output.clear()
+        self.last_report = None
+        self.status_label.setText("Importando...")
+        self.progress_bar.show()
+        self.select_button.setEnabled(False)
+        self.cancel_button.setEnabled(True)
+
+        # El importador usa su propia conexión: las escrituras diferidas de la interfaz se confirman antes
+        self.db_manager.flush_writes()
+        self.thread = QThread(self)
+        self.worker = ImportWorker(self.db_manager.db_path, file_path)
+        self.worker.moveToThread(self.thread)
+        self.thread.started.connect(self.worker.run)
+        self.worker.progress.connect(self.show_progress)
+        self.worker.finished.connect(self.show_result)
+        self.worker.failed.connect(self.show_error)
+        self.worker.finished.connect(self.thread.quit)
+        self.worker.failed.connect(self.thread.quit)
+        self.thread.finished.connect(self.import_done)
+        self.thread.start()
+
+    def cancel_import(self):
+        if self.worker:
+            self.worker.cancel()
+            self.cancel_button.setEnabled(False)
+
+    def show_progress(self, report: ImportReport):
+        self.last_report = report
+        self.status_label.setText(f"{report.inserted} importadas, {len(report.rejected)} rechazadas "
+                                  f"({report.rows_per_second:.0f} filas/s)")
+
+    def show_result(self, report: ImportReport):
+        self.status_label.setText(report.summary())
+        self.rejected_output.setPlainText(
+            "\n".join(f"Fila {line}: {reason}" for line, reason in report.rejected[:1000]))
+        if report.inserted:
+            self.import_finished.emit()
+
+    def show_error(self, message: str):
+        inserted = self.last_report.inserted if self.last_report else 0
+        self.status_label.setText(f"{inserted} transacciones importadas antes del error." if inserted else "")
+        QMessageBox.critical(self, "Error", f"No se pudo importar el archivo: {message}")
+        if inserted:
+            self.import_finished.emit()
+
+    def import_done(self):
+        self.progress_bar.hide()
+        self.select_button.setEnabled(True)
+        self.cancel_button.setEnabled(False)
+        self.worker = None
+
+    def closeEvent(self, event):
+        # Esperar a que el bloque en curso termine antes de cerrar el diálogo
+        if self.worker:
+            self.worker.cancel()
+        if self.thread:
+            self.thread.wait()
+        super().closeEvent(event)
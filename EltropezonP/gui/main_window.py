@@ -1,21 +1,45 @@
+import time
+
 from PyQt6.QtWidgets import (
     QMainWindow, QWidget, QHBoxLayout, QVBoxLayout, QPushButton,
-    QStackedWidget, QButtonGroup
+    QStackedWidget, QButtonGroup, QLabel, QMessageBox
 )
-from PyQt6.QtGui import QIcon
-from PyQt6.QtCore import Qt
-
-from gui.transaction_viewer import TransactionViewerWindow
+from PyQt6.QtGui import QIcon, QKeySequence, QShortcut
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
 
+from config import BACKUP_INTERVAL_HOURS
 from database.db_manager import DBManager
 from business_logic.analytics import FinancialAnalytics
-from gui.dashboard_tab import DashboardTab
-from gui.forms import TransactionFormWidget
-from gui.reports_tab import ReportsTab
 from gui.styles import APP_STYLES
+from gui.workers import start_query
+
+# Las páginas (y con ellas matplotlib y pandas) se importan la primera vez que se muestran
+DASHBOARD_PAGE, TRANSACTION_PAGE, REPORTS_PAGE, PERFORMANCE_PAGE = range(4)
+
+# Cada cuánto se comprueba si toca la copia de seguridad automática, y la primera vez tras abrir
+BACKUP_CHECK_INTERVAL_MS = 60 * 60 * 1000
+BACKUP_FIRST_CHECK_MS = 5 * 60 * 1000
+
+
+class PagePlaceholder(QLabel):
+    """Ocupa el lugar de una página que todavía no se ha construido."""
+    painted = pyqtSignal()
+
+    def __init__(self):
+        super().__init__("Cargando...")
+        self.setAlignment(Qt.AlignmentFlag.AlignCenter)
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        self.painted.emit()
 
 
 class MainWindow(QMainWindow):
+    # Se emite cuando la ventana se dibujó por primera vez, antes de cualquier consulta
+    first_painted = pyqtSignal()
+    # Se emite cuando una página se construye, con su índice
+    page_created = pyqtSignal(int)
+
     def __init__(self, db_manager: DBManager, analytics: FinancialAnalytics):
         super().__init__()
 
@@ -33,6 +57,23 @@ class MainWindow(QMainWindow):
         self.create_sidebar()
         self.create_content_area()
 
+        # Cada alta, modificación o borrado llega como cambio; la caché del análisis
+        # ya lo aplicó y las páginas solo vuelven a pedir sus datos
+        self.db_manager.changes.subscribe(self.on_transaction_changed)
+
+        # La página de diagnóstico "Rendimiento" no tiene botón en la barra lateral
+        self.performance_shortcut = QShortcut(QKeySequence("Ctrl+Shift+P"), self)
+        self.performance_shortcut.activated.connect(lambda: self.switch_page(PERFORMANCE_PAGE))
+
+        # Copia de seguridad automática en un hilo de trabajo, sin bloquear la interfaz ni las escrituras
+        self._backup_worker = None
+        self._backup_requested_by_user = False
+        self.backup_timer = QTimer(self)
+        self.backup_timer.setInterval(BACKUP_CHECK_INTERVAL_MS)
+        self.backup_timer.timeout.connect(self.run_scheduled_backup)
+        self.backup_timer.start()
+        QTimer.singleShot(BACKUP_FIRST_CHECK_MS, self.run_scheduled_backup)
+
     def create_sidebar(self):
         self.sidebar_frame = QWidget()
         self.sidebar_frame.setObjectName("sidebar")
@@ -43,7 +84,7 @@ class MainWindow(QMainWindow):
         self.btn_dashboard = QPushButton("  Panel de control")
         self.btn_dashboard.setCheckable(True)
         self.btn_dashboard.setChecked(True)
-        self.btn_dashboard.clicked.connect(lambda: self.switch_page(0))
+        self.btn_dashboard.clicked.connect(lambda: self.switch_page(DASHBOARD_PAGE))
 
         self.btn_ingreso = QPushButton("  Ingreso")
         self.btn_ingreso.setCheckable(True)
@@ -55,17 +96,25 @@ class MainWindow(QMainWindow):
 
         self.btn_reportes = QPushButton("  Informes")
         self.btn_reportes.setCheckable(True)
-        self.btn_reportes.clicked.connect(lambda: self.switch_page(2))
+        self.btn_reportes.clicked.connect(lambda: self.switch_page(REPORTS_PAGE))
 
         # Nuevo botón para la ventana de gestión
         self.btn_ver_transacciones = QPushButton("  Ver Transacciones")
         self.btn_ver_transacciones.clicked.connect(self.show_viewer_window)
 
+        self.btn_importar = QPushButton("  Importar")
+        self.btn_importar.clicked.connect(self.show_import_dialog)
+
+        self.btn_copia = QPushButton("  Copia de seguridad")
+        self.btn_copia.clicked.connect(lambda: self.start_backup(requested_by_user=True))
+
         self.sidebar_layout.addWidget(self.btn_dashboard)
         self.sidebar_layout.addWidget(self.btn_ingreso)
         self.sidebar_layout.addWidget(self.btn_egreso)
         self.sidebar_layout.addWidget(self.btn_reportes)
         self.sidebar_layout.addWidget(self.btn_ver_transacciones)  # Añadir el nuevo botón
+        self.sidebar_layout.addWidget(self.btn_importar)
+        self.sidebar_layout.addWidget(self.btn_copia)
         self.sidebar_layout.addStretch()
 
         self.button_group = QButtonGroup(self)
@@ -85,32 +134,145 @@ class MainWindow(QMainWindow):
         self.stacked_widget = QStackedWidget()
         self.content_layout.addWidget(self.stacked_widget)
 
+        self.dashboard_page = None
+        self.transaction_page = None
+        self.reports_page = None
+        self.performance_page = None
+        self.viewer_window = None
+        self.page_factories = {
+            DASHBOARD_PAGE: self.create_dashboard_page,
+            TRANSACTION_PAGE: self.create_transaction_page,
+            REPORTS_PAGE: self.create_reports_page,
+            PERFORMANCE_PAGE: self.create_performance_page,
+        }
+        for index in self.page_factories:
+            self.stacked_widget.addWidget(PagePlaceholder())
+
+        # El panel de control se construye justo después del primer dibujo de la ventana
+        self._first_paint_done = False
+        self.stacked_widget.widget(DASHBOARD_PAGE).painted.connect(self.on_first_paint)
+
+        self.main_layout.addWidget(self.content_frame)
+
+    def on_first_paint(self):
+        if self._first_paint_done:
+            return
+        self._first_paint_done = True
+        self.first_painted.emit()
+        QTimer.singleShot(0, lambda: self.switch_page(self.stacked_widget.currentIndex()))
+
+    def create_dashboard_page(self):
+        from gui.dashboard_tab import DashboardTab
         self.dashboard_page = DashboardTab(self.db_manager, self.analytics)
+        return self.dashboard_page
+
+    def create_transaction_page(self):
+        from gui.forms import TransactionFormWidget
         self.transaction_page = TransactionFormWidget(self.db_manager)
+        return self.transaction_page
+
+    def create_reports_page(self):
+        from gui.reports_tab import ReportsTab
         self.reports_page = ReportsTab(self.db_manager, self.analytics)
+        return self.reports_page
 
-        self.stacked_widget.addWidget(self.dashboard_page)
-        self.stacked_widget.addWidget(self.transaction_page)
-        self.stacked_widget.addWidget(self.reports_page)
+    def create_performance_page(self):
+        from gui.performance_tab import PerformanceTab
+        self.performance_page = PerformanceTab()
+        return self.performance_page
 
-        self.transaction_page.transaction_saved.connect(self.dashboard_page.update_dashboard)
-        self.transaction_page.transaction_saved.connect(self.reports_page.update_reports)
+    def page(self, index):
+        """Devuelve la página indicada, construyéndola si aún es un marcador."""
+        widget = self.stacked_widget.widget(index)
+        if not isinstance(widget, PagePlaceholder):
+            return widget
+        is_current = self.stacked_widget.currentIndex() == index
+        page = self.page_factories[index]()
+        self.stacked_widget.removeWidget(widget)
+        self.stacked_widget.insertWidget(index, page)
+        widget.deleteLater()
+        if is_current:
+            self.stacked_widget.setCurrentIndex(index)
+        self.page_created.emit(index)
+        return page
 
-        self.main_layout.addWidget(self.content_frame)
+    def refresh_pages(self):
+        """
+        Actualiza la página de análisis visible. Las ocultas piden sus datos al
+        mostrarse (switch_page) y las que aún no existen, al construirse.
+        """
+        index = self.stacked_widget.currentIndex()
+        if index == DASHBOARD_PAGE and self.dashboard_page:
+            self.dashboard_page.update_dashboard()
+        elif index == REPORTS_PAGE and self.reports_page:
+            self.reports_page.update_reports()
+
+    def on_transaction_changed(self, change):
+        self.refresh_pages()
 
     def switch_page(self, index):
+        built = not isinstance(self.stacked_widget.widget(index), PagePlaceholder)
+        page = self.page(index)
         self.stacked_widget.setCurrentIndex(index)
-        if index == 0:
-            self.dashboard_page.update_dashboard()
-        elif index == 2:
-            self.reports_page.update_reports()
+        # Una página recién construida ya pidió sus datos en el constructor
+        if not built:
+            return
+        if index == DASHBOARD_PAGE:
+            page.update_dashboard()
+        elif index == REPORTS_PAGE:
+            page.update_reports()
 
     def show_transaction_form(self, transaction_type):
-        self.transaction_page.set_transaction_type(transaction_type)
-        self.stacked_widget.setCurrentIndex(1)
+        self.page(TRANSACTION_PAGE).set_transaction_type(transaction_type)
+        self.stacked_widget.setCurrentIndex(TRANSACTION_PAGE)
 
     def show_viewer_window(self):
-        self.viewer_window = TransactionViewerWindow(self.db_manager)
-        self.viewer_window.transaction_updated.connect(self.dashboard_page.update_dashboard)
-        self.viewer_window.transaction_updated.connect(self.reports_page.update_reports)
-        self.viewer_window.show()
\ No newline at end of file
+        """Muestra la ventana de transacciones; se construye una vez y se reutiliza."""
+        if self.viewer_window is None:
+            from gui.transaction_viewer import TransactionViewerWindow
+            self.viewer_window = TransactionViewerWindow(self.db_manager)
+        self.viewer_window.show()
+        self.viewer_window.raise_()
+        self.viewer_window.activateWindow()
+
+    def show_import_dialog(self):
+        from gui.import_dialog import ImportDialog
+        import_dialog = ImportDialog(self.db_manager, self)
+        import_dialog.import_finished.connect(self.refresh_pages)
+        if self.viewer_window:
+            # La importación en bloque no publica cambios individuales; la tabla se vuelve a consultar
+            import_dialog.import_finished.connect(self.viewer_window.apply_filters)
+        import_dialog.exec()
+
+    def run_scheduled_backup(self):
+        """Hace la copia automática si la última tiene más de BACKUP_INTERVAL_HOURS."""
+        from database.backup import last_backup_time
+
+        last_backup = last_backup_time()
+        if last_backup is None or time.time() - last_backup >= BACKUP_INTERVAL_HOURS * 3600:
+            self.start_backup()
+
+    def start_backup(self, requested_by_user: bool = False):
+        """Lanza una copia de seguridad en línea en el pool de hilos (ver database/backup.py)."""
+        if self._backup_worker:
+            return
+        from database.backup import create_backup
+
+        self._backup_requested_by_user = requested_by_user
+        # La copia se lee desde otra conexión: las escrituras diferidas pendientes se confirman antes
+        self.db_manager.flush_writes()
+        self.btn_copia.setEnabled(False)
+        self._backup_worker = start_query(self.db_manager, 0, lambda worker_db: create_backup(worker_db.db_path),
+                                          self.on_backup_finished, self.on_backup_failed)
+
+    def on_backup_finished(self, generation, result):
+        self._backup_worker = None
+        self.btn_copia.setEnabled(True)
+        if self._backup_requested_by_user:
+            QMessageBox.information(self, "Copia de seguridad", result.summary())
+
+    def on_backup_failed(self, generation, message):
+        self._backup_worker = None
+        self.btn_copia.setEnabled(True)
+        if self._backup_requested_by_user:
+            QMessageBox.critical(self, "Copia de seguridad", f"No se pudo hacer la copia de seguridad: {message}")
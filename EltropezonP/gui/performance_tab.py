@@ -0,0 +1,156 @@
+# gui/performance_tab.py
+
+from PyQt6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QGroupBox, QTableWidget,
+    QTableWidgetItem, QHeaderView, QFileDialog, QMessageBox
+)
+from PyQt6.QtCore import Qt, QTimer
+
+import instrumentation
+
+# Eventos recientes que se muestran en la tabla (el búfer guarda más)
+RECENT_EVENTS_SHOWN = 200
+REFRESH_INTERVAL_MS = 1000
+
+
+class PerformanceTab(QWidget):
+    """
+    Página de diagnóstico "Rendimiento", oculta en la barra lateral (Ctrl+Shift+P).
+
+    Muestra el resumen por punto medido (consultas SQL, cálculos de análisis y
+    dibujado de gráficos) y los eventos más recientes. Se actualiza sola mientras
+    está visible y permite exportar los datos como JSON o traza de Chrome.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.layout = QVBoxLayout(self)
+
+        title_label = QLabel("Rendimiento")
+        title_label.setStyleSheet("font-size: 28px; font-weight: bold; color: #FFFFFF; margin-bottom: 20px;")
+        self.layout.addWidget(title_label)
+
+        self.create_controls_section()
+
+        statistics_group = QGroupBox("Resumen por operación")
+        statistics_layout = QVBoxLayout(statistics_group)
+        self.statistics_table = self.create_table(
+            ["Tipo", "Operación", "Llamadas", "Media (ms)", "p50 (ms)", "p95 (ms)", "Máx. (ms)", "Total (ms)"])
+        statistics_layout.addWidget(self.statistics_table)
+        self.layout.addWidget(statistics_group)
+
+        events_group = QGroupBox("Eventos recientes")
+        events_layout = QVBoxLayout(events_group)
+        self.events_table = self.create_table(["Tipo", "Operación", "Duración (ms)", "Filas", "Detalle"])
+        events_layout.addWidget(self.events_table)
+        self.layout.addWidget(events_group)
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(REFRESH_INTERVAL_MS)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+        self.update_toggle_button()
+        self.refresh()
+
+    def create_controls_section(self):
+        controls_layout = QHBoxLayout()
+
+        self.toggle_button = QPushButton()
+        self.toggle_button.clicked.connect(self.toggle_instrumentation)
+        controls_layout.addWidget(self.toggle_button)
+
+        refresh_button = QPushButton("Actualizar")
+        refresh_button.clicked.connect(self.refresh)
+        controls_layout.addWidget(refresh_button)
+
+        clear_button = QPushButton("Limpiar")
+        clear_button.clicked.connect(self.clear)
+        controls_layout.addWidget(clear_button)
+
+        controls_layout.addStretch()
+
+        export_json_button = QPushButton("Exportar JSON")
+        export_json_button.clicked.connect(self.export_json)
+        controls_layout.addWidget(export_json_button)
+
+        export_trace_button = QPushButton("Exportar traza de Chrome")
+        export_trace_button.clicked.connect(self.export_chrome_trace)
+        controls_layout.addWidget(export_trace_button)
+
+        self.layout.addLayout(controls_layout)
+
+    @staticmethod
+    def create_table(headers: list) -> QTableWidget:
+        table = QTableWidget(0, len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        table.verticalHeader().setVisible(False)
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        table.horizontalHeader().setStretchLastSection(True)
+        return table
+
+    def toggle_instrumentation(self):
+        if instrumentation.enabled:
+            instrumentation.disable()
+        else:
+            instrumentation.enable()
+        self.update_toggle_button()
+
+    def update_toggle_button(self):
+        self.toggle_button.setText("Detener medición" if instrumentation.enabled else "Iniciar medición")
+
+    def clear(self):
+        instrumentation.clear()
+        self.refresh()
+
+    @staticmethod
+    def _fill_table(table: QTableWidget, rows: list):
+        table.setRowCount(len(rows))
+        for row_index, values in enumerate(rows):
+            for column_index, value in enumerate(values):
+                text = f"{value:.2f}" if isinstance(value, float) else str(value)
+                item = QTableWidgetItem(text)
+                if isinstance(value, (int, float)):
+                    item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                table.setItem(row_index, column_index, item)
+
+    def refresh(self):
+        """Vuelve a leer los histogramas y los eventos recientes."""
+        self._fill_table(self.statistics_table, [
+            (stats["category"], stats["name"], stats["count"], stats["mean_ms"], stats["p50_ms"],
+             stats["p95_ms"], stats["max_ms"], stats["mean_ms"] * stats["count"])
+            for stats in instrumentation.statistics()])
+        self._fill_table(self.events_table, [
+            (event["category"], event["name"], event["duration_ms"], event.get("rows", ""),
+             event.get("sql") or event.get("error", ""))
+            for event in instrumentation.recent_events(RECENT_EVENTS_SHOWN)])
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.update_toggle_button()
+        self.refresh()
+        self.refresh_timer.start()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.refresh_timer.stop()
+
+    def export_json(self):
+        file_path, _ = QFileDialog.getSaveFileName(self, "Exportar mediciones", "rendimiento.json",
+                                                   "JSON (*.json)")
+        if file_path:
+            self._export(instrumentation.export_json, file_path)
+
+    def export_chrome_trace(self):
+        file_path, _ = QFileDialog.getSaveFileName(self, "Exportar traza de Chrome", "traza.json",
+                                                   "Traza de Chrome (*.json)")
+        if file_path:
+            self._export(instrumentation.export_chrome_trace, file_path)
+
+    def _export(self, exporter, file_path: str):
+        try:
+            exporter(file_path)
+        except OSError as e:
+            QMessageBox.critical(self, "Error", f"No se pudo guardar el archivo:\n{e}")
+            return
+        QMessageBox.information(self, "Exportación", f"Mediciones guardadas en {file_path}")
@@ -5,10 +5,13 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtCore import QDateTime, QDate, Qt
 from business_logic.analytics import FinancialAnalytics
 from database.db_manager import DBManager
+from gui.branch_selector import BranchSelector
+from gui.workers import AnalyticsRunner
 
-from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
-import matplotlib.pyplot as plt
+
+from gui.canvas import FigureCanvas
+from gui.charts import CategoryPieChart, IncomeExpensesBarChart
 
 
 class ReportsTab(QWidget):
@@ -16,6 +19,8 @@ class ReportsTab(QWidget):
         super().__init__()
         self.db_manager = db_manager
         self.analytics = analytics
+        self.analytics_runner = AnalyticsRunner(analytics, self)
+        self.analytics_runner.failed.connect(self.show_load_error)
 
         self.layout = QVBoxLayout(self)
         self.layout.setContentsMargins(0, 0, 0, 0)  # Ajustar márgenes
@@ -29,10 +34,15 @@ class ReportsTab(QWidget):
         self.report_layout = QVBoxLayout(self.report_group)
 
         self.figure = Figure(figsize=(10, 6), facecolor='#4F4F4F')  # Fondo del gráfico
-        self.canvas = FigureCanvas(self.figure)
+        self.canvas = FigureCanvas(self.figure, "Reportes")
         self.report_layout.addWidget(self.canvas)
         self.layout.addWidget(self.report_group)
 
+        # Ambos gráficos ocupan la misma posición; solo se muestra el del reporte elegido
+        self.expenses_chart = CategoryPieChart(self.figure.add_subplot(111, label="expenses"), self.canvas)
+        self.income_expenses_chart = IncomeExpensesBarChart(self.figure.add_subplot(111, label="income_expenses"),
+                                                            self.canvas)
+
         self.update_reports()
 
     def create_controls_section(self):
@@ -46,6 +56,10 @@ class ReportsTab(QWidget):
         controls_layout.addWidget(QLabel("Tipo de Reporte:"))
         controls_layout.addWidget(self.report_selector)
 
+        self.branch_selector = BranchSelector(self.analytics)
+        self.branch_selector.analytics_changed.connect(self.set_analytics)
+        controls_layout.addWidget(self.branch_selector)
+
         # Selectores de fecha (QDateEdit)
         self.start_date_input = QDateEdit(QDate.currentDate().addMonths(-1))  # Último mes por defecto
         self.start_date_input.setCalendarPopup(True)
@@ -64,73 +78,62 @@ class ReportsTab(QWidget):
         controls_layout.addWidget(self.end_date_input)
 
         controls_layout.addStretch()  # Empuja los controles a la izquierda
+
+        self.loading_label = QLabel("Actualizando...")
+        self.loading_label.hide()
+        controls_layout.addWidget(self.loading_label)
         self.layout.addLayout(controls_layout)
 
-    def update_reports(self):
-        """Actualiza el gráfico según la selección y el rango de fechas."""
-        self.figure.clear()
+    def set_analytics(self, analytics: FinancialAnalytics):
+        """Cambia entre el reporte consolidado y el de una sucursal."""
+        self.analytics_runner.analytics = analytics
+        self.update_reports()
 
+    def update_reports(self):
+        """Pide los datos del reporte seleccionado; se calculan en segundo plano si no están en caché."""
         start_date_str = self.start_date_input.date().toString("yyyy-MM-dd")
         end_date_str = self.end_date_input.date().toString("yyyy-MM-dd")
+        report_name = self.report_selector.currentText()
+
+        if report_name == "Gastos por Categoría (Circular)":
+            call = ("get_expenses_by_category", start_date_str, end_date_str)
+        else:
+            call = ("get_financial_summary", start_date_str, end_date_str)
 
-        if self.report_selector.currentText() == "Gastos por Categoría (Circular)":
-            self.plot_expenses_by_category(start_date_str, end_date_str)
-        elif self.report_selector.currentText() == "Ingresos vs. Gastos (Barras)":
-            self.plot_income_vs_expenses(start_date_str, end_date_str)
-
-        self.canvas.draw()
-
-    def plot_expenses_by_category(self, start_date, end_date):
-        """Crea un gráfico circular de gastos por categoría."""
-        expenses_df = self.analytics.get_expenses_by_category(start_date, end_date)
-
-        ax = self.figure.add_subplot(111)
-        ax.set_facecolor('#4F4F4F')  # Fondo del área del gráfico
-        self.figure.patch.set_facecolor('#4F4F4F')  # Fondo de la figura
-
-        if expenses_df.empty or expenses_df['amount'].sum() == 0:
-            ax.text(0.5, 0.5, "No hay datos de gastos para mostrar en este período.", ha='center', va='center',
-                    color='#E0E0E0', fontsize=16)
-            ax.axis('off')  # Ocultar ejes
-            return
-
-        # Ajustar colores para el tema oscuro
-        colors = plt.cm.Dark2.colors  # Puedes elegir otro colormap
-
-        ax.pie(expenses_df['amount'], labels=expenses_df['category'], autopct='%1.1f%%', startangle=90,
-               wedgeprops=dict(width=0.4, edgecolor='#3A3A3A'), colors=colors, textprops={'color': '#E0E0E0'})
-        ax.axis('equal')  # Asegura que el círculo sea un círculo.
-        ax.set_title("Distribución de Gastos por Categoría", color='#FFFFFF', fontsize=18)
-
-    def plot_income_vs_expenses(self, start_date, end_date):
-        """Crea un gráfico de barras comparando ingresos y gastos."""
-        summary = self.analytics.get_financial_summary(start_date, end_date)
-
-        ax = self.figure.add_subplot(111)
-        ax.set_facecolor('#4F4F4F')
-        self.figure.patch.set_facecolor('#4F4F4F')
-
-        labels = ['Ingresos Totales', 'Gastos Totales']
-        values = [summary['Ingresos Totales'], summary['Gastos Totales']]
-
-        if sum(values) == 0:
-            ax.text(0.5, 0.5, "No hay datos de ingresos o gastos para mostrar en este período.", ha='center',
-                    va='center', color='#E0E0E0', fontsize=16)
-            ax.axis('off')
-            return
-
-        bars = ax.bar(labels, values, color=['#6A1B9A', '#FFD700'])  # Colores personalizados
-        ax.set_title("Ingresos vs. Gastos", color='#FFFFFF', fontsize=18)
-        ax.set_ylabel("Monto (Bs)", color='#E0E0E0')
-        ax.tick_params(axis='x', colors='#E0E0E0')
-        ax.tick_params(axis='y', colors='#E0E0E0')
-        ax.spines['bottom'].set_color('#E0E0E0')
-        ax.spines['left'].set_color('#E0E0E0')
-        ax.spines['top'].set_visible(False)
-        ax.spines['right'].set_visible(False)
-
-        # Mostrar valores en las barras
-        for bar in bars:
-            yval = bar.get_height()
-            ax.text(bar.get_x() + bar.get_width() / 2, yval + 10, f'Bs{yval:.2f}', ha='center', va='bottom',
-                    color='#E0E0E0')
\ No newline at end of file
+        loading = self.analytics_runner.request(
+            {"data": call}, lambda results: self.show_report(report_name, results["data"]))
+        self.loading_label.setText("Actualizando...")
+        self.loading_label.setVisible(loading)
+
+    def show_load_error(self, message):
+        self.loading_label.setText("Error al actualizar")
+        self.loading_label.show()
+
+    def show_report(self, report_name, data):
+        """Actualiza el gráfico según la selección y el rango de fechas."""
+        self.loading_label.hide()
+        show_expenses = report_name == "Gastos por Categoría (Circular)"
+        visibility_changed = self.expenses_chart.ax.get_visible() != show_expenses
+        self.expenses_chart.ax.set_visible(show_expenses)
+        self.income_expenses_chart.ax.set_visible(not show_expenses)
+
+        if show_expenses:
+            changed = self.plot_expenses_by_category(data)
+        else:
+            changed = self.plot_income_vs_expenses(data)
+        if visibility_changed and not changed:
+            (self.expenses_chart if show_expenses else self.income_expenses_chart).request_draw()
+
+    def showEvent(self, event):
+        """Redibuja el gráfico si cambió mientras la página estaba oculta."""
+        super().showEvent(event)
+        self.expenses_chart.redraw_if_dirty()
+        self.income_expenses_chart.redraw_if_dirty()
+
+    def plot_expenses_by_category(self, expenses_df) -> bool:
+        """Actualiza el gráfico circular de gastos por categoría."""
+        return self.expenses_chart.update(expenses_df)
+
+    def plot_income_vs_expenses(self, summary) -> bool:
+        """Actualiza el gráfico de barras comparando ingresos y gastos."""
+        return self.income_expenses_chart.update(summary)
@@ -5,33 +5,147 @@ from PyQt6.QtWidgets import (
     QTableView, QHeaderView, QComboBox, QLineEdit, QLabel, QDialog,
     QFormLayout, QMessageBox, QDateEdit, QStyle
 )
-from PyQt6.QtCore import Qt, QDate, QAbstractTableModel, QVariant, pyqtSignal
+from bisect import bisect_right
+from collections import OrderedDict
+from dataclasses import replace
+
+from PyQt6.QtCore import Qt, QDate, QAbstractTableModel, QModelIndex, QTimer, QVariant, pyqtSignal
 from PyQt6.QtGui import QDoubleValidator
 
+from database.change_events import TransactionChange
 from database.db_manager import DBManager
-from models.transaction import Transaction
+from gui.workers import start_query
+from models.transaction import Transaction, TransactionFilter
 from config import EXPENSE_CATEGORIES, INCOME_CATEGORIES, TRANSACTION_TYPES
 
 
 class TransactionTableModel(QAbstractTableModel):
-    """Modelo de tabla para mostrar transacciones."""
+    """
+    Modelo de tabla que carga las transacciones bajo demanda.
+
+    Las filas se piden a la base de datos en páginas con paginación por clave
+    (fecha, id). De cada página descubierta solo se guarda su clave final y su
+    posición; el contenido se conserva en una caché LRU de pocas páginas y se
+    vuelve a consultar por rango de claves cuando hace falta. Junto a las filas
+    de cada página se guardan sus textos ya formateados para data().
+
+    Un cambio en una transacción (apply_change) solo vuelve a consultar la página
+    cuyo rango de claves la contiene y avisa a la vista con las filas insertadas,
+    borradas o modificadas, así se conservan el desplazamiento y la selección.
+    """
 
-    def __init__(self, data, parent=None):
+    PAGE_SIZE = 500
+    MAX_CACHED_PAGES = 6
+
+    def __init__(self, db_manager: DBManager, filters: TransactionFilter = None, total: int = None,
+                 first_page: list = None, parent=None):
         super().__init__(parent)
-        self._data = data
+        self.db_manager = db_manager
+        self.filters = filters or TransactionFilter()
         self.headers = ["ID", "Fecha", "Descripción", "Monto", "Tipo", "Categoría"]
+        self._clear_pages(self.db_manager.count_transactions(self.filters) if total is None else total)
+        # La primera página puede venir ya consultada en segundo plano
+        if first_page is not None:
+            self._append_page(first_page)
+        else:
+            self.fetchMore(QModelIndex())
+
+    def _clear_pages(self, total: int):
+        self._total = total
+        self._page_starts = []  # Primera fila de cada página
+        self._page_ends = []  # Clave (valor de orden, id) de la última fila de cada página
+        self._loaded_rows = 0
+        self._pages = OrderedDict()  # Índice de página -> (filas, textos), en orden de uso
 
-    def rowCount(self, parent):
-        return len(self._data)
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._loaded_rows
 
-    def columnCount(self, parent):
+    def columnCount(self, parent=QModelIndex()):
         return len(self.headers)
 
+    def total_count(self) -> int:
+        """Número total de transacciones que cumplen el filtro (COUNT(*))."""
+        return self._total
+
+    def canFetchMore(self, parent):
+        return not parent.isValid() and self._loaded_rows < self._total
+
+    def fetchMore(self, parent):
+        if parent.isValid():
+            return
+        after = self._page_ends[-1] if self._page_ends else None
+        rows = self.db_manager.get_transactions_page(after=after, limit=self.PAGE_SIZE, filters=self.filters)
+        self._append_page(rows)
+
+    def _append_page(self, rows):
+        if not rows:
+            self._total = self._loaded_rows
+            return
+        page_index = len(self._page_ends)
+        self.beginInsertRows(QModelIndex(), self._loaded_rows, self._loaded_rows + len(rows) - 1)
+        self._page_starts.append(self._loaded_rows)
+        self._page_ends.append(DBManager.page_key(rows[-1], self.filters))
+        self._loaded_rows += len(rows)
+        self._store_page(page_index, rows)
+        self.endInsertRows()
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        """Ordena en la base de datos por la columna pulsada en el encabezado."""
+        self.beginResetModel()
+        self.filters = replace(self.filters, sort_column=DBManager.TRANSACTION_COLUMNS[column],
+                               sort_descending=order == Qt.SortOrder.DescendingOrder)
+        self._clear_pages(self._total)
+        self.endResetModel()
+        self.fetchMore(QModelIndex())
+
+    def _store_page(self, page_index, rows):
+        entry = (rows, [tuple(str(value) for value in row) for row in rows])
+        self._pages[page_index] = entry
+        self._pages.move_to_end(page_index)
+        while len(self._pages) > self.MAX_CACHED_PAGES:
+            self._pages.popitem(last=False)
+        return entry
+
+    def _get_page(self, page_index):
+        """Devuelve (filas, textos) de una página, consultándola por rango de claves si no está en caché."""
+        entry = self._pages.get(page_index)
+        if entry is not None:
+            self._pages.move_to_end(page_index)
+            return entry
+        return self._store_page(page_index, self._query_page(page_index))
+
+    def _query_page(self, page_index) -> list:
+        """Filas actuales de una página en la base de datos, según su rango de claves."""
+        after = self._page_ends[page_index - 1] if page_index > 0 else None
+        return self.db_manager.get_transactions_page(after=after, until=self._page_ends[page_index],
+                                                     filters=self.filters)
+
+    def _locate(self, row: int):
+        """Devuelve (filas, textos, posición en la página) de una fila, o None si no existe."""
+        if not 0 <= row < self._loaded_rows:
+            return None
+        page_index = bisect_right(self._page_starts, row) - 1
+        rows, display = self._get_page(page_index)
+        offset = row - self._page_starts[page_index]
+        return (rows, display, offset) if offset < len(rows) else None
+
+    def row_data(self, row: int):
+        """Devuelve la tupla (id, fecha, descripción, monto, tipo, categoría) de una fila."""
+        located = self._locate(row)
+        return located[0][located[2]] if located else None
+
+    def transaction_id(self, row: int):
+        row_data = self.row_data(row)
+        return row_data[0] if row_data else None
+
     def data(self, index, role):
         if not index.isValid():
             return QVariant()
         if role == Qt.ItemDataRole.DisplayRole:
-            return str(self._data[index.row()][index.column()])
+            located = self._locate(index.row())
+            if located is None:
+                return QVariant()
+            return located[1][located[2]][index.column()]
         return QVariant()
 
     def headerData(self, section, orientation, role):
@@ -39,10 +153,83 @@ class TransactionTableModel(QAbstractTableModel):
             return self.headers[section]
         return QVariant()
 
-    def refresh(self, new_data):
-        self.beginResetModel()
-        self._data = new_data
-        self.endResetModel()
+    def _page_length(self, page_index: int) -> int:
+        following = self._page_starts[page_index + 1] if page_index + 1 < len(self._page_starts) else self._loaded_rows
+        return following - self._page_starts[page_index]
+
+    def _page_for_key(self, key: tuple):
+        """Primera página cuyo rango de claves llega hasta key, o None si key va después de lo cargado."""
+        low, high = 0, len(self._page_ends)
+        while low < high:
+            middle = (low + high) // 2
+            if DBManager.key_precedes(self._page_ends[middle], key, self.filters):
+                low = middle + 1
+            else:
+                high = middle
+        return low if low < len(self._page_ends) else None
+
+    def apply_change(self, change: TransactionChange):
+        """
+        Actualiza solo las filas afectadas por una transacción añadida, modificada o
+        borrada: vuelve a consultar las páginas donde estaban o deben estar sus
+        valores y avisa con beginInsertRows, beginRemoveRows o dataChanged.
+        """
+        if not self._page_ends:
+            # Tabla vacía: basta con contar de nuevo y cargar la primera página
+            self._total = self.db_manager.count_transactions(self.filters)
+            if self.canFetchMore(QModelIndex()):
+                self.fetchMore(QModelIndex())
+            return
+
+        all_loaded = self._loaded_rows >= self._total
+        pages, beyond_loaded = set(), False
+        for transaction, sign in change.deltas():
+            key = DBManager.page_key(DBManager.page_row(transaction), self.filters)
+            page_index = self._page_for_key(key)
+            if page_index is not None:
+                pages.add(page_index)
+            elif not all_loaded:
+                beyond_loaded = True
+            elif sign > 0:
+                # Con todo cargado, la última página se extiende hasta la fila nueva
+                self._page_ends[-1] = key
+                pages.add(len(self._page_ends) - 1)
+
+        for page_index in sorted(pages):
+            self._refresh_page(page_index, change)
+        if beyond_loaded:
+            # Una fila que aún no se cargó solo cambia el total por cargar
+            self._total = max(self.db_manager.count_transactions(self.filters), self._loaded_rows)
+
+    def _refresh_page(self, page_index: int, change: TransactionChange):
+        # La página nueva se consulta antes, pero el modelo sigue con la anterior hasta begin*Rows
+        start, old_length = self._page_starts[page_index], self._page_length(page_index)
+        rows = self._query_page(page_index)
+        delta = len(rows) - old_length
+        if delta == 0:
+            self._store_page(page_index, rows)
+            if rows:
+                self.dataChanged.emit(self.index(start, 0), self.index(start + len(rows) - 1, len(self.headers) - 1))
+            return
+
+        if delta > 0:
+            offset = next((i for i, row in enumerate(rows) if change.after and row[0] == change.after.id), 0)
+            self.beginInsertRows(QModelIndex(), start + offset, start + offset + delta - 1)
+        else:
+            old_key = DBManager.page_key(DBManager.page_row(change.before), self.filters) if change.before else None
+            offset = sum(1 for row in rows
+                         if old_key and DBManager.key_precedes(DBManager.page_key(row, self.filters), old_key,
+                                                               self.filters))
+            self.beginRemoveRows(QModelIndex(), start + offset, start + offset - delta - 1)
+        self._store_page(page_index, rows)
+        for following in range(page_index + 1, len(self._page_starts)):
+            self._page_starts[following] += delta
+        self._loaded_rows += delta
+        self._total += delta
+        if delta > 0:
+            self.endInsertRows()
+        else:
+            self.endRemoveRows()
 
 
 class TransactionViewerWindow(QMainWindow):
@@ -59,13 +246,23 @@ class TransactionViewerWindow(QMainWindow):
         self.setCentralWidget(self.central_widget)
         self.main_layout = QVBoxLayout(self.central_widget)
 
-        self.model = TransactionTableModel([])
+        self.model = None
+        self._filter_generation = 0
+        self._filter_worker = None
+
+        # Espera a que el usuario deje de escribir antes de consultar
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.timeout.connect(self.apply_filters)
 
         self.create_filter_area()
         self.create_table_view()
         self.create_button_area()
         self.load_transactions()
 
+        # La ventana se reutiliza: la tabla sigue los cambios aunque esté oculta
+        self.db_manager.changes.subscribe(self.on_transaction_changed)
+
     def create_filter_area(self):
         """Crea el área con los filtros y la barra de búsqueda."""
         filter_layout = QHBoxLayout()
@@ -89,9 +286,24 @@ class TransactionViewerWindow(QMainWindow):
         filter_layout.addWidget(QLabel("Buscar:"))
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("Descripción o monto...")
-        self.search_input.textChanged.connect(self.filter_transactions)
+        self.search_input.textChanged.connect(self.schedule_filter)
         filter_layout.addWidget(self.search_input)
 
+        # Rango de montos
+        filter_layout.addWidget(QLabel("Monto:"))
+        self.min_amount_input = QLineEdit()
+        self.min_amount_input.setPlaceholderText("mín.")
+        self.min_amount_input.setValidator(QDoubleValidator(0.0, 1000000000.0, 2))
+        self.min_amount_input.setFixedWidth(80)
+        self.min_amount_input.textChanged.connect(self.schedule_filter)
+        filter_layout.addWidget(self.min_amount_input)
+        self.max_amount_input = QLineEdit()
+        self.max_amount_input.setPlaceholderText("máx.")
+        self.max_amount_input.setValidator(QDoubleValidator(0.0, 1000000000.0, 2))
+        self.max_amount_input.setFixedWidth(80)
+        self.max_amount_input.textChanged.connect(self.schedule_filter)
+        filter_layout.addWidget(self.max_amount_input)
+
         filter_layout.addStretch()
         self.main_layout.addLayout(filter_layout)
 
@@ -121,8 +333,14 @@ class TransactionViewerWindow(QMainWindow):
         self.table_view.setSelectionMode(QTableView.SelectionMode.SingleSelection)
         self.table_view.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
         self.table_view.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
+        # Ordenar al pulsar el encabezado; por defecto, fecha descendente
+        self.table_view.horizontalHeader().setSortIndicator(1, Qt.SortOrder.DescendingOrder)
+        self.table_view.setSortingEnabled(True)
         self.main_layout.addWidget(self.table_view)
 
+        self.status_label = QLabel("")
+        self.main_layout.addWidget(self.status_label)
+
     def create_button_area(self):
         """Crea los botones de acción (Editar y Borrar)."""
         button_layout = QHBoxLayout()
@@ -141,30 +359,83 @@ class TransactionViewerWindow(QMainWindow):
         self.main_layout.addLayout(button_layout)
 
     def load_transactions(self):
-        """Carga y muestra todas las transacciones en la tabla."""
-        transactions = self.db_manager.get_all_transactions()
-        data = [[t.id, t.date, t.description, t.amount, t.type, t.category] for t in transactions]
-        self.model = TransactionTableModel(data)
+        """Muestra las transacciones que cumplen los filtros; las filas se cargan al desplazarse."""
+        self.set_model(TransactionTableModel(self.db_manager, self.current_filter()))
+
+    def set_model(self, model: TransactionTableModel):
+        self.model = model
         self.table_view.setModel(self.model)
+        self.update_status()
+
+    def update_status(self):
+        self.status_label.setText(f"{self.model.total_count()} transacciones")
+
+    def on_transaction_changed(self, change):
+        """Aplica a la tabla una transacción añadida, modificada o borrada sin recargarla."""
+        if self._filter_worker:
+            # La búsqueda en curso pudo leer los datos antes del cambio
+            self.apply_filters()
+        elif self.model is not None:
+            self.model.apply_change(change)
+            self.update_status()
+
+    @staticmethod
+    def _parse_amount(text: str):
+        text = text.strip().replace(',', '.')
+        try:
+            return float(text) if text else None
+        except ValueError:
+            return None
 
-    def filter_transactions(self):
-        """Filtra las transacciones basándose en la selección del usuario."""
+    def current_filter(self) -> TransactionFilter:
+        """Construye el filtro a partir de la selección del usuario y del orden de la tabla."""
         selected_type = self.type_filter.currentText()
         selected_category = self.category_filter.currentText()
-        search_term = self.search_input.text().strip().lower()
-
-        all_transactions = self.db_manager.get_all_transactions()
-        filtered_transactions = []
-
-        for t in all_transactions:
-            matches_type = selected_type == "Todos" or t.type == selected_type
-            matches_category = selected_category == "Todas" or t.category == selected_category
-            matches_search = search_term in t.description.lower() or search_term in str(t.amount)
+        header = self.table_view.horizontalHeader()
+        return TransactionFilter(
+            type="" if selected_type == "Todos" else selected_type,
+            category="" if selected_category in ("Todas", "") else selected_category,
+            search=self.search_input.text().strip(),
+            min_amount=self._parse_amount(self.min_amount_input.text()),
+            max_amount=self._parse_amount(self.max_amount_input.text()),
+            sort_column=DBManager.TRANSACTION_COLUMNS[header.sortIndicatorSection()],
+            sort_descending=header.sortIndicatorOrder() == Qt.SortOrder.DescendingOrder
+        )
 
-            if matches_type and matches_category and matches_search:
-                filtered_transactions.append([t.id, t.date, t.description, t.amount, t.type, t.category])
-
-        self.model.refresh(filtered_transactions)
+    def filter_transactions(self):
+        """Aplica de inmediato los filtros de tipo y categoría."""
+        self.schedule_filter(delay=0)
+
+    def schedule_filter(self, *args, delay: int = 300):
+        """Reinicia la espera antes de consultar; así cada pulsación no lanza una consulta."""
+        if self.model is not None:
+            self.filter_timer.start(delay)
+
+    def apply_filters(self):
+        """
+        Cuenta y carga la primera página en segundo plano. Si los filtros cambian
+        mientras tanto, la consulta anterior se interrumpe y su resultado se descarta.
+        """
+        self._filter_generation += 1
+        if self._filter_worker:
+            self._filter_worker.cancel()
+
+        filters = self.current_filter()
+        page_size = TransactionTableModel.PAGE_SIZE
+
+        def task(worker_db):
+            return (filters, worker_db.count_transactions(filters),
+                    worker_db.get_transactions_page(limit=page_size, filters=filters))
+
+        self.status_label.setText("Buscando...")
+        self._filter_worker = start_query(self.db_manager, self._filter_generation, task, self.show_filtered)
+
+    def show_filtered(self, generation: int, result):
+        if generation != self._filter_generation:
+            return
+        self._filter_worker = None
+        filters, total, first_page = result
+        self.set_model(TransactionTableModel(self.db_manager, filters, total=total, first_page=first_page))
 
     def edit_transaction(self):
         """Abre un diálogo para editar la transacción seleccionada."""
@@ -173,19 +444,15 @@ class TransactionViewerWindow(QMainWindow):
             QMessageBox.warning(self, "Error", "Por favor, seleccione una transacción para editar.")
             return
 
-        row = selected_index.row()
-        transaction_data = self.model._data[row]
-        transaction_id = transaction_data[0]
+        transaction_id = self.model.transaction_id(selected_index.row())
 
         # Cargar la transacción completa desde la base de datos
         transaction_to_edit = self.db_manager.get_transaction_by_id(transaction_id)
 
-        # Diálogo para editar
-        edit_dialog = TransactionEditDialog(transaction_to_edit, self.db_manager)
-        # Aquí está la corrección: usa 'QDialog.Accepted' con 'A' minúscula
-        if edit_dialog.exec() == QDialog.accepted:
-            self.load_transactions()  # Recargar la tabla
-            self.transaction_updated.emit()  # Notificar a la ventana principal
+        # Diálogo para editar; el resultado se informa cuando la escritura quedó confirmada
+        edit_dialog = TransactionEditDialog(transaction_to_edit, self.db_manager,
+                                            on_done=self.on_transaction_edited)
+        edit_dialog.exec()
 
     def delete_transaction(self):
         """Borra la transacción seleccionada de la base de datos."""
@@ -194,27 +461,42 @@ class TransactionViewerWindow(QMainWindow):
             QMessageBox.warning(self, "Error", "Por favor, seleccione una transacción para borrar.")
             return
 
-        row = selected_index.row()
-        transaction_id = self.model._data[row][0]
+        transaction_id = self.model.transaction_id(selected_index.row())
 
         reply = QMessageBox.question(self, "Confirmar Borrado",
                                      f"¿Está seguro de que desea borrar la transacción ID: {transaction_id}?",
                                      QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
 
         if reply == QMessageBox.StandardButton.Yes:
-            self.db_manager.delete_transaction(transaction_id)
-            self.load_transactions()
-            self.transaction_updated.emit()
-            QMessageBox.information(self, "Éxito", "Transacción borrada correctamente.")
+            self.db_manager.delete_transaction(transaction_id, on_done=self.on_transaction_deleted)
+
+    def on_transaction_edited(self, error):
+        """Informa del resultado cuando la modificación quedó guardada en disco (o falló)."""
+        if error:
+            QMessageBox.critical(self, "Error", f"Ocurrió un error al actualizar la transacción: {error}")
+            return
+        # La tabla ya se actualizó con el aviso de cambio de DBManager
+        self.transaction_updated.emit()  # Notificar a la ventana principal
+        QMessageBox.information(self, "Éxito", "Transacción actualizada correctamente.")
+
+    def on_transaction_deleted(self, error):
+        """Informa del resultado cuando el borrado quedó guardado en disco (o falló)."""
+        if error:
+            QMessageBox.critical(self, "Error", f"Ocurrió un error al borrar la transacción: {error}")
+            return
+        self.transaction_updated.emit()
+        QMessageBox.information(self, "Éxito", "Transacción borrada correctamente.")
 
 
 class TransactionEditDialog(QDialog):
     """Diálogo para editar una transacción existente."""
 
-    def __init__(self, transaction, db_manager):
+    def __init__(self, transaction, db_manager, on_done=None):
         super().__init__()
         self.transaction = transaction
         self.db_manager = db_manager
+        # Recibe el resultado de la escritura (None o el error), como en DBManager.update_transaction
+        self.on_done = on_done
 
         self.setWindowTitle(f"Editar Transacción: ID {self.transaction.id}")
         self.setFixedSize(400, 300)
@@ -278,9 +560,7 @@ class TransactionEditDialog(QDialog):
             self.transaction.type = transaction_type
             self.transaction.category = category
 
-            self.db_manager.update_transaction(self.transaction)
-
-            QMessageBox.information(self, "Éxito", "Transacción actualizada correctamente.")
+            self.db_manager.update_transaction(self.transaction, on_done=self.on_done)
             self.accept()  # Cerrar el diálogo
 
         except ValueError:
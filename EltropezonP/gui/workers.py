@@ -0,0 +1,163 @@
+# gui/workers.py
+
+import logging
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from business_logic.analytics import FinancialAnalytics
+from database.db_manager import DBManager
+
+logger = logging.getLogger(__name__)
+
+
+class QueryWorkerSignals(QObject):
+    """Señales de QueryWorker; QRunnable no puede emitir señales por sí mismo."""
+    finished = pyqtSignal(int, object)
+    failed = pyqtSignal(int, str)
+
+
+class QueryWorker(QRunnable):
+    """
+    Ejecuta una tarea de consulta en el pool de hilos con su propia conexión.
+
+    La tarea recibe un DBManager abierto en el hilo de trabajo. El resultado se
+    entrega con el número de generación de la petición, para que quien la lanzó
+    descarte los resultados de peticiones ya superadas.
+    """
+
+    def __init__(self, db_manager: DBManager, generation: int, task):
+        super().__init__()
+        self.db_manager = db_manager
+        self.generation = generation
+        self.task = task
+        self.signals = QueryWorkerSignals()
+        self._worker_db = None
+        self._cancelled = False
+
+    def cancel(self):
+        """Descarta el resultado e interrumpe la consulta si ya está en curso."""
+        self._cancelled = True
+        worker_db = self._worker_db
+        if worker_db:
+            worker_db.interrupt()
+
+    def run(self):
+        if self._cancelled:
+            return
+        self._worker_db = self.db_manager.spawn()
+        try:
+            result = self.task(self._worker_db)
+        except Exception as e:
+            logger.error("Error en la consulta en segundo plano: %s", e)
+            if not self._cancelled:
+                self.signals.failed.emit(self.generation, str(e))
+            return
+        finally:
+            worker_db, self._worker_db = self._worker_db, None
+            worker_db.close()
+        if not self._cancelled:
+            self.signals.finished.emit(self.generation, result)
+
+
+def start_query(db_manager: DBManager, generation: int, task, on_finished, on_failed=None) -> QueryWorker:
+    """Lanza una tarea en el pool global y conecta su resultado."""
+    worker = QueryWorker(db_manager, generation, task)
+    worker.signals.finished.connect(on_finished)
+    if on_failed:
+        worker.signals.failed.connect(on_failed)
+    QThreadPool.globalInstance().start(worker)
+    return worker
+
+
+class MainThreadInvoker(QObject):
+    """Ejecuta funciones en el hilo de la interfaz; se puede llamar desde cualquier hilo."""
+    _requested = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._requested.connect(self._run)
+
+    def __call__(self, function):
+        # Emitida desde otro hilo, la señal se encola y la función corre en el hilo de este objeto
+        self._requested.emit(function)
+
+    @staticmethod
+    def _run(function):
+        function()
+
+
+class AnalyticsRunner(QObject):
+    """
+    Calcula resultados de FinancialAnalytics fuera del hilo de la interfaz.
+
+    Los resultados que ya están en la caché se entregan al momento; el resto se
+    calcula en el pool de hilos con una conexión propia y se guarda en la caché
+    compartida. Solo se entrega el resultado de la última petición.
+    """
+    failed = pyqtSignal(str)
+
+    def __init__(self, analytics: FinancialAnalytics, parent=None):
+        super().__init__(parent)
+        self.analytics = analytics
+        self._generation = 0
+        self._pending = None
+        self._worker = None
+
+    def request(self, calls: dict, on_ready) -> bool:
+        """
+        Pide varios resultados de análisis.
+
+        Args:
+            calls (dict): Nombre del resultado -> (método de FinancialAnalytics, fecha inicio, fecha fin).
+            on_ready (callable): Recibe un dict con los resultados por nombre.
+
+        Returns:
+            bool: True si hay que esperar al cálculo en segundo plano.
+        """
+        self._generation += 1
+        if self._worker:
+            self._worker.cancel()
+            self._worker = None
+
+        results, missing = {}, {}
+        for name, call in calls.items():
+            found, value = self.analytics.peek(*call)
+            if found:
+                results[name] = value
+            else:
+                missing[name] = call
+        if not missing:
+            on_ready(results)
+            return False
+
+        def task(worker_db):
+            # Los resultados se guardan con la versión de los datos que leyeron, no la de la petición
+            worker_analytics = FinancialAnalytics(worker_db)
+            for method, start_date, end_date in missing.values():
+                worker_db.attach_archives(start_date, end_date)
+            with worker_db.read_snapshot():
+                return worker_db.get_data_version(), {
+                    name: getattr(worker_analytics, method)(start_date, end_date)
+                    for name, (method, start_date, end_date) in missing.items()}
+
+        self._pending = (results, missing, on_ready)
+        self._worker = start_query(self.analytics.db, self._generation, task, self._finished, self._failed)
+        return True
+
+    def _failed(self, generation: int, message: str):
+        if generation != self._generation:
+            return
+        self._pending = None
+        self._worker = None
+        self.failed.emit(message)
+
+    def _finished(self, generation: int, computed: tuple):
+        if generation != self._generation or self._pending is None:
+            return
+        version, computed = computed
+        results, missing, on_ready = self._pending
+        self._pending = None
+        self._worker = None
+        for name, (method, start_date, end_date) in missing.items():
+            self.analytics.remember(method, version, computed[name], start_date, end_date)
+        on_ready({**results, **computed})
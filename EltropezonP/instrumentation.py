@@ -0,0 +1,208 @@
+# instrumentation.py
+"""
+Medición ligera de tiempos en los puntos críticos de la aplicación.
+
+Las consultas a la base de datos, los cálculos de FinancialAnalytics y el dibujo
+de los gráficos se registran como eventos (categoría, nombre, inicio, duración y
+detalles como el SQL o las filas). Los eventos recientes se guardan en un búfer
+circular y todos se acumulan en histogramas por nombre. Mientras la medición está
+desactivada, cada punto medido solo comprueba la variable `enabled`.
+
+Se activa con la variable de entorno ELTROPEZON_PROFILE=1 (config.py) o con enable(). Los datos
+se pueden exportar como JSON o como traza de Chrome (chrome://tracing, Perfetto).
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from config import INSTRUMENTATION_ENABLED
+
+# Eventos recientes que se conservan en el búfer circular
+BUFFER_SIZE = 5000
+
+# Límites superiores (ms) de los intervalos de los histogramas; el último recoge el resto
+HISTOGRAM_BOUNDS_MS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float("inf")]
+
+enabled = INSTRUMENTATION_ENABLED
+
+_lock = threading.Lock()
+_events = deque(maxlen=BUFFER_SIZE)
+_histograms = {}
+# Referencia de tiempo para las marcas de la traza
+_origin = time.perf_counter()
+
+
+class Histogram:
+    """Distribución de duraciones de un punto medido."""
+    __slots__ = ("count", "total_ms", "max_ms", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * len(HISTOGRAM_BOUNDS_MS)
+
+    def add(self, duration_ms: float):
+        self.count += 1
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+        for index, bound in enumerate(HISTOGRAM_BOUNDS_MS):
+            if duration_ms <= bound:
+                self.buckets[index] += 1
+                break
+
+    def percentile(self, fraction: float) -> float:
+        """Percentil aproximado: el límite superior del intervalo que lo contiene."""
+        target = self.count * fraction
+        running = 0
+        for bound, bucket in zip(HISTOGRAM_BOUNDS_MS, self.buckets):
+            running += bucket
+            if running >= target:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "max_ms": self.max_ms,
+            "buckets": dict(zip([str(b) for b in HISTOGRAM_BOUNDS_MS], self.buckets)),
+        }
+
+
+def enable():
+    global enabled
+    enabled = True
+
+
+def disable():
+    global enabled
+    enabled = False
+
+
+def clear():
+    """Descarta los eventos y los histogramas acumulados."""
+    with _lock:
+        _events.clear()
+        _histograms.clear()
+
+
+def record(category: str, name: str, started: float, duration: float, **details):
+    """
+    Registra un evento ya medido.
+
+    Args:
+        category (str): Grupo del evento: "sql", "analytics", "chart"...
+        name (str): Punto medido (por ejemplo el método de DBManager).
+        started (float): Inicio según time.perf_counter().
+        duration (float): Duración en segundos.
+        details: Datos adicionales (SQL, filas...).
+    """
+    duration_ms = duration * 1000
+    event = (category, name, started - _origin, duration_ms, threading.get_ident(), details)
+    with _lock:
+        _events.append(event)
+        histogram = _histograms.get((category, name))
+        if histogram is None:
+            histogram = _histograms[(category, name)] = Histogram()
+        histogram.add(duration_ms)
+
+
+class span:
+    """
+    Mide el bloque que encierra:
+
+        with instrumentation.span("chart", "Rendimiento mensual"):
+            ...
+
+    Los detalles se pueden completar dentro del bloque con span.details.
+    """
+    __slots__ = ("category", "name", "details", "_started")
+
+    def __init__(self, category: str, name: str, **details):
+        self.category = category
+        self.name = name
+        self.details = details
+        self._started = None
+
+    def __enter__(self):
+        if enabled:
+            self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if self._started is not None:
+            if exc_type is not None:
+                self.details["error"] = str(exc)
+            record(self.category, self.name, self._started, time.perf_counter() - self._started, **self.details)
+        return False
+
+
+def timed(category: str, name: str = None):
+    """Decorador que mide cada llamada a la función cuando la medición está activa."""
+    def decorator(function):
+        event_name = name or function.__qualname__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return function(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(category, event_name, started, time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+def recent_events(limit: int = None) -> list:
+    """Eventos más recientes primero, como diccionarios."""
+    with _lock:
+        events = list(_events)
+    events.reverse()
+    if limit:
+        events = events[:limit]
+    return [{"category": category, "name": name, "start_ms": start * 1000, "duration_ms": duration_ms,
+             "thread": thread, **details}
+            for category, name, start, duration_ms, thread, details in events]
+
+
+def statistics() -> list:
+    """Resumen por punto medido, ordenado por tiempo total descendente."""
+    with _lock:
+        items = [(category, name, histogram.to_dict()) for (category, name), histogram in _histograms.items()]
+    items.sort(key=lambda item: item[2]["mean_ms"] * item[2]["count"], reverse=True)
+    return [{"category": category, "name": name, **stats} for category, name, stats in items]
+
+
+def export_json(path: str):
+    """Guarda los histogramas y los eventos recientes en un archivo JSON."""
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump({"statistics": statistics(), "events": recent_events()}, file, indent=2, ensure_ascii=False,
+                  default=str)
+
+
+def export_chrome_trace(path: str):
+    """Guarda los eventos recientes en el formato de traza de Chrome (Trace Event Format)."""
+    pid = os.getpid()
+    with _lock:
+        events = list(_events)
+    trace = [{
+        "name": name,
+        "cat": category,
+        "ph": "X",
+        "ts": start * 1_000_000,
+        "dur": duration_ms * 1000,
+        "pid": pid,
+        "tid": thread,
+        "args": details,
+    } for category, name, start, duration_ms, thread, details in events]
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, file, ensure_ascii=False, default=str)
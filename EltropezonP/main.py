@@ -1,14 +1,88 @@
+import logging
 import sys
+import time
+
+_started = time.perf_counter()
+
 from PyQt6.QtWidgets import QApplication
 
+from config import (LOG_FORMAT, LOG_LEVEL, WRITE_BEHIND_BATCH_ROWS, WRITE_BEHIND_ENABLED, WRITE_BEHIND_MAX_DELAY_MS,
+                    load_branches)
 from database.db_manager import DBManager
 from business_logic.analytics import FinancialAnalytics
-from gui.main_window import MainWindow
+from gui.main_window import DASHBOARD_PAGE, MainWindow
+from gui.workers import MainThreadInvoker
+
+_imported = time.perf_counter()
+
+
+class StartupProfiler:
+    """Mide las fases del arranque y las imprime al terminar de mostrar el panel de control."""
+
+    def __init__(self):
+        self.marks = [("Importaciones", _started, _imported)]
+        self._last = _imported
+        self._heavy_at_first_paint = []
+
+    def mark(self, phase: str):
+        now = time.perf_counter()
+        self.marks.append((phase, self._last, now))
+        self._last = now
+
+    def watch(self, main_window: MainWindow):
+        main_window.first_painted.connect(self._first_painted)
+        main_window.page_created.connect(self._page_created)
+        self._main_window = main_window
+
+    def _first_painted(self):
+        self.mark("Primer dibujo de la ventana")
+        self._heavy_at_first_paint = [name for name in ("pandas", "matplotlib") if name in sys.modules]
+
+    def _page_created(self, index: int):
+        if index == DASHBOARD_PAGE:
+            self.mark("Construcción del panel de control")
+            self._main_window.dashboard_page.data_shown.connect(self._dashboard_shown)
+
+    def _dashboard_shown(self):
+        self._main_window.dashboard_page.data_shown.disconnect(self._dashboard_shown)
+        self.mark("Consultas y gráficos del panel")
+        self.report()
+
+    def report(self):
+        print("Perfil de arranque:")
+        for phase, start, end in self.marks:
+            print(f"  {phase:<36} {(end - start) * 1000:8.1f} ms")
+        print(f"  {'Total':<36} {(self._last - _started) * 1000:8.1f} ms")
+        print(f"  Módulos pesados cargados antes del primer dibujo: "
+              f"{', '.join(self._heavy_at_first_paint) or 'ninguno'}")
+
 
 if __name__ == "__main__":
+    logging.basicConfig(level=LOG_LEVEL or logging.WARNING, format=LOG_FORMAT)
+    profiler = StartupProfiler() if "--profile-startup" in sys.argv else None
+    if profiler:
+        sys.argv.remove("--profile-startup")
+
     app = QApplication(sys.argv)
+    if profiler:
+        profiler.mark("Creación de QApplication")
     db_manager = DBManager()
-    financial_analytics = FinancialAnalytics(db_manager)
+    if WRITE_BEHIND_ENABLED:
+        # El escritor avisa desde su hilo; los cambios y confirmaciones se entregan en el de la interfaz
+        invoker = MainThreadInvoker(app)
+        db_manager.enable_write_behind(WRITE_BEHIND_BATCH_ROWS, WRITE_BEHIND_MAX_DELAY_MS,
+                                       notify=lambda: invoker(db_manager.deliver_write_results))
+    # Al salir se confirman las escrituras diferidas pendientes
+    app.aboutToQuit.connect(db_manager.close)
+    # Con varias sucursales configuradas los paneles muestran la vista consolidada y una por sucursal
+    branches = load_branches()
+    financial_analytics = (FinancialAnalytics.for_branches(branches) if len(branches) > 1
+                           else FinancialAnalytics(db_manager))
+    if profiler:
+        profiler.mark("Apertura de la base de datos")
     main_window = MainWindow(db_manager, financial_analytics)
+    if profiler:
+        profiler.mark("Construcción de la ventana")
+        profiler.watch(main_window)
     main_window.show()
-    sys.exit(app.exec())
\ No newline at end of file
+    sys.exit(app.exec())
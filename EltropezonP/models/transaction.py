@@ -1,10 +1,37 @@
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import date as Date, datetime
+from typing import Optional
 
+# En la base de datos los montos se guardan en céntimos y las fechas como días desde 1970-01-01
+EPOCH_ORDINAL = Date(1970, 1, 1).toordinal()
 
-@dataclass
+
+def to_cents(amount: float) -> int:
+    """Convierte un monto en bolívares a céntimos enteros."""
+    return int(round(amount * 100))
+
+
+def from_cents(cents: int) -> float:
+    """Convierte céntimos enteros a un monto en bolívares."""
+    return cents / 100
+
+
+def date_to_day(date_text: str) -> int:
+    """Convierte una fecha 'YYYY-MM-DD' en el número de días desde 1970-01-01."""
+    return Date.fromisoformat(date_text[:10]).toordinal() - EPOCH_ORDINAL
+
+
+def day_to_date(day: int) -> str:
+    """Convierte un número de días desde 1970-01-01 en una fecha 'YYYY-MM-DD'."""
+    return Date.fromordinal(day + EPOCH_ORDINAL).isoformat()
+
+
+@dataclass(slots=True)
 class Transaction:
-    """Clase para representar una transacción de ingresos o gastos."""
+    """
+    Clase para representar una transacción de ingresos o gastos.
+    Usa __slots__ (sin __dict__ por instancia) para ocupar menos memoria en listas grandes.
+    """
 
     # ID de la transacción, útil para la base de datos
     id: int = None
@@ -24,3 +51,24 @@ class Transaction:
     # Categoría del gasto (ej. 'Materia Prima', 'Salarios', 'Publicidad')
     category: str = ""
 
+
+@dataclass
+class TransactionFilter:
+    """Criterios para listar transacciones; los campos vacíos no filtran."""
+
+    # Tipo de transacción exacto ('Ingreso' o 'Gasto')
+    type: str = ""
+
+    # Categoría exacta
+    category: str = ""
+
+    # Texto a buscar en la descripción o en el monto
+    search: str = ""
+
+    # Rango de montos (ambos extremos incluidos)
+    min_amount: Optional[float] = None
+    max_amount: Optional[float] = None
+
+    # Columna por la que se ordena y sentido del orden
+    sort_column: str = "date"
+    sort_descending: bool = True
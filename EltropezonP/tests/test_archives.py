@@ -0,0 +1,81 @@
+# tests/test_archives.py
+"""
+Consultas sobre ejercicios cerrados (DBManager.close_fiscal_year), también con más
+ejercicios de los que caben adjuntos a una conexión, y su copia en las instantáneas.
+
+Uso, desde EltropezonP:
+    python -m pytest tests
+"""
+
+from database.db_manager import MAX_ATTACHED_ARCHIVES, DBManager
+from models.transaction import Transaction
+
+FIRST_YEAR = 2010
+YEARS = MAX_ATTACHED_ARCHIVES + 2
+
+
+def _transactions():
+    for number in range(YEARS * 40):
+        year = FIRST_YEAR + number % YEARS
+        yield Transaction(date=f"{year}-{number % 12 + 1:02d}-{number % 28 + 1:02d}",
+                          description=f"Venta {number % 7}", amount=10 + number % 50,
+                          type="Gasto" if number % 2 else "Ingreso",
+                          category="Publicidad" if number % 2 else "Venta")
+
+
+def _snapshot(db: DBManager) -> dict:
+    columns = db.get_transaction_columns(include_descriptions=True)
+    return {
+        "ids": columns["id"].tolist(),
+        "days": columns["day"].tolist(),
+        "amounts": columns["amount_cents"].tolist(),
+        "totals": db.get_totals_by_type(),
+        "expenses": db.get_category_totals("Gasto", f"{FIRST_YEAR}-03-10", f"{FIRST_YEAR + YEARS - 1}-11-20"),
+        "edge": db.get_transaction_columns(f"{FIRST_YEAR}-01-15", f"{FIRST_YEAR + YEARS - 1}-02-10")["id"].tolist(),
+    }
+
+
+def test_more_closed_years_than_attached_archives(tmp_path):
+    db = DBManager(str(tmp_path / "finances.db"))
+    try:
+        db.add_transactions_bulk(_transactions())
+        expected = _snapshot(db)
+        assert len(expected["ids"]) == YEARS * 40
+
+        for year in range(FIRST_YEAR, FIRST_YEAR + YEARS):
+            db.close_fiscal_year(year)
+        assert db.conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0] == 0
+        assert len(db.get_archives()) == YEARS
+
+        assert _snapshot(db) == expected
+        # Dentro de una instantánea de lectura no se puede adjuntar: los que faltan se leen aparte
+        with db.read_snapshot():
+            assert _snapshot(db) == expected
+        assert len(db._attached_archives) <= MAX_ATTACHED_ARCHIVES
+    finally:
+        db.close()
+
+
+def test_snapshot_copies_closed_years(tmp_path):
+    live_dir, snapshot_dir = tmp_path / "datos", tmp_path / "informes"
+    live_dir.mkdir()
+    snapshot_dir.mkdir()
+    db = DBManager(str(live_dir / "finances.db"))
+    try:
+        db.add_transactions_bulk(_transactions())
+        expected = _snapshot(db)
+        for year in range(FIRST_YEAR, FIRST_YEAR + 2):
+            db.close_fiscal_year(year)
+        assert db.create_snapshot(str(snapshot_dir / "snapshot.db"))
+    finally:
+        db.close()
+    # La instantánea no depende de los archivos en uso
+    for archive in live_dir.glob("finances_*.db"):
+        archive.unlink()
+
+    snapshot = DBManager(str(snapshot_dir / "snapshot.db"), initialize=False, read_only=True)
+    try:
+        assert all(path.startswith(str(snapshot_dir)) for path, in snapshot.conn.execute("SELECT path FROM archives"))
+        assert _snapshot(snapshot) == expected
+    finally:
+        snapshot.close()
@@ -0,0 +1,80 @@
+# tests/test_backup.py
+"""
+Copias de seguridad y restauración con ejercicios cerrados (database/backup.py).
+
+Uso, desde EltropezonP:
+    python -m pytest tests
+"""
+
+import os
+
+from database.backup import create_backup, list_backups, restore_backup
+from database.db_manager import DBManager
+from models.transaction import Transaction
+
+
+def _transactions():
+    for number in range(600):
+        year = 2023 if number % 3 else 2024
+        yield Transaction(date=f"{year}-{number % 12 + 1:02d}-{number % 28 + 1:02d}",
+                          description=f"Venta {number % 7}", amount=10 + number % 50,
+                          type="Ingreso" if number % 2 else "Gasto", category="Venta" if number % 2 else "Publicidad")
+
+
+def _count_rows(db_path: str) -> int:
+    db = DBManager(db_path, initialize=False)
+    try:
+        return db.conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+    finally:
+        db.close()
+
+
+def _state(db_path: str) -> dict:
+    """Filas en la base de datos y en cada ejercicio cerrado, y los totales que ve la aplicación."""
+    db = DBManager(db_path)
+    try:
+        archives = db.get_archives()
+        columns = db.get_transaction_columns()
+        return {
+            "rows": _count_rows(db_path),
+            "archived_rows": {year: _count_rows(path) for year, path in archives.items()},
+            "all_rows": len(columns["id"]),
+            "totals": db.get_totals_by_type(),
+            "expenses": db.get_category_totals("Gasto", "2023-03-10", "2024-02-20"),
+        }
+    finally:
+        db.close()
+
+
+def test_restore_brings_back_closed_fiscal_years(tmp_path):
+    db_path = str(tmp_path / "finances.db")
+    backup_dir = str(tmp_path / "copias")
+    db = DBManager(db_path)
+    db.add_transactions_bulk(_transactions())
+    assert db.close_fiscal_year(2023) == 400
+    archive_path = db.get_archives()[2023]
+    db.close()
+    expected = _state(db_path)
+    assert expected["rows"] == 200 and expected["archived_rows"] == {2023: 400} and expected["all_rows"] == 600
+
+    backup = create_backup(db_path, backup_dir)
+    assert set(backup.archives) == {2023}
+
+    # Después de la copia se pierde el ejercicio cerrado y cambian las transacciones abiertas
+    os.remove(archive_path)
+    db = DBManager(db_path)
+    db.add_transactions_bulk(Transaction(date="2024-05-01", description="Venta", amount=5, type="Ingreso",
+                                         category="Venta") for _ in range(10))
+    db.close()
+
+    previous_backup = restore_backup(backup.path, db_path, backup_dir)
+    assert previous_backup in list_backups(backup_dir)
+    assert _state(db_path) == expected
+
+
+def test_backups_in_the_same_second_do_not_overwrite_each_other(tmp_path):
+    db_path = str(tmp_path / "finances.db")
+    DBManager(db_path).close()
+    backup_dir = str(tmp_path / "copias")
+    paths = {create_backup(db_path, backup_dir).path for _ in range(3)}
+    assert len(paths) == 3 and set(list_backups(backup_dir)) == paths